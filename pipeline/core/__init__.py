@@ -8,11 +8,18 @@ from functools import lru_cache
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 
 from pipeline import constants
 from pipeline.helpers import db, dpdash, utils
 from pipeline.models.interview_roles import InterviewRole
+from pipeline.models.openface_bin_stats import STAT_COLS, STATS, OpenfaceBinStats
+from pipeline.models.openface_subject_stats import (
+    CROSS_COLS,
+    SUM_COLS,
+    OpenfaceSubjectStats,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +52,31 @@ def get_consent_date_from_subject_id(
         return results
 
 
+def get_consent_dates(config_file: Path, study_id: str) -> Dict[str, str]:
+    """
+    Retrieves the consent dates of all subjects of a study, with a single query.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        study_id (str): The ID of the study.
+
+    Returns:
+        Dict[str, str]: The consent date (YYYY-MM-DD) of each subject ID.
+    """
+    query = f"""
+        SELECT subject_id, consent_date
+        FROM subjects
+        WHERE study_id = '{study_id}'
+        ORDER BY subject_id;
+    """
+
+    results = db.execute_sql(config_file=config_file, query=query)
+
+    return {
+        row["subject_id"]: str(row["consent_date"]) for _, row in results.iterrows()
+    }
+
+
 def get_subject_ids(config_file: Path, study_id: str) -> List[str]:
     """
     Gets the subject IDs from the database.
@@ -558,6 +590,80 @@ def fetch_openface_features(
     return session_of_features
 
 
+def compute_openface_bin_stats(
+    features_df: pd.DataFrame, bin_size: int, cols: List[str] = STAT_COLS
+) -> pd.DataFrame:
+    """
+    Computes the mean and standard deviation of OpenFace features per time bin.
+
+    Bins are right-closed, as pd.cut made them: bin 'n' covers timestamps in
+    (n * bin_size, (n + 1) * bin_size] seconds. The first frame (timestamp 0)
+    is counted in bin 0.
+
+    Args:
+        features_df (pd.DataFrame): OpenFace features, with a 'timestamp' column
+            (seconds, or datetime.time).
+        bin_size (int): Size of each bin, in seconds.
+        cols (List[str], optional): Columns to aggregate. Defaults to STAT_COLS.
+
+    Returns:
+        pd.DataFrame: One row per non-empty bin, with 'bin', 'frame_count',
+            'timestamp_min', 'timestamp_max' and '<col>_<stat>' columns.
+    """
+    timestamps = features_df["timestamp"]
+    if timestamps.dtype == object:
+        timestamps = pd.to_timedelta(timestamps.astype(str)).dt.total_seconds()
+    bins = (np.ceil(timestamps / bin_size) - 1).clip(lower=0).astype(int).rename("bin")
+
+    grouped = features_df[cols].groupby(bins)
+    bin_stats = grouped.agg(STATS)
+    bin_stats.columns = [
+        OpenfaceBinStats.stat_column(col, stat) for col, stat in bin_stats.columns
+    ]
+
+    grouped_timestamps = timestamps.groupby(bins)
+    bin_stats.insert(0, "timestamp_max", grouped_timestamps.max())
+    bin_stats.insert(0, "timestamp_min", grouped_timestamps.min())
+    bin_stats.insert(0, "frame_count", grouped.size())
+
+    return bin_stats.reset_index()
+
+
+def fetch_openface_bin_stats(
+    interview_name: str,
+    role: InterviewRole,
+    bin_size: int,
+    config_file: Path,
+) -> pd.DataFrame:
+    """
+    Fetches the per-bin OpenFace statistics of an interview, for a given role.
+
+    Args:
+        interview_name (str): The name of the interview.
+        role (InterviewRole): The role to fetch statistics for.
+        bin_size (int): Size of each bin, in seconds.
+        config_file (Path): The path to the configuration file.
+
+    Returns:
+        pd.DataFrame: The bin statistics, ordered by bin. Empty if
+            load_openface has not computed them for this bin size.
+    """
+    sql_query = f"""
+        SELECT *
+        FROM openface_bin_stats
+        WHERE interview_name = '{interview_name}' AND
+            ir_role = '{role}' AND
+            bin_size = {bin_size}
+        ORDER BY bin;
+    """
+
+    bin_stats = db.execute_sql(
+        config_file=config_file, query=sql_query, db="openface_db"
+    )
+
+    return bin_stats
+
+
 @list_to_tuple
 @lru_cache(maxsize=32)
 def fetch_openface_subject_distribution(
@@ -591,6 +697,235 @@ def fetch_openface_subject_distribution(
     return subject_of_features
 
 
+def compute_openface_subject_stats(features_df: pd.DataFrame) -> pd.Series:
+    """
+    Computes the sufficient statistics of OpenFace frames
+    (see OpenfaceSubjectStats).
+
+    Args:
+        features_df (pd.DataFrame): Successful OpenFace frames, with SUM_COLS.
+
+    Returns:
+        pd.Series: 'frame_count', and the statistic columns.
+    """
+    sum_df = features_df[list(SUM_COLS)].astype(float)
+    cross_df = features_df[list(CROSS_COLS)].astype(float)
+
+    sums = sum_df.sum(axis=0)
+    sumsqs = (sum_df**2).sum(axis=0)
+    cross_products = cross_df.T @ cross_df
+
+    stats: Dict[str, float] = {"frame_count": len(features_df)}
+    for col in SUM_COLS:
+        stats[OpenfaceSubjectStats.sum_column(col)] = sums[col]
+        stats[OpenfaceSubjectStats.sumsq_column(col)] = sumsqs[col]
+    for idx, col_a in enumerate(CROSS_COLS):
+        for col_b in CROSS_COLS[idx + 1 :]:
+            stats[OpenfaceSubjectStats.cross_column(col_a, col_b)] = cross_products.loc[
+                col_a, col_b
+            ]
+
+    return pd.Series(stats, dtype=float)
+
+
+def fetch_openface_subject_stats(
+    subject_id: str,
+    config_file: Path,
+    role: InterviewRole = InterviewRole.SUBJECT,
+) -> Optional[pd.Series]:
+    """
+    Fetches the sufficient statistics of all OpenFace frames of a subject,
+    by summing the per-interview rows of openface_subject_stats.
+
+    Args:
+        subject_id (str): The subject ID.
+        config_file (Path): The path to the configuration file.
+        role (InterviewRole, optional): The role. Defaults to InterviewRole.SUBJECT.
+
+    Returns:
+        Optional[pd.Series]: 'interview_count' (the number of interviews
+            summed), 'frame_count', and the statistic columns. None if
+            no statistics have been computed for the subject.
+    """
+    stat_cols = ",\n".join(
+        [f'SUM("{col}") AS "{col}"' for col in OpenfaceSubjectStats.stat_columns()]
+    )
+
+    sql_query = f"""
+        SELECT
+            COUNT(*) AS interview_count,
+            SUM(frame_count) AS frame_count,
+            {stat_cols}
+        FROM openface_subject_stats
+        WHERE subject_id = '{subject_id}' AND
+            ir_role = '{role}';
+    """
+
+    subject_stats = db.execute_sql(
+        config_file=config_file, query=sql_query, db="openface_db"
+    )
+
+    if subject_stats.empty or pd.isna(subject_stats.iloc[0]["frame_count"]):
+        return None
+
+    return subject_stats.iloc[0].astype(float)
+
+
+def fetch_loaded_interview_count(subject_id: str, config_file: Path) -> int:
+    """
+    Fetches the number of interviews of a subject whose subject OpenFace
+    features were loaded by load_openface.
+
+    Args:
+        subject_id (str): The subject ID.
+        config_file (Path): The path to the configuration file.
+
+    Returns:
+        int: The number of interviews.
+    """
+    sql_query = f"""
+        SELECT COUNT(*) AS interview_count
+        FROM load_openface
+        WHERE subject_id = '{subject_id}' AND
+            subject_of_processed_path IS NOT NULL AND
+            lof_report_generation_possible = TRUE;
+    """
+
+    result = db.fetch_record(config_file=config_file, query=sql_query)
+    if result is None:
+        return 0
+
+    return int(result)
+
+
+def get_openface_subject_stats(subject_id: str, config_file: Path) -> pd.Series:
+    """
+    Returns the sufficient statistics of all OpenFace frames of a subject.
+
+    Falls back to computing them from openface_features, for subjects with
+    interviews loaded before openface_subject_stats existed: the statistics
+    must cover every interview load_openface loaded for the subject.
+
+    Args:
+        subject_id (str): The subject ID.
+        config_file (Path): The path to the configuration file.
+
+    Returns:
+        pd.Series: 'frame_count', and the statistic columns.
+    """
+    subject_stats = fetch_openface_subject_stats(
+        subject_id=subject_id, config_file=config_file
+    )
+    if subject_stats is None:
+        logger.warning(
+            f"No subject statistics for {subject_id}, aggregating frames... \
+(run scripts/rebuild_subject_stats.py to backfill)"
+        )
+    else:
+        stats_count = int(subject_stats["interview_count"])
+        loaded_count = fetch_loaded_interview_count(
+            subject_id=subject_id, config_file=config_file
+        )
+        if stats_count >= loaded_count:
+            return subject_stats.drop("interview_count")
+
+        logger.warning(
+            f"Subject statistics for {subject_id} cover {stats_count}/{loaded_count} \
+interviews, aggregating frames... (run scripts/rebuild_subject_stats.py to backfill)"
+        )
+
+    subject_of_features = fetch_openface_subject_distribution(
+        subject_id=subject_id, cols=SUM_COLS, config_file=config_file
+    )
+
+    return compute_openface_subject_stats(features_df=subject_of_features)
+
+
+def get_subject_stats_means(subject_stats: pd.Series, cols: List[str]) -> pd.Series:
+    """
+    Derives the mean of each column from sufficient statistics.
+
+    Args:
+        subject_stats (pd.Series): Statistics from get_openface_subject_stats.
+        cols (List[str]): Columns (from SUM_COLS).
+
+    Returns:
+        pd.Series: The means, indexed by column. NaN if there are no frames.
+    """
+    frame_count = subject_stats["frame_count"]
+    if frame_count < 1:
+        return pd.Series(float("nan"), index=cols)
+
+    sums = subject_stats[[OpenfaceSubjectStats.sum_column(col) for col in cols]]
+
+    return pd.Series(sums.to_numpy() / frame_count, index=cols)
+
+
+def get_subject_stats_stds(subject_stats: pd.Series, cols: List[str]) -> pd.Series:
+    """
+    Derives the (sample) standard deviation of each column from sufficient
+    statistics, matching pandas.DataFrame.std.
+
+    Args:
+        subject_stats (pd.Series): Statistics from get_openface_subject_stats.
+        cols (List[str]): Columns (from SUM_COLS).
+
+    Returns:
+        pd.Series: The standard deviations, indexed by column. NaN if there
+            are less than two frames.
+    """
+    frame_count = subject_stats["frame_count"]
+    if frame_count < 2:
+        return pd.Series(float("nan"), index=cols)
+
+    sums = subject_stats[[OpenfaceSubjectStats.sum_column(col) for col in cols]]
+    sumsqs = subject_stats[[OpenfaceSubjectStats.sumsq_column(col) for col in cols]]
+    variances = (sumsqs.to_numpy() - sums.to_numpy() ** 2 / frame_count) / (
+        frame_count - 1
+    )
+
+    # Clip rounding errors for constant columns
+    return pd.Series(variances, index=cols).clip(lower=0) ** 0.5
+
+
+def get_subject_stats_correlation(
+    subject_stats: pd.Series, cols: List[str]
+) -> pd.DataFrame:
+    """
+    Derives the Pearson correlation matrix of columns from sufficient
+    statistics, matching pandas.DataFrame.corr.
+
+    Args:
+        subject_stats (pd.Series): Statistics from get_openface_subject_stats.
+        cols (List[str]): Columns (from CROSS_COLS).
+
+    Returns:
+        pd.DataFrame: The correlation matrix, indexed by column on both axes.
+    """
+    frame_count = subject_stats["frame_count"]
+    covariances = pd.DataFrame(float("nan"), index=cols, columns=cols)
+    if frame_count < 2:
+        return covariances
+
+    for col_a in cols:
+        sum_a = subject_stats[OpenfaceSubjectStats.sum_column(col_a)]
+        for col_b in cols:
+            sum_b = subject_stats[OpenfaceSubjectStats.sum_column(col_b)]
+            if col_a == col_b:
+                cross = subject_stats[OpenfaceSubjectStats.sumsq_column(col_a)]
+            else:
+                cross = subject_stats[OpenfaceSubjectStats.cross_column(col_a, col_b)]
+            covariances.loc[col_a, col_b] = (cross - sum_a * sum_b / frame_count) / (
+                frame_count - 1
+            )
+
+    stds = pd.Series([covariances.loc[col, col] for col in cols], index=cols)
+    # Constant columns have no correlation (NaN), as with pandas
+    stds = stds.where(stds > 0) ** 0.5
+
+    return covariances / stds.to_numpy()[:, None] / stds.to_numpy()[None, :]
+
+
 def get_study_visits_count(config_file: Path, study_id: str) -> Optional[int]:
     """
     Get the number of visits for a given study.
@@ -3,7 +3,6 @@ Helper functions for decrypting files.
 """
 
 import logging
-import sys
 from pathlib import Path
 
 import cryptease as crypt
@@ -31,7 +30,7 @@ def get_key_from_config_file(config_file: Path) -> str:
     # Check if key_file exists
     if not Path(key_file).exists():
         logger.error(f"Error: key_file '{key_file}' does not exist.")
-        sys.exit(1)
+        raise FileNotFoundError(f"key_file '{key_file}' does not exist.")
 
     # Get key from key_file
     with open(key_file, "r", encoding="utf-8") as f:
@@ -51,6 +50,10 @@ def decrypt_file(
         file_to_decrypt (str): The path to the file to be decrypted.
         path_for_decrypted_file (str): The path to save the decrypted file.
 
+    Raises:
+        FileNotFoundError: If the key file does not exist, or the file was
+            not decrypted.
+
     Returns:
         None
     """
@@ -66,6 +69,6 @@ def decrypt_file(
 
     if not path_for_decrypted_file.exists():
         logger.error(f"Error: Decrypted file not found: {path_for_decrypted_file}")
-        sys.exit(1)
+        raise FileNotFoundError(f"Decrypted file not found: {path_for_decrypted_file}")
 
     return path_for_decrypted_file
@@ -0,0 +1,133 @@
+"""
+Columnar (Parquet) store for OpenFace features.
+
+A typed Parquet file is written next to each OpenFace CSV, when OpenFace
+completes. Consumers read only the columns they need, with filters pushed
+down to the Parquet row groups, instead of re-parsing the full CSV.
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from pipeline import core
+
+logger = logging.getLogger(__name__)
+
+# Rows per row group. Row group statistics allow skipping whole groups
+# when filtering on 'success' and 'timestamp'.
+ROW_GROUP_SIZE = 10000
+
+ARROW_TYPES = {
+    "INTEGER": pa.int64(),
+    "BOOLEAN": pa.bool_(),
+    "TIME": pa.float64(),
+    "FLOAT": pa.float64(),
+}
+
+
+def get_feature_store_path(csv_file: Path) -> Path:
+    """
+    Returns the path of the Parquet file for an OpenFace CSV file.
+
+    Args:
+        csv_file (Path): Path to the OpenFace CSV file.
+
+    Returns:
+        Path: Path to the Parquet file.
+    """
+    return csv_file.with_suffix(".parquet")
+
+
+def find_feature_store(of_processed_path: Path) -> Optional[Path]:
+    """
+    Returns the Parquet file in an OpenFace output directory, if it exists.
+
+    Args:
+        of_processed_path (Path): Path to the OpenFace output directory.
+
+    Returns:
+        Optional[Path]: Path to the Parquet file, or None.
+    """
+    return next(of_processed_path.glob("*.parquet"), None)
+
+
+def write_feature_store(config_file: Path, of_processed_path: Path) -> Optional[Path]:
+    """
+    Writes the OpenFace CSV file in an output directory as a typed Parquet file.
+
+    Column types come from the 'openface_features' section of the config file.
+    'time_cols' are stored as seconds (float), so they can be filtered on.
+
+    Args:
+        config_file (Path): Path to the config file.
+        of_processed_path (Path): Path to the OpenFace output directory.
+
+    Returns:
+        Optional[Path]: Path to the Parquet file, or None if no CSV file was found.
+    """
+    csv_file = next(of_processed_path.glob("*.csv"), None)
+    if csv_file is None:
+        logger.warning(f"No OpenFace CSV found in {of_processed_path}")
+        return None
+
+    datatypes = core.get_openface_datatypes(config_file=config_file, csv_file=csv_file)
+    column_types = {col: ARROW_TYPES[datatype] for col, datatype in datatypes.items()}
+
+    table = pa_csv.read_csv(
+        csv_file,
+        convert_options=pa_csv.ConvertOptions(column_types=column_types),
+        # Skip malformed rows, as pd.read_csv(on_bad_lines="skip") does
+        parse_options=pa_csv.ParseOptions(invalid_row_handler=lambda row: "skip"),
+    )
+
+    parquet_file = get_feature_store_path(csv_file)
+    pq.write_table(table, parquet_file, row_group_size=ROW_GROUP_SIZE)
+    logger.info(
+        f"Wrote {table.num_rows} rows to feature store: {parquet_file}",
+        extra={"markup": True},
+    )
+
+    return parquet_file
+
+
+def read_features(
+    parquet_file: Path,
+    columns: Optional[List[str]] = None,
+    success_only: bool = False,
+    time_range: Optional[Tuple[float, float]] = None,
+) -> pd.DataFrame:
+    """
+    Reads OpenFace features from the feature store.
+
+    Args:
+        parquet_file (Path): Path to the Parquet file.
+        columns (Optional[List[str]]): Columns to read (e.g. constants.AU_COLS).
+            Defaults to None, which reads all columns.
+        success_only (bool): Only read frames where OpenFace succeeded. Defaults to False.
+        time_range (Optional[Tuple[float, float]]): Only read frames with a timestamp
+            (in seconds) in [start, end). Defaults to None.
+
+    Returns:
+        pd.DataFrame: The requested features.
+    """
+    filters = []
+    if success_only:
+        filters.append(("success", "==", True))
+    if time_range is not None:
+        start, end = time_range
+        filters.append(("timestamp", ">=", start))
+        filters.append(("timestamp", "<", end))
+
+    table = pq.read_table(
+        parquet_file,
+        columns=columns,
+        filters=filters if filters else None,
+    )
+
+    return table.to_pandas()
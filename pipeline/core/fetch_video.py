@@ -6,17 +6,20 @@ import logging
 from pathlib import Path
 from typing import List, Optional, Tuple, Callable
 
+from pipeline.core import jobs
 from pipeline.helpers import db, dpdash
 from pipeline.models.decrypted_files import DecryptedFile
 
 logger = logging.getLogger(__name__)
 
+JOB_STAGE = "fetch_video"
+
 
 def get_file_to_decrypt(
     config_file: Path, study_id: str
 ) -> Optional[Tuple[str, str, str]]:
     """
-    Retrieves a file to decrypt from the database.
+    Claims a file to decrypt from the job queue.
 
     Args:
         config_file (Path): The path to the config file.
@@ -26,8 +29,8 @@ def get_file_to_decrypt(
             the interview type, and the interview name.
     """
 
-    query = f"""
-        SELECT interview_file, interview_type, interview_name
+    items_query = f"""
+        SELECT interview_file AS item
         FROM interview_files
         INNER JOIN interviews ON interview_files.interview_path = interviews.interview_path
         WHERE interviews.study_id = '{study_id}' AND
@@ -35,20 +38,39 @@ def get_file_to_decrypt(
             interview_files.interview_file NOT IN (
                 SELECT source_path FROM decrypted_files
             ) AND interview_files.ignored = FALSE
-        ORDER BY RANDOM()
-        LIMIT 1
         """
 
-    df = db.execute_sql(config_file=config_file, query=query)
-
-    if df.empty:
-        return None
-
-    file_to_decrypt = df["interview_file"].iloc[0]
-    interview_type = df["interview_type"].iloc[0]
-    interview_name = df["interview_name"].iloc[0]
-
-    return file_to_decrypt, interview_type, interview_name
+    def fetch_item(item: str) -> Optional[Tuple[str, str, str]]:
+        query = f"""
+            SELECT interview_file, interview_type, interview_name
+            FROM interview_files
+            INNER JOIN interviews ON interview_files.interview_path = interviews.interview_path
+            WHERE interview_files.interview_file = '{db.santize_string(item)}' AND
+                interview_files.ignored = FALSE AND
+                NOT EXISTS (
+                    SELECT 1 FROM decrypted_files
+                    WHERE decrypted_files.source_path = interview_files.interview_file
+                )
+            """
+
+        df = db.execute_sql(config_file=config_file, query=query)
+
+        if df.empty:
+            return None
+
+        file_to_decrypt = df["interview_file"].iloc[0]
+        interview_type = df["interview_type"].iloc[0]
+        interview_name = df["interview_name"].iloc[0]
+
+        return file_to_decrypt, interview_type, interview_name
+
+    return jobs.claim_next(
+        config_file=config_file,
+        stage=JOB_STAGE,
+        study_id=study_id,
+        items_query=items_query,
+        fetch_item=fetch_item,
+    )
 
 
 def check_if_interview_has_duplicates(interview_name: str, config_file: Path) -> bool:
@@ -208,3 +230,4 @@ def log_decryption_request(
     query = decrypted_file.to_sql()
 
     db.execute_queries(config_file=config_file, queries=[query], on_failure=on_failure)
+    jobs.complete_job(config_file=config_file, stage=JOB_STAGE, item=str(source_path))
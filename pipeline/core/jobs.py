@@ -0,0 +1,338 @@
+"""
+Claim-based job queue, shared by the pipeline stages.
+
+Each stage describes its outstanding work with a SELECT query returning an
+'item' column. Outstanding items are added to the 'pipeline_jobs' table in bulk,
+only when the stage's queue is drained, and runners claim one job at a time
+with 'FOR UPDATE SKIP LOCKED'. Any number of runner instances can drain a
+stage without picking the same item.
+"""
+
+import logging
+import os
+import socket
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Tuple, TypeVar
+
+from pipeline.helpers import db, utils
+from pipeline.models.pipeline_jobs import PipelineJob
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Lease owner of the jobs processed by this process, see set_worker_id
+_worker_id: Optional[str] = None
+
+
+def get_worker_id() -> str:
+    """
+    Returns an identifier for the current process, used as the lease owner.
+
+    Returns:
+        str: The worker ID, as '<hostname>:<pid>', or the ID set with
+            set_worker_id.
+    """
+    if _worker_id is not None:
+        return _worker_id
+
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def set_worker_id(worker_id: Optional[str]) -> None:
+    """
+    Sets the lease owner of the jobs processed by this process.
+
+    Worker processes that process jobs claimed by another process (e.g. the
+    scheduler's stage pools) use the claiming process's ID, so that their
+    heartbeats extend its leases, and their updates apply to its jobs.
+
+    Args:
+        worker_id (Optional[str]): The worker ID of the claiming process,
+            None to use this process's own ID.
+    """
+    global _worker_id  # pylint: disable=global-statement
+    _worker_id = worker_id
+
+
+def get_lease_params(config_file: Path) -> Tuple[int, int]:
+    """
+    Returns the job lease duration and maximum attempts from the configuration file.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+
+    Returns:
+        Tuple[int, int]: The lease duration in seconds, and the maximum
+            number of attempts per job.
+    """
+    params = utils.config(config_file, section="orchestration")
+
+    lease_seconds = int(params.get("job_lease_seconds", 600))
+    max_attempts = int(params.get("job_max_attempts", 3))
+
+    return lease_seconds, max_attempts
+
+
+def _execute(config_file: Path, queries: list) -> list:
+    return db.execute_queries(
+        config_file=config_file,
+        queries=queries,
+        show_commands=False,
+        silent=True,
+    )
+
+
+def enqueue_jobs(
+    config_file: Path, stage: str, study_id: str, items_query: str
+) -> None:
+    """
+    Adds all outstanding items of a stage to the queue.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        stage (str): The pipeline stage.
+        study_id (str): The study ID.
+        items_query (str): A SELECT query returning an 'item' column,
+            with the items that still need to be processed.
+    """
+    query = PipelineJob.enqueue_query(
+        stage=stage, study_id=study_id, items_query=items_query
+    )
+    _execute(config_file=config_file, queries=[query])
+
+
+def claim_job(
+    config_file: Path, stage: str, study_id: str, items_query: str
+) -> Optional[str]:
+    """
+    Claims the oldest pending job of a stage.
+
+    Jobs with expired leases are released first. If the queue is empty, the
+    outstanding items are enqueued using 'items_query' and the claim is retried.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        stage (str): The pipeline stage.
+        study_id (str): The study ID.
+        items_query (str): A SELECT query returning an 'item' column,
+            with the items that still need to be processed.
+
+    Returns:
+        Optional[str]: The claimed item, or None if there is no work.
+    """
+    lease_seconds, max_attempts = get_lease_params(config_file=config_file)
+    queries = [
+        PipelineJob.release_expired_query(stage=stage, max_attempts=max_attempts),
+        PipelineJob.claim_query(
+            stage=stage,
+            study_id=study_id,
+            worker=get_worker_id(),
+            lease_seconds=lease_seconds,
+        ),
+    ]
+
+    output = _execute(config_file=config_file, queries=queries)
+    if output and output[-1]:
+        return output[-1][0][0]
+
+    enqueue_jobs(
+        config_file=config_file,
+        stage=stage,
+        study_id=study_id,
+        items_query=items_query,
+    )
+
+    output = _execute(config_file=config_file, queries=queries[1:])
+    if output and output[-1]:
+        return output[-1][0][0]
+
+    return None
+
+
+def claim_item(config_file: Path, stage: str, study_id: str, item: str) -> bool:
+    """
+    Claims the job for a specific item, adding it to the queue if needed.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        stage (str): The pipeline stage.
+        study_id (str): The study ID.
+        item (str): The item to claim.
+
+    Returns:
+        bool: True if the job was claimed, False if it is claimed by another
+            runner, or already done.
+    """
+    lease_seconds, _ = get_lease_params(config_file=config_file)
+    item_sanitized = db.santize_string(item)
+
+    queries = [
+        f"""
+        INSERT INTO pipeline_jobs (pj_stage, pj_item, study_id)
+        VALUES ('{stage}', '{item_sanitized}', '{study_id}')
+        ON CONFLICT (pj_stage, pj_item) DO NOTHING;
+        """,
+        PipelineJob.claim_item_query(
+            stage=stage,
+            item=item,
+            worker=get_worker_id(),
+            lease_seconds=lease_seconds,
+        ),
+    ]
+
+    output = _execute(config_file=config_file, queries=queries)
+
+    return bool(output and output[-1])
+
+
+def claim_next(
+    config_file: Path,
+    stage: str,
+    study_id: str,
+    items_query: str,
+    fetch_item: Callable[[str], Optional[T]],
+) -> Optional[T]:
+    """
+    Claims the next job of a stage, and fetches the details needed to process it.
+
+    'fetch_item' must return None if the item no longer needs processing
+    (e.g. it was processed after being queued). Such jobs are marked as done,
+    and the next job is claimed.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        stage (str): The pipeline stage.
+        study_id (str): The study ID.
+        items_query (str): A SELECT query returning an 'item' column,
+            with the items that still need to be processed.
+        fetch_item (Callable[[str], Optional[T]]): Fetches the details for an item.
+
+    Returns:
+        Optional[T]: The details of the claimed item, or None if there is no work.
+    """
+    while True:
+        item = claim_job(
+            config_file=config_file,
+            stage=stage,
+            study_id=study_id,
+            items_query=items_query,
+        )
+        if item is None:
+            return None
+
+        details = fetch_item(item)
+        if details is not None:
+            return details
+
+        logger.debug(f"Job {stage}:{item} is no longer pending. Skipping...")
+        complete_job(config_file=config_file, stage=stage, item=item)
+
+
+def heartbeat(config_file: Path, stage: str, item: str) -> None:
+    """
+    Extends the lease of a job claimed by this process.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        stage (str): The pipeline stage.
+        item (str): The item being processed.
+    """
+    lease_seconds, _ = get_lease_params(config_file=config_file)
+    query = PipelineJob.heartbeat_query(
+        stage=stage, item=item, worker=get_worker_id(), lease_seconds=lease_seconds
+    )
+    db.execute_queries(
+        config_file=config_file,
+        queries=[query],
+        show_commands=False,
+        silent=True,
+        on_failure=None,
+    )
+
+
+def complete_job(config_file: Path, stage: str, item: str) -> None:
+    """
+    Marks a job as done.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        stage (str): The pipeline stage.
+        item (str): The processed item.
+    """
+    query = PipelineJob.set_state_query(
+        stage=stage, item=item, state="done", worker=get_worker_id()
+    )
+    _execute(config_file=config_file, queries=[query])
+
+
+def release_job(config_file: Path, stage: str, item: str) -> None:
+    """
+    Returns a claimed job to the back of the queue, e.g. when processing is
+    interrupted, or the item is busy. The attempt is not counted.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        stage (str): The pipeline stage.
+        item (str): The item to release.
+    """
+    query = PipelineJob.release_query(stage=stage, item=item, worker=get_worker_id())
+    _execute(config_file=config_file, queries=[query])
+
+
+def fail_job(config_file: Path, stage: str, item: str) -> None:
+    """
+    Marks a job as failed. Failed jobs are not retried automatically.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        stage (str): The pipeline stage.
+        item (str): The item that failed.
+    """
+    query = PipelineJob.set_state_query(
+        stage=stage, item=item, state="failed", worker=get_worker_id()
+    )
+    _execute(config_file=config_file, queries=[query])
+
+
+class JobHeartbeat:
+    """
+    A context manager that keeps the lease of a job alive, while it is processed.
+
+    Usage:
+    ```
+    with JobHeartbeat(config_file, stage, item):
+        # long running processing
+    ```
+    """
+
+    def __init__(self, config_file: Path, stage: str, item: str) -> None:
+        self.config_file = config_file
+        self.stage = stage
+        self.item = item
+
+        lease_seconds, _ = get_lease_params(config_file=config_file)
+        self.interval = max(lease_seconds // 3, 1)
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                heartbeat(
+                    config_file=self.config_file, stage=self.stage, item=self.item
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning(f"Heartbeat failed for {self.stage}:{self.item}: {e}")
+
+    def __enter__(self) -> "JobHeartbeat":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -4,23 +4,25 @@ Helper functions for loading OpenFace features into the database.
 
 import logging
 from pathlib import Path
-from typing import Dict, List
+from typing import Optional
 
 import pandas as pd
-from tqdm import tqdm
 
 from pipeline import core
-from pipeline.core import metadata
-from pipeline.helpers import db, dpdash, ffprobe
+from pipeline.core import feature_store, jobs, metadata
+from pipeline.helpers import db, dpdash, ffprobe, utils
 from pipeline.helpers.timer import Timer
 from pipeline.models.load_openface import LoadOpenface
 
 logger = logging.getLogger(__name__)
 
+JOB_STAGE = "load_openface"
+NOTIFY_CHANNEL = "load_openface"
 
-def get_interview_to_process(config_file: Path, study_id: str):
+
+def get_interview_to_process(config_file: Path, study_id: str) -> Optional[str]:
     """
-    Fetch an interview to process from the database.
+    Claims an interview to process from the job queue.
 
     - Fetches an interview that has not been processed yet.
         - Must be processed by OpenFace.
@@ -29,8 +31,8 @@ def get_interview_to_process(config_file: Path, study_id: str):
         config_file (Path): Path to the config file.
         study_id (str): Study ID.
     """
-    query = f"""
-    SELECT interview_files.interview_name
+    items_query = f"""
+    SELECT interview_files.interview_name AS item
     FROM openface
     INNER JOIN video_streams USING (vs_path)
     INNER JOIN (
@@ -69,18 +71,51 @@ def get_interview_to_process(config_file: Path, study_id: str):
         JOIN interviews USING (interview_path)
         WHERE interviews.study_id = '{study_id}'
     )
-    ORDER BY RANDOM()
-    LIMIT 1
     """
 
-    df = db.execute_sql(config_file=config_file, query=query)
-
-    if df.empty:
-        return None
+    def fetch_item(item: str) -> Optional[str]:
+        # Not loaded yet, and all of its video streams are processed by OpenFace
+        query = f"""
+        SELECT interviews.interview_name
+        FROM interviews
+        WHERE interviews.interview_name = '{db.santize_string(item)}' AND
+            interviews.study_id = '{study_id}' AND
+            NOT EXISTS (
+                SELECT 1 FROM load_openface
+                WHERE load_openface.interview_name = interviews.interview_name
+            ) AND EXISTS (
+                SELECT 1
+                FROM interview_files
+                JOIN decrypted_files
+                    ON interview_files.interview_file = decrypted_files.source_path
+                JOIN video_streams
+                    ON video_streams.video_path = decrypted_files.destination_path
+                JOIN openface USING (vs_path)
+                WHERE interview_files.interview_path = interviews.interview_path
+            ) AND NOT EXISTS (
+                SELECT 1
+                FROM interview_files
+                JOIN decrypted_files
+                    ON interview_files.interview_file = decrypted_files.source_path
+                JOIN video_streams AS vs
+                    ON vs.video_path = decrypted_files.destination_path
+                WHERE interview_files.interview_path = interviews.interview_path AND
+                    NOT EXISTS (
+                        SELECT 1 FROM openface WHERE openface.vs_path = vs.vs_path
+                    )
+            )
+        LIMIT 1;
+        """
 
-    interview_name = df["interview_name"].iloc[0]
+        return db.fetch_record(config_file=config_file, query=query)
 
-    return interview_name
+    return jobs.claim_next(
+        config_file=config_file,
+        stage=JOB_STAGE,
+        study_id=study_id,
+        items_query=items_query,
+        fetch_item=fetch_item,
+    )
 
 
 def get_openface_runs(config_file: Path, interview_name: str) -> pd.DataFrame:
@@ -249,27 +284,25 @@ def construct_load_openface(
     return lof
 
 
-def construct_insert_queries(
-    config_file: Path,
-    interview_name: str,
-    role: str,
-    subject_id: str,
-    study_id: str,
-    csv_file: Path,
-) -> List[str]:
+def read_openface_features(config_file: Path, csv_file: Path) -> pd.DataFrame:
     """
-    Constructs a list of SQL insert queries for OpenFace features from a CSV file.
+    Reads an OpenFace CSV file, and casts each column to the datatype
+    it has in the openface_features table.
+
+    Reads from the feature store instead of the CSV, if it exists.
 
     Args:
-        interview_name (str): The name of the interview.
-        role (str): The role of the participant.
-        subject_id (str): The subject ID.
-        csv_file (str): The path to the CSV file containing the OpenFace features.
+        config_file (Path): Path to the config file.
+        csv_file (Path): The path to the CSV file containing the OpenFace features.
 
     Returns:
-        List[str]: A list of SQL insert queries.
+        pd.DataFrame: The typed OpenFace features, without rows containing NaN values.
     """
-    df = pd.read_csv(csv_file, on_bad_lines="skip")
+    parquet_file = feature_store.get_feature_store_path(csv_file)
+    if parquet_file.exists():
+        df = feature_store.read_features(parquet_file=parquet_file)
+    else:
+        df = pd.read_csv(csv_file, on_bad_lines="skip")
 
     # Get datatypes
     datatypes = core.get_openface_datatypes(config_file, csv_file)
@@ -294,105 +327,218 @@ def construct_insert_queries(
         except ValueError as e:
             print(f"Error casting {col} with value {df[col]} to {datatype}: {e}")
 
-    queries: List[str] = []
+    return df
+
+
+def construct_openface_features_df(
+    config_file: Path,
+    interview_name: str,
+    role: str,
+    subject_id: str,
+    study_id: str,
+    csv_file: Path,
+) -> pd.DataFrame:
+    """
+    Constructs a DataFrame, matching the openface_features table, from a CSV file.
+
+    Args:
+        config_file (Path): Path to the config file.
+        interview_name (str): The name of the interview.
+        role (str): The role of the participant.
+        subject_id (str): The subject ID.
+        study_id (str): The study ID.
+        csv_file (Path): The path to the CSV file containing the OpenFace features.
 
-    for _, row in tqdm(df.iterrows(), total=len(df)):
-        vals: Dict[str, str] = {}
+    Returns:
+        pd.DataFrame: The typed OpenFace features, with the interview identifiers.
+    """
+    df = read_openface_features(config_file=config_file, csv_file=csv_file)
 
-        for col in cols:
-            vals[col] = str(row[col])
+    df.insert(0, "study_id", study_id)
+    df.insert(0, "subject_id", subject_id)
+    df.insert(0, "ir_role", role)
+    df.insert(0, "interview_name", interview_name)
 
-        query = f"""
-            INSERT INTO openface_features (
-                interview_name,
-                ir_role,
-                subject_id,
-                study_id,
-                {", ".join(['"' + col + '"' for col in cols])}
-            ) VALUES (
-                '{interview_name}',
-                '{role}',
-                '{subject_id}',
-                '{study_id}',
-                {", ".join(["'" + vals[col] + "'" for col in cols])}
-            ) ON CONFLICT (interview_name, ir_role, frame, face_id) DO NOTHING;
-        """
+    return df
+
+
+def get_openface_csv_file(lof: LoadOpenface, role: str, of_processed_path: str) -> Path:
+    """
+    Returns the OpenFace CSV file for a role of an interview.
+
+    Args:
+        lof (LoadOpenface): LoadOpenface object.
+        role (str): The role of the participant.
+        of_processed_path (str): The OpenFace output directory for the role.
+
+    Returns:
+        Path: The path to the OpenFace CSV file.
+    """
+    csv_files_f = Path(of_processed_path).glob("*.csv")
+    csv_files = sorted(csv_files_f)
+    if len(csv_files) > 1:
+        message = f"More than one OpenFace CSV file found for \
+{lof.interview_name} {role}"
+        logger.error(message)
+        raise ValueError(message)
+
+    return csv_files[0]
+
+
+def get_bin_size(config_file: Path) -> int:
+    """
+    Returns the bin size (in seconds) used by report generation.
+
+    Args:
+        config_file (Path): Path to the config file.
+    """
+    report_params = utils.config(config_file, section="report_generation")
+    return int(report_params["bin_size"])
+
+
+def import_openface_bin_stats(
+    config_file: Path, features_df: pd.DataFrame, bin_size: int
+) -> int:
+    """
+    Computes per-bin statistics of successful frames, and loads them
+    into the openface_bin_stats table.
+
+    Args:
+        config_file (Path): Path to the config file.
+        features_df (pd.DataFrame): DataFrame from construct_openface_features_df.
+        bin_size (int): Size of each bin, in seconds.
+
+    Returns:
+        int: The number of bins inserted.
+    """
+    success_df = features_df[features_df["success"]]
+    if success_df.empty:
+        logger.warning("No successful frames, skipping bin statistics")
+        return 0
+
+    bin_stats = core.compute_openface_bin_stats(
+        features_df=success_df, bin_size=bin_size
+    )
+
+    for col in ["study_id", "subject_id", "ir_role", "interview_name"]:
+        bin_stats.insert(0, col, features_df[col].iloc[0])
+    bin_stats.insert(4, "bin_size", bin_size)
+
+    inserted_bins = db.copy_df_to_table(
+        config_file=config_file,
+        df=bin_stats,
+        table_name="openface_bin_stats",
+        conflict_columns=["interview_name", "ir_role", "bin_size", "bin"],
+        db="openface_db",
+    )
+    logger.info(f"Loaded {inserted_bins}/{len(bin_stats)} bins of {bin_size} seconds")
+
+    return inserted_bins
 
-        queries.append(query)
 
-    return queries
+def import_openface_subject_stats(config_file: Path, features_df: pd.DataFrame) -> int:
+    """
+    Computes the sufficient statistics of successful frames, and loads them
+    into the openface_subject_stats table, replacing the statistics of an
+    interview that is loaded again.
+
+    Args:
+        config_file (Path): Path to the config file.
+        features_df (pd.DataFrame): DataFrame from construct_openface_features_df.
+
+    Returns:
+        int: The number of rows inserted or updated.
+    """
+    success_df = features_df[features_df["success"]]
+
+    subject_stats = core.compute_openface_subject_stats(features_df=success_df)
+    subject_stats_df = subject_stats.to_frame().T
+    subject_stats_df["frame_count"] = subject_stats_df["frame_count"].astype(int)
+    for col in ["study_id", "subject_id", "ir_role", "interview_name"]:
+        subject_stats_df.insert(0, col, features_df[col].iloc[0])
+
+    inserted_rows = db.copy_df_to_table(
+        config_file=config_file,
+        df=subject_stats_df,
+        table_name="openface_subject_stats",
+        conflict_columns=["interview_name", "ir_role"],
+        update_on_conflict=True,
+        db="openface_db",
+    )
+    logger.info(f"Loaded subject statistics of {len(success_df)} frames")
+
+    return inserted_rows
 
 
 def import_of_openface_db(config_file: Path, lof: LoadOpenface) -> LoadOpenface:
     """
     Imports OpenFace features into openface_db.
 
+    Features are bulk loaded with COPY, through a staging table, skipping
+    frames that are already present in openface_features. Per-bin statistics
+    are written to openface_bin_stats, and sufficient statistics of the
+    interview to openface_subject_stats, for report generation.
+
     Args:
         config_file (Path): Path to the config file.
         lof (LoadOpenface): LoadOpenface object.
     """
-    queries: List[str] = []
-
     if lof.lof_report_generation_possible is True:
+        bin_size = get_bin_size(config_file=config_file)
         with Timer() as timer:
-            if lof.interviewer_of_processed_path:
+            roles_paths = [
+                ("interviewer", lof.interviewer_of_processed_path),
+                ("subject", lof.subject_of_processed_path),
+            ]
+            for role, of_processed_path in roles_paths:
+                if not of_processed_path:
+                    continue
+
                 logger.info(
-                    f"Importing OpenFace features for {lof.interview_name} interviewer"
+                    f"Importing OpenFace features for {lof.interview_name} {role}"
                 )
-                csv_files_f = Path(lof.interviewer_of_processed_path).glob("*.csv")
-                csv_files = sorted(csv_files_f)
-                if len(csv_files) > 1:
-                    message = f"More than 1 OpenFace CSV file found for \
-{lof.interview_name} interviewer"
-                    logger.error(message)
-                    raise ValueError(message)
-
-                csv_file = csv_files[0]
-                queries.extend(
-                    construct_insert_queries(
-                        config_file=config_file,
-                        interview_name=lof.interview_name,
-                        role="interviewer",
-                        subject_id=lof.subject_id,
-                        study_id=lof.study_id,
-                        csv_file=csv_file,
-                    )
+                csv_file = get_openface_csv_file(
+                    lof=lof, role=role, of_processed_path=of_processed_path
                 )
-
-            if lof.subject_of_processed_path:
-                logger.info(
-                    f"Importing OpenFace features for {lof.interview_name} subject"
+                features_df = construct_openface_features_df(
+                    config_file=config_file,
+                    interview_name=lof.interview_name,
+                    role=role,
+                    subject_id=lof.subject_id,
+                    study_id=lof.study_id,
+                    csv_file=csv_file,
                 )
-                csv_files_f = Path(lof.subject_of_processed_path).glob("*.csv")
-                csv_files = sorted(csv_files_f)
-                if len(csv_files) > 1:
-                    message = f"More than one OpenFace CSV file found for \
-{lof.interview_name} subject"
-                    logger.error(message)
-                    raise ValueError(message)
-
-                csv_file = csv_files[0]
-                queries.extend(
-                    construct_insert_queries(
+
+                with Timer() as copy_timer:
+                    inserted_rows = db.copy_df_to_table(
                         config_file=config_file,
-                        interview_name=lof.interview_name,
-                        role="subject",
-                        subject_id=lof.subject_id,
-                        study_id=lof.study_id,
-                        csv_file=csv_file,
+                        df=features_df,
+                        table_name="openface_features",
+                        conflict_columns=[
+                            "interview_name",
+                            "ir_role",
+                            "frame",
+                            "face_id",
+                        ],
+                        db="openface_db",
                     )
+
+                duration = copy_timer.duration or 0
+                rows_per_second = len(features_df) / duration if duration else 0
+                logger.info(
+                    f"Loaded {inserted_rows}/{len(features_df)} rows for {role} \
+in {duration:.2f} seconds ({rows_per_second:.0f} rows/sec)"
                 )
 
-        logger.info(
-            f"Importing OpenFace features to openface_db for {lof.interview_name}"
-        )
-        db.execute_queries(
-            config_file=config_file,
-            queries=queries,
-            show_commands=False,
-            show_progress=True,
-            db="openface_db",
-        )
+                import_openface_bin_stats(
+                    config_file=config_file,
+                    features_df=features_df,
+                    bin_size=bin_size,
+                )
+                import_openface_subject_stats(
+                    config_file=config_file,
+                    features_df=features_df,
+                )
 
         lof.lof_process_time = timer.duration
 
@@ -408,6 +554,10 @@ def log_load_openface(config_file: Path, lof: LoadOpenface) -> None:
         lof (LoadOpenface): LoadOpenface object.
     """
     query = lof.to_sql()
+    notify_query = db.notify_query(channel=NOTIFY_CHANNEL, payload=lof.interview_name)
 
     logger.info(f"Logging load_openface for {lof.interview_name}")
-    db.execute_queries(config_file=config_file, queries=[query], show_commands=True)
+    db.execute_queries(
+        config_file=config_file, queries=[query, notify_query], show_commands=True
+    )
+    jobs.complete_job(config_file=config_file, stage=JOB_STAGE, item=lof.interview_name)
@@ -11,6 +11,8 @@ from pipeline.models.ffprobe_metadata import FfprobeMetadata
 
 logger = logging.getLogger(__name__)
 
+NOTIFY_CHANNEL = "ffprobe_metadata"
+
 
 def get_file_to_process(config_file: Path, study_id: str) -> Optional[str]:
     """
@@ -78,6 +80,7 @@ def log_metadata(
     )
 
     sql_queries = ffprobe_metadata.to_sql()
+    sql_queries.append(db.notify_query(channel=NOTIFY_CHANNEL, payload=str(source)))
 
     logger.info("Logging metadata...", extra={"markup": True})
     db.execute_queries(config_file=config_file, queries=sql_queries)
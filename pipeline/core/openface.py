@@ -3,25 +3,72 @@ Helper functions for running OpenFace
 """
 
 import logging
-import sys
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Tuple, List
-import multiprocessing
 import tempfile
 
+import pandas as pd
+
 from pipeline import orchestrator
-from pipeline.helpers import cli, db, dpdash, utils, image, ffmpeg
+from pipeline.core import jobs
+from pipeline.helpers import cli, db, dpdash, utils, ffmpeg
 from pipeline.models.interview_roles import InterviewRole
 from pipeline.models.openface import Openface
 
 logger = logging.getLogger(__name__)
 
+JOB_STAGE = "openface"
+NOTIFY_CHANNEL = "openface"
+
+
+def fetch_stream_to_process(
+    config_file: Path, vs_path: str
+) -> Optional[Tuple[Path, InterviewRole, Path, str]]:
+    """
+    Fetch the details of a video stream, if it has not been processed yet.
+
+    Args:
+        config_file (Path): Path to config file
+        vs_path (str): Path to the video stream
+
+    Returns:
+        Optional[Tuple[Path, InterviewRole, Path, str]]: Tuple of video stream path,
+            interview role, video path and interview name
+    """
+    sql_query = f"""
+        SELECT vs.vs_path, vs.ir_role, vs.video_path, interviews.interview_name
+        FROM video_streams AS vs
+        INNER JOIN decrypted_files ON vs.video_path = decrypted_files.destination_path
+        INNER JOIN interview_files
+            ON interview_files.interview_file = decrypted_files.source_path
+        INNER JOIN interviews USING (interview_path)
+        WHERE vs.vs_path = '{db.santize_string(vs_path)}' AND
+            NOT EXISTS (
+                SELECT 1 FROM openface
+                WHERE openface.vs_path = vs.vs_path
+            );
+    """
+
+    result_df = db.execute_sql(config_file=config_file, query=sql_query)
+    if result_df.empty:
+        return None
+
+    video_stream_path = Path(result_df.iloc[0]["vs_path"])
+    interview_role: InterviewRole = InterviewRole.from_str(result_df.iloc[0]["ir_role"])
+    video_path = Path(result_df.iloc[0]["video_path"])
+    interview_name = result_df.iloc[0]["interview_name"]
+
+    return video_stream_path, interview_role, video_path, interview_name
+
 
 def get_file_to_process(
     config_file: Path, study_id: str
 ) -> Optional[Tuple[Path, InterviewRole, Path, str]]:
     """
-    Fetch a file to process from the database.
+    Claim a file to process from the job queue.
 
     - Fetches a file that has not been processed yet and is part of the study.
         - Must have completed split-streams process
@@ -37,8 +84,8 @@ def get_file_to_process(
 
     # If changing the SQL query below, make the same changes to load_openface.py in the
     # core package
-    sql_query = f"""
-        SELECT vs.vs_path, vs.ir_role, vs.video_path, if.interview_name
+    items_query = f"""
+        SELECT vs.vs_path AS item
         FROM video_streams AS vs
         INNER JOIN (
             SELECT decrypted_files.destination_path, interview_files.interview_file_tags, interviews.interview_name
@@ -56,51 +103,43 @@ def get_file_to_process(
             JOIN interviews USING (interview_path)
             WHERE interviews.study_id = '{study_id}'
         )
-        ORDER BY RANDOM()
-        LIMIT 1;
     """
 
-    result_df = db.execute_sql(config_file=config_file, query=sql_query)
-    if result_df.empty:
-        return None
-
-    video_stream_path = Path(result_df.iloc[0]["vs_path"])
-    interview_role: InterviewRole = InterviewRole.from_str(result_df.iloc[0]["ir_role"])
-    video_path = Path(result_df.iloc[0]["video_path"])
-    interview_name = result_df.iloc[0]["interview_name"]
-
-    return video_stream_path, interview_role, video_path, interview_name
+    return jobs.claim_next(
+        config_file=config_file,
+        stage=JOB_STAGE,
+        study_id=study_id,
+        items_query=items_query,
+        fetch_item=lambda item: fetch_stream_to_process(
+            config_file=config_file, vs_path=item
+        ),
+    )
 
 
 def get_other_stream_to_process(
-    config_file: Path, video_path: Path
+    config_file: Path, video_path: Path, study_id: str
 ) -> Optional[Tuple[Path, InterviewRole, Path, str]]:
     """
-    Fetch a file to process from the database.
+    Claim the other stream of a video, if it has not been processed yet.
 
     - Fetches a file that has not been processed yet and
         is part of the study.
     - Fetches video stream that is part of the same video as the
         video stream that was just processed.
+    - Skips the stream if it is claimed by another runner.
 
     Args:
         config_file (Path): Path to config file
+        video_path (Path): Path to the video, the streams were split from
+        study_id (str): Study ID
 
     Returns:
         Optional[Tuple[Path, InterviewRole, Path, str]]: Tuple of video stream path,
             interview role, video path and interview name
     """
     sql_query = f"""
-        SELECT vs.vs_path, vs.ir_role, vs.video_path, if.interview_name
+        SELECT vs.vs_path
         FROM video_streams AS vs
-        INNER JOIN (
-            SELECT decrypted_files.destination_path, interview_files.interview_file_tags, interviews.interview_name
-            FROM interview_files
-            JOIN decrypted_files
-                ON interview_files.interview_file = decrypted_files.source_path
-            join interviews using (interview_path)
-        ) AS if
-        ON vs.video_path = if.destination_path
         WHERE NOT EXISTS (
             SELECT * FROM openface
             WHERE openface.vs_path = vs.vs_path AND
@@ -109,15 +148,20 @@ def get_other_stream_to_process(
         """
 
     result_df = db.execute_sql(config_file=config_file, query=sql_query)
-    if result_df.empty:
-        return None
 
-    video_stream_path = Path(result_df.iloc[0]["vs_path"])
-    interview_role: InterviewRole = InterviewRole.from_str(result_df.iloc[0]["ir_role"])
-    video_path = Path(result_df.iloc[0]["video_path"])
-    interview_name = result_df.iloc[0]["interview_name"]
+    for vs_path in result_df["vs_path"].tolist():
+        if not jobs.claim_item(
+            config_file=config_file, stage=JOB_STAGE, study_id=study_id, item=vs_path
+        ):
+            continue
 
-    return video_stream_path, interview_role, video_path, interview_name
+        stream = fetch_stream_to_process(config_file=config_file, vs_path=vs_path)
+        if stream is not None:
+            return stream
+
+        jobs.complete_job(config_file=config_file, stage=JOB_STAGE, item=vs_path)
+
+    return None
 
 
 def construct_output_path(config_file: Path, video_path: Path) -> Path:
@@ -177,12 +221,56 @@ def run_openface(
     """
     Run OpenFace on a video stream
 
+    If 'openface_segments' is set to more than 1 in the config file, the
+    stream is split into segments processed concurrently.
+
     Args:
         config_file (Path): Path to config file
         file_path_to_process (Path): Path to video stream
         output_path (Path): Path to output directory
     """
     params = utils.config(config_file, section="openface")
+    num_segments = int(params.get("openface_segments", 1))
+
+    if num_segments > 1:
+        run_openface_segmented(
+            config_file=config_file,
+            file_path_to_process=file_path_to_process,
+            output_path=output_path,
+            num_segments=num_segments,
+        )
+    else:
+        run_feature_extraction(
+            config_file=config_file,
+            file_path_to_process=file_path_to_process,
+            output_path=output_path,
+        )
+
+
+def run_feature_extraction(
+    config_file: Path,
+    file_path_to_process: Path,
+    output_path: Path,
+    outputs: Optional[List[str]] = None,
+    show_progress: bool = True,
+) -> None:
+    """
+    Run OpenFace FeatureExtraction on a video, retrying on failure
+
+    Args:
+        config_file (Path): Path to config file
+        file_path_to_process (Path): Path to video
+        output_path (Path): Path to output directory
+        outputs (Optional[List[str]]): FeatureExtraction output flags (e.g. '-tracked').
+            Defaults to None, which writes all outputs.
+        show_progress (bool): Whether to show a progress spinner. Only one
+            can be shown at a time, so concurrent runs must disable it.
+            Defaults to True.
+
+    Raises:
+        RuntimeError: If OpenFace fails 'openface_max_retry' times.
+    """
+    params = utils.config(config_file, section="openface")
 
     max_retry = int(params["openface_max_retry"])
     retry_count = 1
@@ -194,6 +282,8 @@ def run_openface(
         "-out_dir",
         output_path,
     ]
+    if outputs is not None:
+        command_array += outputs
 
     command_array = cli.singularity_run(config_file, command_array)
 
@@ -206,8 +296,9 @@ def run_openface(
     # OpenBLAS calls BLAS functions from many threads in parallel, or when your computer has more
     # cpu cores than what OpenBLAS was configured to handle.
 
+    # Set for the command only: runs may be concurrent, in threads of this process
     openblas_num_threads = params.get("openblas_num_threads", "4")
-    cli.set_environment_variable("OPENBLAS_NUM_THREADS", openblas_num_threads)
+    env = {**os.environ, "OPENBLAS_NUM_THREADS": openblas_num_threads}
 
     non_completed = True
 
@@ -229,11 +320,9 @@ def run_openface(
                 f"[red]File: {file_path_to_process}[/red]",
                 extra={"markup": True},
             )
-            logger.error(
-                "Exiting with error code 1.",
-                extra={"markup": True},
+            raise RuntimeError(
+                f"OpenFace failed after {max_retry} attempts: {file_path_to_process}"
             )
-            sys.exit(1)
 
         logger.warning(
             f"[yellow]Retrying OpenFace. Attempt {retry_count} of {max_retry}",
@@ -242,33 +331,167 @@ def run_openface(
         retry_count += 1
 
     while retry_count < max_retry and non_completed:
-        with utils.get_progress_bar() as progress:
-            progress.add_task("[green]Running OpenFace...", total=None)
-
-            non_completed = False
-            cli.execute_commands(command_array=command_array, on_fail=_on_fail)
+        non_completed = False
+        if show_progress:
+            with utils.get_progress_bar() as progress:
+                progress.add_task("[green]Running OpenFace...", total=None)
+                cli.execute_commands(
+                    command_array=command_array, on_fail=_on_fail, env=env
+                )
+        else:
+            cli.execute_commands(command_array=command_array, on_fail=_on_fail, env=env)
 
     return
 
 
-def pad_image_process(params: Tuple[Path, Path, int]) -> None:
+def run_openface_segmented(
+    config_file: Path,
+    file_path_to_process: Path,
+    output_path: Path,
+    num_segments: int,
+) -> None:
     """
-    Pad image process
+    Run OpenFace on a video stream, split into segments processed concurrently
+
+    - Splits the stream at keyframes, into 'num_segments' segments
+    - Runs FeatureExtraction on each segment, in parallel
+    - Stitches the outputs back into 'output_path', with the same layout as
+        a single FeatureExtraction run
 
     Args:
-        params (Tuple[Path, Path, Path]): Tuple of input image, output image, and padding
-            size
+        config_file (Path): Path to config file
+        file_path_to_process (Path): Path to video stream
+        output_path (Path): Path to output directory
+        num_segments (int): Number of segments to split the stream into
+    """
+    duration = ffmpeg.get_video_duration(video_file=file_path_to_process)
+    output_path.mkdir(parents=True, exist_ok=True)
 
-    Returns:
-        None
+    with tempfile.TemporaryDirectory(
+        prefix="openface_segments_", dir=output_path.parent
+    ) as temp_dir:
+        temp_dir_path = Path(temp_dir)
+        segments = ffmpeg.split_video_segments(
+            source=file_path_to_process,
+            output_dir=temp_dir_path / "source",
+            segment_time=duration / num_segments,
+        )
+        logger.info(
+            f"Running OpenFace on {len(segments)} segments of {file_path_to_process}",
+            extra={"markup": True},
+        )
+
+        # Name each segment like the stream, so that the outputs are named alike
+        segment_dirs: List[Path] = []
+        for idx, (segment_path, _) in enumerate(segments):
+            segment_dir = temp_dir_path / f"{idx:03d}"
+            (segment_dir / "openface").mkdir(parents=True)
+            segment_path.rename(segment_dir / file_path_to_process.name)
+            segment_dirs.append(segment_dir)
+
+        frame_counts = [
+            ffmpeg.get_video_frame_count(
+                video_file=segment_dir / file_path_to_process.name
+            )
+            for segment_dir in segment_dirs
+        ]
+
+        with ThreadPoolExecutor(max_workers=len(segment_dirs)) as executor:
+            futures = [
+                executor.submit(
+                    run_feature_extraction,
+                    config_file=config_file,
+                    file_path_to_process=segment_dir / file_path_to_process.name,
+                    output_path=segment_dir / "openface",
+                    show_progress=False,
+                )
+                for segment_dir in segment_dirs
+            ]
+            for future in futures:
+                future.result()
+
+        stitch_openface_segments(
+            segment_outputs=[
+                (segment_dir / "openface", start_time, frame_count)
+                for segment_dir, (_, start_time), frame_count in zip(
+                    segment_dirs, segments, frame_counts
+                )
+            ],
+            output_path=output_path,
+        )
+
+    return
+
+
+def stitch_openface_segments(
+    segment_outputs: List[Tuple[Path, float, int]], output_path: Path
+) -> None:
     """
-    input_image, output_image, padding_size = params
+    Merge FeatureExtraction outputs of consecutive segments into one output directory
 
-    image.pad_image(
-        source_image=input_image,
-        dest_image=output_image,
-        padding=padding_size,
-    )
+    - CSV: 'frame' and 'timestamp' are offset by the preceding segments
+    - aligned frames: renumbered to continue the preceding segments
+    - HOG: concatenated (one record per frame, no header)
+    - tracked video (.avi): concatenated
+    - details: taken from the first segment
+
+    Args:
+        segment_outputs (List[Tuple[Path, float, int]]): Output directory, start
+            time (in seconds) and number of frames of each segment, in order
+        output_path (Path): Path to the merged output directory
+    """
+    logger.info("Stitching OpenFace segments", extra={"markup": True})
+
+    csv_frames: List[pd.DataFrame] = []
+    videos: List[Path] = []
+    frame_offset = 0
+
+    for segment_path, start_time, frame_count in segment_outputs:
+        csv_file = next(segment_path.glob("*.csv"), None)
+        if csv_file is None:
+            raise ValueError(f"No OpenFace CSV found in {segment_path}")
+
+        segment_df = pd.read_csv(csv_file)
+        columns = {str(column).strip(): column for column in segment_df.columns}
+        segment_df[columns["frame"]] += frame_offset
+        segment_df[columns["timestamp"]] = (
+            segment_df[columns["timestamp"]] + start_time
+        ).round(3)
+        csv_frames.append(segment_df)
+
+        # Aligned faces: frame_det_00_000001.bmp, ...
+        aligned_path = next(segment_path.glob("*aligned"), None)
+        if aligned_path is not None:
+            merged_aligned_path = output_path / aligned_path.name
+            merged_aligned_path.mkdir(parents=True, exist_ok=True)
+            for aligned_image in aligned_path.glob("*.bmp"):
+                prefix, frame_number = aligned_image.stem.rsplit("_", 1)
+                new_frame_number = int(frame_number) + frame_offset
+                aligned_image.rename(
+                    merged_aligned_path
+                    / f"{prefix}_{new_frame_number:0{len(frame_number)}d}.bmp"
+                )
+
+        for hog_file in segment_path.glob("*.hog"):
+            with open(output_path / hog_file.name, "ab") as merged_hog, open(
+                hog_file, "rb"
+            ) as segment_hog:
+                shutil.copyfileobj(segment_hog, merged_hog)
+
+        videos.extend(segment_path.glob("*.avi"))
+
+        for details_file in segment_path.glob("*_of_details.txt"):
+            if not (output_path / details_file.name).exists():
+                shutil.copy(details_file, output_path / details_file.name)
+
+        # Frames without a row (e.g. an empty segment output) still count
+        frame_offset += frame_count
+
+    merged_df = pd.concat(csv_frames, ignore_index=True)
+    merged_df.to_csv(output_path / csv_file.name, index=False)
+
+    if videos:
+        ffmpeg.concat_videos(sources=videos, target=output_path / videos[0].name)
 
     return
 
@@ -284,12 +507,14 @@ def run_openface_overlay(
     Runs OpenFace on face_aligned frames generated by previous OpenFace run.
 
     Does:
-    - Pads face_aligned frames with 100px on all sides
-    - Compiles frames into video (face_aligned.mp4)
-    - Run OpenFace on compiled video
+    - Pads face_aligned frames with 100px on all sides, and compiles them
+        into a video (face_aligned.mp4), in a single ffmpeg run
+    - Run OpenFace on compiled video, only writing the tracked video
     - Crops out 75px out of each side of the video
     - Return the OpenFace video (openface_aligned.mp4)
 
+    No intermediate frames are written to disk.
+
     Args:
         config_file (Path): Path to config file
         openface_path (Path): Path to OpenFace output
@@ -306,44 +531,26 @@ def run_openface_overlay(
         logger.error(f"No aligned directory found in {openface_path}")
         raise ValueError(f"No aligned directory found in {openface_path}")
 
-    image_files = list(aligned_images_path.glob("*.bmp"))
-    logger.info("Padding face_aligned frames", extra={"markup": True})
+    logger.info("Compiling padded frames into video", extra={"markup": True})
+    video_path = face_aligned_video_path
 
-    params: List[Tuple[Path, Path, int]] = []
+    ffmpeg.images_to_vid(
+        image_dir=aligned_images_path,
+        output_file=video_path,
+        padding=100,
+    )
 
     with tempfile.TemporaryDirectory(prefix=temp_dir_prefix) as temp_dir:
         temp_dir_path = Path(temp_dir)
-        for img in image_files:
-            output_img = temp_dir_path / img.name
-            params.append((img, output_img, 100))
-
-        with utils.get_progress_bar() as progress:
-            task = progress.add_task(
-                "[green]Padding face_aligned frames...", total=len(params)
-            )
-
-            num_processes = int(multiprocessing.cpu_count() / 2)
-            logger.debug(f"Using {num_processes} processes to pad images")
-
-            with multiprocessing.Pool(processes=num_processes) as pool:
-                for _ in pool.imap_unordered(pad_image_process, params):
-                    progress.update(task, advance=1)
-
-        logger.info("Compiling frames into video", extra={"markup": True})
-        video_path = face_aligned_video_path
-
-        ffmpeg.images_to_vid(
-            image_dir=temp_dir_path,
-            output_file=video_path,
-        )
 
         logger.info("Running OpenFace on compiled video", extra={"markup": True})
         temp_openface_path = temp_dir_path / "openface"
 
-        run_openface(
+        run_feature_extraction(
             config_file=config_file,
             file_path_to_process=video_path,
             output_path=temp_openface_path,
+            outputs=["-tracked"],
         )
 
         openface_video = next(temp_openface_path.glob("*.avi"), None)
@@ -419,12 +626,23 @@ def log_openface(
     sql_query = openface.to_sql()
 
     logger.info("Logging OpenFace to DB", extra={"markup": True})
-    db.execute_queries(config_file=config_file, queries=[sql_query])
+    notify_query = db.notify_query(
+        channel=NOTIFY_CHANNEL, payload=str(video_stream_path)
+    )
+    db.execute_queries(config_file=config_file, queries=[sql_query, notify_query])
+    jobs.complete_job(
+        config_file=config_file, stage=JOB_STAGE, item=str(video_stream_path)
+    )
 
     return
 
 
-def await_decrytion(config_file: Path, module_name: str, counter: int) -> None:
+def await_decrytion(
+    config_file: Path,
+    module_name: str,
+    counter: int,
+    channels: Optional[List[str]] = None,
+) -> None:
     """
     Request decryption and snooze if no more files to process
 
@@ -432,6 +650,7 @@ def await_decrytion(config_file: Path, module_name: str, counter: int) -> None:
         config_file (Path): Path to config file
         module_name (str): Name of module that ran OpenFace
         counter (int): Number of files processed
+        channels (Optional[List[str]]): Notification channels to wake up on
     """
     # Log if any files were processed
     if counter > 0:
@@ -444,6 +663,6 @@ def await_decrytion(config_file: Path, module_name: str, counter: int) -> None:
     # Request decryption
     orchestrator.request_decrytion(config_file=config_file)
     # Snooze
-    orchestrator.snooze(config_file=config_file)
+    orchestrator.snooze(config_file=config_file, channels=channels)
 
     return
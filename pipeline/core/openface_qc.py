@@ -8,15 +8,19 @@ from typing import List, Optional
 
 import pandas as pd
 
+from pipeline.core import feature_store, jobs
 from pipeline.helpers import db
 from pipeline.models.openface_qc import OpenfaceQC
 
 logger = logging.getLogger(__name__)
 
+JOB_STAGE = "openface_qc"
+NOTIFY_CHANNEL = "openface_qc"
+
 
 def get_file_to_process(config_file: Path, study_id: str) -> Optional[Path]:
     """
-    Fetches a file to process from the database.
+    Claims a file to process from the job queue.
 
     - Fetches a file that has not been processed yet.
         - Must be processed by OpenFace.
@@ -28,8 +32,8 @@ def get_file_to_process(config_file: Path, study_id: str) -> Optional[Path]:
     Returns:
         Optional[Path]: Path to the file to process.
     """
-    sql_query = f"""
-        SELECT of_processed_path
+    items_query = f"""
+        SELECT of_processed_path AS item
         FROM openface AS of
         INNER JOIN video_streams vs USING (vs_path)
         INNER JOIN (
@@ -46,16 +50,33 @@ def get_file_to_process(config_file: Path, study_id: str) -> Optional[Path]:
             JOIN interviews USING (interview_path)
             WHERE interviews.study_id = '{study_id}'
         )
-        ORDER BY RANDOM()
-        LIMIT 1;
     """
 
-    of_processed_path = db.fetch_record(config_file=config_file, query=sql_query)
-
-    if of_processed_path is None:
-        return None
-
-    return Path(of_processed_path)
+    def fetch_item(item: str) -> Optional[Path]:
+        sql_query = f"""
+            SELECT of.of_processed_path
+            FROM openface AS of
+            WHERE of.of_processed_path = '{db.santize_string(item)}' AND
+                NOT EXISTS (
+                    SELECT 1 FROM openface_qc
+                    WHERE openface_qc.of_processed_path = of.of_processed_path
+                );
+        """
+
+        of_processed_path = db.fetch_record(config_file=config_file, query=sql_query)
+
+        if of_processed_path is None:
+            return None
+
+        return Path(of_processed_path)
+
+    return jobs.claim_next(
+        config_file=config_file,
+        stage=JOB_STAGE,
+        study_id=study_id,
+        items_query=items_query,
+        fetch_item=fetch_item,
+    )
 
 
 def run_openface_qc(of_processed_path: Path) -> OpenfaceQC:
@@ -82,7 +103,13 @@ def run_openface_qc(of_processed_path: Path) -> OpenfaceQC:
         logger.error(f"Multiple CSV files found in {of_processed_path}")
         raise FileNotFoundError(f"Multiple CSV files found in {of_processed_path}")
 
-    df = pd.read_csv(csv_paths[0], on_bad_lines="warn")
+    parquet_file = feature_store.get_feature_store_path(csv_paths[0])
+    if parquet_file.exists():
+        df = feature_store.read_features(
+            parquet_file=parquet_file, columns=["face_id", "success", "confidence"]
+        )
+    else:
+        df = pd.read_csv(csv_paths[0], on_bad_lines="warn")
 
     faces_count = df["face_id"].nunique()
     frames_count = df.shape[0]
@@ -122,5 +149,15 @@ def log_openface_qc(config_file: Path, openface_qc_result: OpenfaceQC) -> None:
         openface_qc_result (OpenfaceQC): Object containing the results of the quality control.
     """
     query = openface_qc_result.to_sql()
+    notify_query = db.notify_query(
+        channel=NOTIFY_CHANNEL, payload=str(openface_qc_result.of_processed_path)
+    )
 
-    db.execute_queries(config_file=config_file, queries=[query], show_commands=True)
+    db.execute_queries(
+        config_file=config_file, queries=[query, notify_query], show_commands=True
+    )
+    jobs.complete_job(
+        config_file=config_file,
+        stage=JOB_STAGE,
+        item=str(openface_qc_result.of_processed_path),
+    )
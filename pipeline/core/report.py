@@ -2,21 +2,68 @@
 Helper functions for the report generation module.
 """
 
+import gc
 import logging
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
-from pipeline import core, orchestrator
+import matplotlib.pyplot as plt
+
+from pipeline import core, healer, orchestrator
+from pipeline.core import jobs
 from pipeline.helpers import db, dpdash, utils
+from pipeline.helpers.timer import Timer
 from pipeline.models.pdf_reports import PdfReport
 from pipeline.report import main as report
 
 logger = logging.getLogger(__name__)
 
+JOB_STAGE = "report_generation"
+
+
+def get_report_version(config_file: Path) -> str:
+    """
+    Returns the version of the reports being generated.
+
+    Bumping the version re-queues all interviews, so their reports are regenerated.
+
+    Args:
+        config_file (Path): The path to the config file.
+
+    Returns:
+        str: The report version. Defaults to 'v1.0.0'.
+    """
+    report_params = utils.config(config_file, section="report_generation")
+    return report_params.get("pr_version", "v1.0.0")
+
+
+def get_report_workers(config_file: Path) -> Tuple[int, int]:
+    """
+    Returns the number of report worker processes, and the number of reports
+    each worker generates before it is replaced by a fresh process.
+
+    Replacing workers bounds the memory held on to by matplotlib and
+    reportlab across reports.
+
+    Args:
+        config_file (Path): The path to the config file.
+
+    Returns:
+        Tuple[int, int]: The number of workers (default 1), and the number of
+            reports per worker (default 20).
+    """
+    report_params = utils.config(config_file, section="report_generation")
+
+    report_workers = max(1, int(report_params.get("report_workers", 1)))
+    max_tasks = max(1, int(report_params.get("report_worker_max_tasks", 20)))
+
+    return report_workers, max_tasks
+
 
 def get_interview_name_to_process(config_file: Path, study_id: str) -> Optional[str]:
     """
-    Get the interview name to process from the database.
+    Claims an interview to generate a report for, from the job queue.
 
     Args:
         config_file (Path): The path to the config file.
@@ -25,23 +72,44 @@ def get_interview_name_to_process(config_file: Path, study_id: str) -> Optional[
     Returns:
         Optional[str]: The interview name to process.
     """
+    pr_version = get_report_version(config_file=config_file)
 
-    query = f"""
-        SELECT interview_name
+    items_query = f"""
+        SELECT interview_name AS item
         FROM load_openface
         WHERE study_id = '{study_id}' AND
             lof_report_generation_possible = TRUE AND
             interview_name NOT IN (
                 SELECT interview_name
                 FROM pdf_reports
+                WHERE pr_version = '{pr_version}'
             )
-        ORDER BY RANDOM()
-        LIMIT 1;
     """
 
-    interview_name = db.fetch_record(config_file=config_file, query=query)
+    def fetch_item(item: str) -> Optional[str]:
+        query = f"""
+        SELECT lof.interview_name
+        FROM load_openface AS lof
+        WHERE lof.interview_name = '{db.santize_string(item)}' AND
+            lof.study_id = '{study_id}' AND
+            lof.lof_report_generation_possible = TRUE AND
+            NOT EXISTS (
+                SELECT 1 FROM pdf_reports
+                WHERE pdf_reports.interview_name = lof.interview_name AND
+                    pdf_reports.pr_version = '{pr_version}'
+            )
+        LIMIT 1;
+        """
+
+        return db.fetch_record(config_file=config_file, query=query)
 
-    return interview_name
+    return jobs.claim_next(
+        config_file=config_file,
+        stage=JOB_STAGE,
+        study_id=study_id,
+        items_query=items_query,
+        fetch_item=fetch_item,
+    )
 
 
 def is_anonimization_requested(config_file: Path) -> bool:
@@ -142,7 +210,7 @@ def generate_report(
 
 def log_pdf_report(config_file: Path, pdf_report: PdfReport) -> None:
     """
-    Logs the PDF report to the database.
+    Logs the PDF report to the database, and marks its job as done.
 
     Args:
         config_file (Path): Path to the config file.
@@ -151,3 +219,100 @@ def log_pdf_report(config_file: Path, pdf_report: PdfReport) -> None:
     query = pdf_report.to_sql()
 
     db.execute_queries(config_file=config_file, queries=[query], show_commands=True)
+    jobs.complete_job(
+        config_file=config_file, stage=JOB_STAGE, item=pdf_report.interview_name
+    )
+
+
+def process_report(
+    config_file: Path, interview_name: str
+) -> Tuple[float, Optional[str]]:
+    """
+    Generates and logs the report for a claimed interview.
+
+    Interviews for which a report can not be generated are marked as such
+    (self-healing), and their job is marked as failed.
+
+    Args:
+        config_file (Path): The path to the config file.
+        interview_name (str): The interview name.
+
+    Returns:
+        Tuple[float, Optional[str]]: The time taken in seconds, and the error
+            message, if any.
+    """
+    report_path = construct_report_path(
+        config_file=config_file, interview_name=interview_name
+    )
+
+    with jobs.JobHeartbeat(
+        config_file=config_file, stage=JOB_STAGE, item=interview_name
+    ), Timer() as timer:
+        error_message = generate_report(
+            config_file=config_file,
+            interview_name=interview_name,
+            report_path=report_path,
+        )
+
+    # Release figures (and the memory they hold) left open by the report
+    plt.close("all")
+    gc.collect()
+
+    pr_generation_time = timer.duration or 0
+    logger.info(f"Generated report in {pr_generation_time:.2f} seconds")
+
+    if error_message:
+        logger.warning(f"Error generating report for {interview_name}: {error_message}")
+        healer.set_report_generation_not_possible(
+            config_file=config_file,
+            interview_name=interview_name,
+            reason=error_message,
+        )
+        jobs.fail_job(config_file=config_file, stage=JOB_STAGE, item=interview_name)
+        return pr_generation_time, error_message
+
+    pdf_report = PdfReport(
+        interview_name=interview_name,
+        pr_version=get_report_version(config_file=config_file),
+        pr_path=str(report_path),
+        pr_generation_time=pr_generation_time,
+        pr_timestamp=datetime.now(),
+    )
+    log_pdf_report(config_file=config_file, pdf_report=pdf_report)
+
+    return pr_generation_time, None
+
+
+def process_next_report(
+    config_file: Path, study_id: str
+) -> Optional[Tuple[str, float, Optional[str]]]:
+    """
+    Claims an interview of a study, and generates its report.
+
+    Used by report worker processes: the claim is made (and its lease kept
+    alive) by the process generating the report.
+
+    Args:
+        config_file (Path): The path to the config file.
+        study_id (str): The study ID.
+
+    Returns:
+        Optional[Tuple[str, float, Optional[str]]]: The interview name, the time
+            taken in seconds and the error message (if any), or None if there
+            are no interviews to process.
+    """
+    interview_name = get_interview_name_to_process(
+        config_file=config_file, study_id=study_id
+    )
+    if interview_name is None:
+        return None
+
+    logger.info(
+        f"[cyan]Generating report for {interview_name}...",
+        extra={"markup": True},
+    )
+    pr_generation_time, error_message = process_report(
+        config_file=config_file, interview_name=interview_name
+    )
+
+    return interview_name, pr_generation_time, error_message
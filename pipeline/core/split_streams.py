@@ -6,6 +6,7 @@ import logging
 from pathlib import Path
 from typing import List, Optional, Tuple
 
+from pipeline.core import jobs
 from pipeline.helpers import db, dpdash, ffmpeg, utils
 from pipeline.helpers.timer import Timer
 from pipeline.models.interview_roles import InterviewRole
@@ -13,12 +14,15 @@ from pipeline.models.video_streams import VideoStream
 
 logger = logging.getLogger(__name__)
 
+JOB_STAGE = "split_streams"
+NOTIFY_CHANNEL = "video_streams"
+
 
 def get_file_to_process(
     config_file: Path, study_id: str
 ) -> Optional[Tuple[Path, bool, int]]:
     """
-    Fetch a file to process from the database.
+    Claim a file to process from the job queue.
 
     - Fetches a file that has not been processed yet and is part of the study.
         - Must have metadata extracted
@@ -26,8 +30,8 @@ def get_file_to_process(
     Args:
         config_file (Path): Path to config file
     """
-    sql_query = f"""
-        SELECT vqqc.video_path, vqqc.has_black_bars, vqqc.black_bar_height
+    items_query = f"""
+        SELECT vqqc.video_path AS item
         FROM video_quick_qc AS vqqc
         INNER JOIN (
             SELECT decrypted_files.destination_path, interview_files.interview_file_tags
@@ -42,21 +46,38 @@ def get_file_to_process(
             JOIN interviews USING (interview_path)
             WHERE interviews.study_id = '{study_id}'
         )
-        ORDER BY RANDOM()
-        LIMIT 1;
     """
 
-    result_df = db.execute_sql(config_file=config_file, query=sql_query)
-    if result_df.empty:
-        return None
-
-    video_path = Path(result_df.iloc[0]["video_path"])
-    has_black_bars = bool(result_df.iloc[0]["has_black_bars"])
-    black_bar_height = result_df.iloc[0]["black_bar_height"]
-    if black_bar_height is not None:
-        black_bar_height = int(black_bar_height)
-
-    return video_path, has_black_bars, black_bar_height
+    def fetch_item(item: str) -> Optional[Tuple[Path, bool, int]]:
+        sql_query = f"""
+            SELECT vqqc.video_path, vqqc.has_black_bars, vqqc.black_bar_height
+            FROM video_quick_qc AS vqqc
+            WHERE vqqc.video_path = '{db.santize_string(item)}' AND
+                NOT EXISTS (
+                    SELECT 1 FROM video_streams
+                    WHERE video_streams.video_path = vqqc.video_path
+                );
+        """
+
+        result_df = db.execute_sql(config_file=config_file, query=sql_query)
+        if result_df.empty:
+            return None
+
+        video_path = Path(result_df.iloc[0]["video_path"])
+        has_black_bars = bool(result_df.iloc[0]["has_black_bars"])
+        black_bar_height = result_df.iloc[0]["black_bar_height"]
+        if black_bar_height is not None:
+            black_bar_height = int(black_bar_height)
+
+        return video_path, has_black_bars, black_bar_height
+
+    return jobs.claim_next(
+        config_file=config_file,
+        stage=JOB_STAGE,
+        study_id=study_id,
+        items_query=items_query,
+        fetch_item=fetch_item,
+    )
 
 
 def construct_stream_path(video_path: Path, role: InterviewRole, suffix: str) -> Path:
@@ -127,6 +148,13 @@ def split_streams(
     left_role = InterviewRole.from_str(config_params["left_role"])
     right_role = InterviewRole.from_str(config_params["right_role"])
 
+    split_mode = config_params.get("split_mode", "single_pass")
+    if split_mode == "single_pass":
+        return split_streams_single_pass(
+            video_path=video_path,
+            crops=[(left_role, left_crop_params), (right_role, right_crop_params)],
+        )
+
     with utils.get_progress_bar() as progress:
         task = progress.add_task("Splitting streams", total=2)
         for role, crop_params in [
@@ -172,6 +200,58 @@ def log_streams(config_file: Path, streams: List[VideoStream]) -> None:
         streams (List[VideoStream]): List of streams
     """
     sql_queries = [stream.to_sql() for stream in streams]
+    sql_queries.append(db.notify_query(channel=NOTIFY_CHANNEL))
 
     logger.info("Inserting streams into DB", extra={"markup": True})
     db.execute_queries(config_file=config_file, queries=sql_queries)
+
+    for video_path in {stream.video_path for stream in streams}:
+        jobs.complete_job(config_file=config_file, stage=JOB_STAGE, item=str(video_path))
+
+
+def split_streams_single_pass(
+    video_path: Path, crops: List[Tuple[InterviewRole, str]]
+) -> List[VideoStream]:
+    """
+    Split video into role streams, decoding the source video only once.
+
+    All crops are written by a single ffmpeg invocation. The combined run
+    time is shared equally between the streams, so the per-video total of
+    vs_process_time matches the time spent.
+
+    Args:
+        video_path (Path): Path to video
+        crops (List[Tuple[InterviewRole, str]]): Roles and their crop parameters
+    """
+    targets: List[Tuple[Path, str]] = []
+    for role, crop_params in crops:
+        stream_file_path = construct_stream_path(
+            video_path=video_path, role=role, suffix="mp4"
+        )
+        targets.append((stream_file_path, crop_params))
+
+    with Timer() as timer:
+        ffmpeg.crop_video_multi(source=video_path, targets=targets)
+
+    per_stream_duration = timer.duration / len(targets)
+    logger.info(
+        f"Split {len(targets)} streams in {timer.duration} "
+        f"({per_stream_duration} per stream)",
+        extra={"markup": True},
+    )
+
+    streams = []
+    for (role, _), (stream_file_path, _) in zip(crops, targets):
+        logger.info(
+            f"Split {role.value} stream: {stream_file_path}",
+            extra={"markup": True},
+        )
+        stream: VideoStream = VideoStream(
+            video_path=video_path,
+            ir_role=role,
+            vs_path=stream_file_path,
+            vs_process_time=per_stream_duration,
+        )
+        streams.append(stream)
+
+    return streams
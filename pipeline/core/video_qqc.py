@@ -3,21 +3,27 @@ Helper functions for video quick qc.
 """
 
 import logging
-import tempfile
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Optional, Tuple
 
+import cv2
+import numpy as np
+
+from pipeline.core import jobs
 from pipeline.helpers import db, ffmpeg, image
 from pipeline.models.video_qqc import VideoQuickQc
 
 logger = logging.getLogger(__name__)
 
+JOB_STAGE = "video_qqc"
+NOTIFY_CHANNEL = "video_quick_qc"
+
 
 def get_file_to_process(
     config_file: Path, study_id: str
 ) -> Optional[Tuple[str, float]]:
     """
-    Fetch a file to process from the database, that has not been processed yet.
+    Claims a file to process from the job queue, that has not been processed yet.
 
     - Fetches a file that has not been processed yet
     - Fetches a file that is part of the study
@@ -26,8 +32,8 @@ def get_file_to_process(
         config_file (Path): Path to config file
         study_id (str): Study ID
     """
-    sql_query = f"""
-        SELECT fm.fm_source_path, fm.fm_duration
+    items_query = f"""
+        SELECT fm.fm_source_path AS item
         FROM ffprobe_metadata AS fm
         INNER JOIN (
             SELECT decrypted_files.destination_path, interview_files.interview_file_tags
@@ -42,18 +48,36 @@ def get_file_to_process(
             JOIN interviews USING (interview_path)
             WHERE interviews.study_id = '{study_id}'
         ) AND fm.fm_duration IS NOT NULL
-        ORDER BY RANDOM()
-        LIMIT 1;
     """
 
-    result_df = db.execute_sql(config_file=config_file, query=sql_query)
-    if result_df.empty:
-        return None
+    def fetch_item(item: str) -> Optional[Tuple[str, float]]:
+        sql_query = f"""
+            SELECT fm.fm_source_path, fm.fm_duration
+            FROM ffprobe_metadata AS fm
+            WHERE fm.fm_source_path = '{db.santize_string(item)}' AND
+                fm.fm_duration IS NOT NULL AND
+                NOT EXISTS (
+                    SELECT 1 FROM video_quick_qc
+                    WHERE video_quick_qc.video_path = fm.fm_source_path
+                );
+        """
+
+        result_df = db.execute_sql(config_file=config_file, query=sql_query)
+        if result_df.empty:
+            return None
+
+        video_path = result_df.iloc[0]["fm_source_path"]
+        duration = result_df.iloc[0]["fm_duration"]
 
-    video_path = result_df.iloc[0]["fm_source_path"]
-    duration = result_df.iloc[0]["fm_duration"]
+        return video_path, duration
 
-    return video_path, duration
+    return jobs.claim_next(
+        config_file=config_file,
+        stage=JOB_STAGE,
+        study_id=study_id,
+        items_query=items_query,
+        fetch_item=fetch_item,
+    )
 
 
 def sanitize_black_bar_height(height: float) -> float:
@@ -71,50 +95,56 @@ def sanitize_black_bar_height(height: float) -> float:
     return height
 
 
-def check_black_bars(screenshots: List[Path]) -> bool:
+def check_black_bars(gray_frames: np.ndarray) -> bool:
     """
-    Checks is a majority of the screenshots have black bars.
+    Checks is a majority of the frames have black bars.
 
     Args:
-        screenshots (List[Path]): List of screenshots
+        gray_frames (np.ndarray): Sampled frames, as a (n, height, width) grayscale array
     """
-    black_bar_count = 0
+    frames_with_bars = image.check_if_frames_have_black_bars(gray_frames=gray_frames)
 
-    for screenshot in screenshots:
-        has_black_bars = image.check_if_image_has_black_bars(image_file=screenshot)
-        if has_black_bars:
-            black_bar_count += 1
-
-    if black_bar_count > 0.5 * len(screenshots):
+    if np.count_nonzero(frames_with_bars) > 0.5 * len(gray_frames):
         return True
     else:
         return False
 
 
-def get_black_bar_height(screenshots: List[Path]) -> int:
+def get_black_bar_height(gray_frames: np.ndarray) -> int:
     """
-    Gets the median black bar height from the screenshots.
+    Gets the median black bar height from the frames.
 
     Args:
-        screenshots (List[Path]): List of screenshots
+        gray_frames (np.ndarray): Sampled frames, as a (n, height, width) grayscale array
     """
-    black_bar_heights = []
+    frames_with_bars = image.check_if_frames_have_black_bars(gray_frames=gray_frames)
+    if not frames_with_bars.any():
+        return 0
 
-    for screenshot in screenshots:
-        has_black_bars = image.check_if_image_has_black_bars(image_file=screenshot)
-        if has_black_bars:
-            black_bar_height = image.get_black_bars_height(image_file=screenshot)
+    black_bar_heights = image.get_black_bars_heights(
+        gray_frames=gray_frames[frames_with_bars]
+    )
+    black_bar_heights = np.where(black_bar_heights > 200, 180, black_bar_heights)
 
-            if black_bar_height > 200:
-                black_bar_height = 180
+    # Median
+    black_bar_heights = np.sort(black_bar_heights)
+    return int(black_bar_heights[len(black_bar_heights) // 2])
 
-            black_bar_heights.append(black_bar_height)
 
-    # Median
-    if len(black_bar_heights) > 0:
-        return sorted(black_bar_heights)[len(black_bar_heights) // 2]
-    else:
-        return 0
+def save_frames(frames: np.ndarray, frames_path: Path) -> None:
+    """
+    Saves sampled frames as PNG files, replacing any existing files.
+
+    Args:
+        frames (np.ndarray): Sampled frames, as a (n, height, width, 3) BGR array
+        frames_path (Path): Directory to save the frames to
+    """
+    frames_path.mkdir(parents=True, exist_ok=True)
+    for file in frames_path.iterdir():
+        file.unlink()
+
+    for idx, frame in enumerate(frames, start=1):
+        cv2.imwrite(str(frames_path / f"{idx:06d}.png"), frame)
 
 
 def do_video_qqc(
@@ -125,67 +155,44 @@ def do_video_qqc(
     """
     Performs video quick qc on a video file.
 
-    - Extracts screenshots from the video
+    - Samples frames from the video, in memory
     - Checks if the video has black bars
     - Gets the black bar height
 
     Args:
         video_path (Path): Path to video file
         duration (float): Video duration
-        frames_path (Optional[Path], optional): Path to store extracted frames. Defaults to None.
+        frames_path (Optional[Path], optional): Path to store sampled frames. Defaults to None.
     """
-    # Get screenshots
     num_screenshots = 10
 
-    if frames_path is None:
-        with tempfile.TemporaryDirectory(prefix="video-qqc-") as temp_dir:
-            screenshots = ffmpeg.extract_screenshots_from_video(
-                video_file=video_path,
-                video_duration=duration,
-                output_dir=Path(temp_dir),
-                num_screenshots=num_screenshots,
-            )
-            # Check if video has black bars
-            has_black_bars = check_black_bars(screenshots=screenshots)
-            if not has_black_bars:
-                return VideoQuickQc(
-                    video_path=video_path,
-                    has_black_bars=False,
-                    black_bar_height=None,
-                    process_time=None,
-                )
-            else:
-                black_bar_height = get_black_bar_height(screenshots=screenshots)
-                return VideoQuickQc(
-                    video_path=video_path,
-                    has_black_bars=True,
-                    black_bar_height=black_bar_height,
-                    process_time=None,
-                )
+    frames = ffmpeg.sample_frames(
+        video_file=video_path,
+        video_duration=duration,
+        num_frames=num_screenshots,
+    )
+    if frames_path is not None:
+        save_frames(frames=frames, frames_path=frames_path)
+
+    gray_frames = image.to_grayscale_stack(frames=frames)
+
+    # Check if video has black bars
+    has_black_bars = check_black_bars(gray_frames=gray_frames)
+    if not has_black_bars:
+        return VideoQuickQc(
+            video_path=video_path,
+            has_black_bars=False,
+            black_bar_height=None,
+            process_time=None,
+        )
     else:
-        screenshots = ffmpeg.extract_screenshots_from_video(
-            video_file=video_path,
-            video_duration=duration,
-            output_dir=frames_path,
-            num_screenshots=num_screenshots,
+        black_bar_height = get_black_bar_height(gray_frames=gray_frames)
+        return VideoQuickQc(
+            video_path=video_path,
+            has_black_bars=True,
+            black_bar_height=black_bar_height,
+            process_time=None,
         )
-        # Check if video has black bars
-        has_black_bars = check_black_bars(screenshots=screenshots)
-        if not has_black_bars:
-            return VideoQuickQc(
-                video_path=video_path,
-                has_black_bars=False,
-                black_bar_height=None,
-                process_time=None,
-            )
-        else:
-            black_bar_height = get_black_bar_height(screenshots=screenshots)
-            return VideoQuickQc(
-                video_path=video_path,
-                has_black_bars=True,
-                black_bar_height=black_bar_height,
-                process_time=None,
-            )
 
 
 def log_video_qqc(
@@ -200,6 +207,12 @@ def log_video_qqc(
         result (VideoQuickQc): VideoQuickQc result
     """
     sql_query = result.to_sql()
+    notify_query = db.notify_query(
+        channel=NOTIFY_CHANNEL, payload=str(result.video_path)
+    )
 
     logger.info("Logging video_qqc...", extra={"markup": True})
-    db.execute_queries(config_file=config_file, queries=[sql_query])
+    db.execute_queries(config_file=config_file, queries=[sql_query, notify_query])
+    jobs.complete_job(
+        config_file=config_file, stage=JOB_STAGE, item=str(result.video_path)
+    )
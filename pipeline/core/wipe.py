@@ -6,7 +6,7 @@ from pathlib import Path
 from typing import List, Optional
 import logging
 
-from pipeline.helpers import cli, db, utils
+from pipeline.helpers import cli, db, scanner, utils
 from pipeline import core
 from pipeline.models.interview_roles import InterviewRole
 from pipeline.models.pdf_reports import PdfReport
@@ -68,22 +68,28 @@ def wipe_all_interview_data(config_file: Path) -> None:
 
     logger.info(f"Wiping all interview data for study: {study_id}")
 
-    interviews_dir = data_root.glob(f"PROTECTED/{study_id}/*/*_interview/processed")
+    max_workers = scanner.get_scan_workers(config_file=config_file)
+    scan_stats = scanner.ScanStats()
+    interviews_dir = scanner.glob(
+        root=data_root,
+        pattern=f"PROTECTED/{study_id}/*/*_interview/processed",
+        max_workers=max_workers,
+        stats=scan_stats,
+    )
+    listings = scanner.scan_dirs(
+        paths=interviews_dir, max_workers=max_workers, stats=scan_stats
+    )
+    scan_stats.log(description=f"{study_id} interview data")
 
+    wiped_dir_names = ["decrypted", "openface", "reports"]
     for interview_dir in interviews_dir:
-        decryped_dir = interview_dir / "decrypted"
-        openface_dir = interview_dir / "openface"
-        reports_dir = interview_dir / "reports"
-
-        if decryped_dir.exists():
-            logger.info(f"Removing {decryped_dir}")
-            cli.remove_directory(decryped_dir)
-        if openface_dir.exists():
-            logger.info(f"Removing {openface_dir}")
-            cli.remove_directory(openface_dir)
-        if reports_dir.exists():
-            logger.info(f"Removing {reports_dir}")
-            cli.remove_directory(reports_dir)
+        entry_names = {entry.name for entry in listings[interview_dir] or []}
+
+        for wiped_dir_name in wiped_dir_names:
+            if wiped_dir_name in entry_names:
+                wiped_dir = interview_dir / wiped_dir_name
+                logger.info(f"Removing {wiped_dir}")
+                cli.remove_directory(wiped_dir)
 
 
 def get_decrypted_files(
@@ -8,6 +8,13 @@ The interview files are categorized into the following types:
 - Interviewer audio
 
 The files are then inserted into the database.
+
+Directory signatures are recorded in the 'crawl_state' table. Interview
+directories that did not change since the last crawl are skipped, and only
+new or changed rows are inserted.
+
+Directories are stat-ed and listed concurrently, one level at a time, to hide
+the metadata latency of network-mounted data roots.
 """
 
 import sys
@@ -29,17 +36,20 @@ except ValueError:
 
 import argparse
 import logging
-import multiprocessing
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, time
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from rich.logging import RichHandler
 from rich.progress import Progress
 
-from pipeline import core, orchestrator
-from pipeline.helpers import cli, db, dpdash, utils
+from pipeline import core, models, orchestrator
+from pipeline.helpers import cli, db, dpdash, scanner, utils
+from pipeline.helpers import hash as hash_helper
 from pipeline.helpers.config import config
+from pipeline.models.crawl_state import CrawlState
 from pipeline.models.files import File
 from pipeline.models.interview_files import InterviewFile
 from pipeline.models.interviews import Interview, InterviewType
@@ -136,27 +146,37 @@ def catogorize_audio_files(
     return files
 
 
-def fetch_interview_files(interview: Interview) -> List[InterviewFile]:
+def fetch_interview_files(
+    interview: Interview,
+    listings: Optional[Dict[Path, Optional[List[os.DirEntry]]]] = None,
+) -> List[InterviewFile]:
     """
     Fetches the interview files for a given interview.
 
     Args:
         interview (Interview): The interview object.
+        listings (Optional[Dict[Path, Optional[List[os.DirEntry]]]]): Directory
+            listings gathered beforehand by the scanner. Directories not in it
+            are listed here. Defaults to None.
 
     Returns:
         List[InterviewFile]: A list of InterviewFile objects.
     """
+    if listings is None:
+        listings = {}
 
     interview_files: List[InterviewFile] = []
     subject_id = interview.subject_id
 
     interview_path = interview.interview_path
-    # list all files in the directory
-    files = [f for f in interview_path.iterdir() if f.is_file()]
-    # also add files from 'Audio Record' directory
-    audio_record_dir = interview_path / "Audio Record"
-    if audio_record_dir.exists():
-        files.extend([f for f in audio_record_dir.iterdir() if f.is_file()])
+    # list all files in the directory, and in its 'Audio Record' directory
+    files: List[Path] = []
+    for files_dir in [interview_path, interview_path / "Audio Record"]:
+        if files_dir in listings:
+            entries = listings[files_dir]
+        else:
+            entries = scanner.scan_dir(files_dir)
+        files.extend([Path(entry.path) for entry in entries or [] if entry.is_file()])
 
     audio_files: List[Path] = []
     video_files: List[Path] = []
@@ -196,18 +216,19 @@ def fetch_interview_files(interview: Interview) -> List[InterviewFile]:
     return interview_files
 
 
-def fetch_interviews(
+def get_interview_type_paths(
     config_file: Path, subject_id: str, study_id: str
-) -> List[Interview]:
+) -> List[Tuple[InterviewType, Path]]:
     """
-    Fetches the interviews for a given subject ID.
+    Returns the interview type directories of a subject.
 
     Args:
         config_file (Path): The path to the config file.
         subject_id (str): The subject ID.
+        study_id (str): The study ID.
 
     Returns:
-        List[Interview]: A list of Interview objects.
+        List[Tuple[InterviewType, Path]]: The interview types, with their directory.
     """
     config_params = config(path=config_file, section="general")
     data_root = Path(config_params["data_root"])
@@ -215,21 +236,209 @@ def fetch_interviews(
     study_path: Path = data_root / "PROTECTED" / study_id
     interview_types: List[InterviewType] = [InterviewType.OPEN, InterviewType.PSYCHS]
 
-    interviews: List[Interview] = []
-    for interview_type in interview_types:
-        interview_type_path = (
-            study_path / "raw" / subject_id / "interviews" / interview_type.value
+    return [
+        (
+            interview_type,
+            study_path / "raw" / subject_id / "interviews" / interview_type.value,
+        )
+        for interview_type in interview_types
+    ]
+
+
+def get_stat(
+    stats: Dict[Path, Optional[os.stat_result]], path: Path
+) -> Optional[os.stat_result]:
+    """
+    Returns the stat of a path gathered beforehand by the scanner,
+    or stats it if it was not.
+    """
+    if path in stats:
+        return stats[path]
+    return scanner.stat_path(path)
+
+
+def scan_interview_dirs(
+    config_file: Path,
+    study_id: str,
+    subjects: List[str],
+    crawl_states: Dict[str, CrawlState],
+    crawl_children: Dict[str, List[Path]],
+    scan_stats: scanner.ScanStats,
+) -> Tuple[
+    Dict[Path, Optional[os.stat_result]], Dict[Path, Optional[List[os.DirEntry]]]
+]:
+    """
+    Stats and lists the interview directories of all subjects concurrently,
+    one level at a time, for fetch_interviews.
+
+    Only the interview type directories that changed since the last crawl
+    are listed.
+
+    Args:
+        config_file (Path): The path to the config file.
+        study_id (str): The study ID.
+        subjects (List[str]): The subject IDs.
+        crawl_states (Dict[str, CrawlState]): The crawl state of the study's directories.
+        crawl_children (Dict[str, List[Path]]): The crawled directories, by
+            parent directory.
+        scan_stats (scanner.ScanStats): Updated with the scanned directories.
+
+    Returns:
+        Tuple[Dict[Path, Optional[os.stat_result]], Dict[Path, Optional[List[os.DirEntry]]]]:
+            The stats of the interview type directories, interview directories
+            and their 'Audio Record' directories, and the listings of the
+            changed interview type directories.
+    """
+    max_workers = scanner.get_scan_workers(config_file=config_file)
+
+    type_paths = [
+        interview_type_path
+        for subject_id in subjects
+        for _, interview_type_path in get_interview_type_paths(
+            config_file=config_file, subject_id=subject_id, study_id=study_id
         )
+    ]
+    stats = scanner.stat_paths(
+        paths=type_paths, max_workers=max_workers, stats=scan_stats
+    )
+
+    changed_type_paths: List[Path] = []
+    for type_path in type_paths:
+        type_signature = CrawlState.signature_from_stats(stats[type_path])
+        if type_signature is None:
+            continue
+        type_state = crawl_states.get(str(type_path))
+        if type_state is None or type_state.cs_signature != type_signature:
+            changed_type_paths.append(type_path)
+    listings = scanner.scan_dirs(
+        paths=changed_type_paths, max_workers=max_workers, stats=scan_stats
+    )
+
+    interview_dirs: List[Path] = []
+    for type_path in type_paths:
+        if type_path in listings:
+            interview_dirs.extend(
+                [
+                    Path(entry.path)
+                    for entry in listings[type_path] or []
+                    if entry.is_dir()
+                ]
+            )
+        else:
+            interview_dirs.extend(crawl_children.get(str(type_path), []))
+    stats.update(
+        scanner.stat_paths(
+            paths=interview_dirs
+            + [interview_dir / "Audio Record" for interview_dir in interview_dirs],
+            max_workers=max_workers,
+            stats=scan_stats,
+        )
+    )
+
+    return stats, listings
+
 
-        if not interview_type_path.exists():
+def fetch_interviews(
+    config_file: Path,
+    subject_id: str,
+    study_id: str,
+    consent_date_s: Optional[str],
+    crawl_states: Optional[Dict[str, CrawlState]] = None,
+    crawl_children: Optional[Dict[str, List[Path]]] = None,
+    crawl_counts: Optional[Dict[str, int]] = None,
+    stats: Optional[Dict[Path, Optional[os.stat_result]]] = None,
+    listings: Optional[Dict[Path, Optional[List[os.DirEntry]]]] = None,
+) -> Tuple[List[Interview], List[str]]:
+    """
+    Fetches the new or changed interviews for a given subject ID.
+
+    Interview type directories that did not change since the last crawl are
+    not listed: their interview directories are taken from the crawl state.
+    Interview directories that did not change are skipped.
+
+    Args:
+        config_file (Path): The path to the config file.
+        subject_id (str): The subject ID.
+        study_id (str): The study ID.
+        consent_date_s (Optional[str]): The consent date of the subject
+            (YYYY-MM-DD), None if not known.
+        crawl_states (Optional[Dict[str, CrawlState]]): The crawl state of the
+            study's directories. Defaults to None (crawl all directories).
+        crawl_children (Optional[Dict[str, List[Path]]]): The crawled
+            directories, by parent directory. Defaults to None.
+        crawl_counts (Optional[Dict[str, int]]): Counts of 'visited' and
+            'skipped' directories, updated in place. Defaults to None.
+        stats (Optional[Dict[Path, Optional[os.stat_result]]]): Stats gathered
+            beforehand by scan_interview_dirs. Paths not in it are stat-ed
+            here. Defaults to None.
+        listings (Optional[Dict[Path, Optional[List[os.DirEntry]]]]): Listings
+            gathered beforehand by scan_interview_dirs. Directories not in it are
+            listed here. Defaults to None.
+
+    Returns:
+        Tuple[List[Interview], List[str]]: The new or changed interviews, and
+            the SQL queries to update the crawl state once they are imported.
+    """
+    if crawl_states is None:
+        crawl_states = {}
+    if crawl_children is None:
+        crawl_children = {}
+    if crawl_counts is None:
+        crawl_counts = {"visited": 0, "skipped": 0}
+    if stats is None:
+        stats = {}
+    if listings is None:
+        listings = {}
+
+    interviews: List[Interview] = []
+    crawl_state_queries: List[str] = []
+    for interview_type, interview_type_path in get_interview_type_paths(
+        config_file=config_file, subject_id=subject_id, study_id=study_id
+    ):
+        type_signature = CrawlState.signature_from_stats(
+            get_stat(stats, interview_type_path)
+        )
+        if type_signature is None:
             logger.warning(
                 f"{subject_id}: Could not find {interview_type.value} interviews: \
 {interview_type_path} does not exist."
             )
             continue
-        interview_dirs = [d for d in interview_type_path.iterdir() if d.is_dir()]
 
+        type_state = crawl_states.get(str(interview_type_path))
+        if type_state is not None and type_state.cs_signature == type_signature:
+            crawl_counts["skipped"] += 1
+            interview_dirs = crawl_children.get(str(interview_type_path), [])
+        else:
+            crawl_counts["visited"] += 1
+            if interview_type_path in listings:
+                entries = listings[interview_type_path]
+            else:
+                entries = scanner.scan_dir(interview_type_path)
+            interview_dirs = [
+                Path(entry.path) for entry in entries or [] if entry.is_dir()
+            ]
+
+        # Only record the type directory once all of its interviews are imported
+        all_imported = True
         for interview_dir in interview_dirs:
+            signature = CrawlState.signature_from_stats(
+                get_stat(stats, interview_dir),
+                [get_stat(stats, interview_dir / "Audio Record")],
+            )
+            if signature is None:
+                crawl_state_queries.append(CrawlState.delete_query(interview_dir))
+                continue
+
+            interview_state = crawl_states.get(str(interview_dir))
+            if (
+                interview_state is not None
+                and interview_state.cs_signature == signature
+            ):
+                crawl_counts["skipped"] += 1
+                continue
+            crawl_counts["visited"] += 1
+
             base_name = interview_dir.name
             parts = base_name.split(" ")
 
@@ -243,12 +452,11 @@ def fetch_interviews(
                 logger.warning(
                     f"{subject_id}: Could not parse date and time from {base_name}. Skipping..."
                 )
+                all_imported = False
                 continue
-            consent_date_s = core.get_consent_date_from_subject_id(
-                config_file=config_file, subject_id=subject_id, study_id=study_id
-            )
             if consent_date_s is None:
                 logger.warning(f"Could not find consent date for {subject_id}")
+                all_imported = False
                 continue
             consent_date = datetime.strptime(consent_date_s, "%Y-%m-%d")
 
@@ -270,22 +478,48 @@ def fetch_interviews(
             )
 
             interviews.append(interview)
+            crawl_state_queries.append(
+                CrawlState(
+                    cs_path=interview_dir,
+                    cs_parent=interview_type_path,
+                    study_id=study_id,
+                    cs_signature=signature,
+                ).to_sql()
+            )
 
-    return interviews
+        if all_imported and type_signature is not None:
+            crawl_state_queries.append(
+                CrawlState(
+                    cs_path=interview_type_path,
+                    cs_parent=interview_type_path.parent,
+                    study_id=study_id,
+                    cs_signature=type_signature,
+                ).to_sql()
+            )
+
+    return interviews, crawl_state_queries
 
 
-def hash_file_worker(params: Tuple[InterviewFile, Path]) -> File:
+def hash_file_worker(
+    params: Tuple[InterviewFile, bool, Optional[Dict[str, Any]], hash_helper.HashStats]
+) -> File:
     """
     Hashes the file and returns a File object.
 
     Args:
-        params (Tuple[InterviewFile, Path]): A tuple containing the InterviewFile
-            and the path to the config file.
+        params (Tuple[InterviewFile, bool, Optional[Dict[str, Any]], HashStats]):
+            A tuple containing the InterviewFile, whether to hash the file, its
+            existing 'files' row (reused if the file did not change), and the
+            hashing statistics to update.
     """
-    interview_file, config_file = params
-    with_hash = orchestrator.is_crawler_hashing_required(config_file=config_file)
+    interview_file, with_hash, hash_record, hash_stats = params
 
-    file = File(file_path=interview_file.interview_file, with_hash=with_hash)
+    file = File(
+        file_path=interview_file.interview_file,
+        with_hash=with_hash,
+        hash_record=hash_record,
+        hash_stats=hash_stats,
+    )
     return file
 
 
@@ -294,6 +528,8 @@ def generate_queries(
     interview_files: List[InterviewFile],
     config_file: Path,
     progress: Progress,
+    existing_interview_paths: Set[str],
+    existing_file_tags: Dict[str, str],
 ) -> List[str]:
     """
     Generates the SQL queries to insert the interview files into the database.
@@ -303,68 +539,183 @@ def generate_queries(
         interview_files (List[InterviewFile]): A list of InterviewFile objects.
         config_file (Path): The path to the configuration file.
         progress (Progress): The progress bar.
+        existing_interview_paths (Set[str]): Paths of the interviews already
+            in the database.
+        existing_file_tags (Dict[str, str]): Tags of the interview files
+            already in the database.
     """
 
     files: List[File] = []
 
-    if orchestrator.is_crawler_hashing_required(config_file=config_file):
+    with_hash = orchestrator.is_crawler_hashing_required(config_file=config_file)
+    hash_records: Dict[str, Dict[str, Any]] = {}
+    if with_hash:
         logger.info("Hashing files...")
+        hash_records = File.fetch_hash_records(
+            config_file=config_file,
+            file_paths=[
+                interview_file.interview_file for interview_file in interview_files
+            ],
+        )
     else:
         logger.info("Skipping hashing files...")
 
-    params = [(interview_file, config_file) for interview_file in interview_files]
+    hash_stats = hash_helper.HashStats()
+    params = [
+        (
+            interview_file,
+            with_hash,
+            hash_records.get(str(interview_file.interview_file)),
+            hash_stats,
+        )
+        for interview_file in interview_files
+    ]
 
-    num_processes = multiprocessing.cpu_count() / 2
-    logger.info(f"Using {num_processes} processes")
-    with multiprocessing.Pool(processes=int(num_processes)) as pool:
+    # Hashing is I/O bound, and hashlib releases the GIL: use threads
+    num_threads = hash_helper.get_hash_workers(config_file=config_file)
+    logger.info(f"Using {num_threads} threads")
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
         task = progress.add_task("Hashing files...", total=len(interview_files))
-        for result in pool.imap_unordered(hash_file_worker, params):
+        for result in executor.map(hash_file_worker, params):
             files.append(result)
             progress.update(task, advance=1)
         progress.remove_task(task)
 
+    if with_hash:
+        hash_stats.log(description="interview files")
+        reused_count = sum(1 for file in files if file.hash_reused)
+        logger.info(
+            f"Hash cache: {reused_count} hits (unchanged files), \
+{len(files) - reused_count} misses (hashed)"
+        )
+
+    # Only insert new or changed rows
     sql_queries = []
     logger.info("Generating SQL queries...")
     # Insert the files
     for file in files:
+        if file.row_current:
+            # Unchanged since it was last imported
+            continue
         sql_queries.append(file.to_sql())
+    files_count = len(sql_queries)
 
     # Insert the interviews
-    for interview in interviews:
+    new_interviews = [
+        interview
+        for interview in interviews
+        if str(interview.interview_path) not in existing_interview_paths
+    ]
+    for interview in new_interviews:
         sql_queries.append(interview.to_sql())
 
     # Insert the interview files
-    for interview_file in interview_files:
+    new_interview_files = [
+        interview_file
+        for interview_file in interview_files
+        if existing_file_tags.get(str(interview_file.interview_file))
+        != interview_file.tags
+    ]
+    for interview_file in new_interview_files:
         sql_queries.append(interview_file.to_sql())
 
+    logger.info(
+        f"Inserting {files_count} files, {len(new_interviews)} interviews and \
+{len(new_interview_files)} interview files (new or changed)"
+    )
+
     return sql_queries
 
 
-def import_interviews(config_file: Path, study_id: str, progress: Progress) -> None:
+def import_interviews(
+    config_file: Path, study_id: str, progress: Progress, full_crawl: bool = False
+) -> None:
     """
-    Imports the interviews into the database.
+    Imports the new or changed interviews into the database.
 
     Args:
         config_file (Path): The path to the configuration file.
+        study_id (str): The study ID.
+        progress (Progress): The progress bar.
+        full_crawl (bool): Whether to ignore the crawl state, and crawl all
+            directories. Defaults to False.
     """
+    models.migrate_db(config_file=config_file)
+
+    crawl_states: Dict[str, CrawlState] = {}
+    if not full_crawl:
+        crawl_states = CrawlState.fetch_states(
+            config_file=config_file, study_id=study_id
+        )
+    crawl_children: Dict[str, List[Path]] = {}
+    for crawl_state in crawl_states.values():
+        crawl_children.setdefault(str(crawl_state.cs_parent), []).append(
+            crawl_state.cs_path
+        )
+    crawl_counts = {"visited": 0, "skipped": 0}
 
-    # Get the subjects
-    subjects = core.get_subject_ids(config_file=config_file, study_id=study_id)
+    # Get the subjects, and what is already imported, once for the study
+    consent_dates = core.get_consent_dates(config_file=config_file, study_id=study_id)
+    subjects = list(consent_dates)
+    existing_interview_paths = Interview.fetch_interview_paths(
+        config_file=config_file, study_id=study_id
+    )
+    existing_file_tags = InterviewFile.fetch_interview_file_tags(
+        config_file=config_file, study_id=study_id
+    )
+
+    # Stat and list the interview directories concurrently
+    logger.info(f"Scanning interview directories for {study_id}")
+    scan_stats = scanner.ScanStats()
+    stats, listings = scan_interview_dirs(
+        config_file=config_file,
+        study_id=study_id,
+        subjects=subjects,
+        crawl_states=crawl_states,
+        crawl_children=crawl_children,
+        scan_stats=scan_stats,
+    )
+    scan_stats.log(description=f"{study_id} interview directories")
 
     # Get the interviews
     logger.info(f"Fetching interviews for {study_id}")
     interviews: List[Interview] = []
+    crawl_state_queries: List[str] = []
 
     task = progress.add_task("Fetching interviews for subjects", total=len(subjects))
     for subject_id in subjects:
         progress.update(
             task, advance=1, description=f"Fetching {subject_id}'s interviews..."
         )
-        interviews.extend(
-            fetch_interviews(
-                config_file=config_file, subject_id=subject_id, study_id=study_id
-            )
+        subject_interviews, subject_crawl_state_queries = fetch_interviews(
+            config_file=config_file,
+            subject_id=subject_id,
+            study_id=study_id,
+            consent_date_s=consent_dates.get(subject_id),
+            crawl_states=crawl_states,
+            crawl_children=crawl_children,
+            crawl_counts=crawl_counts,
+            stats=stats,
+            listings=listings,
         )
+        interviews.extend(subject_interviews)
+        crawl_state_queries.extend(subject_crawl_state_queries)
+
+    logger.info(
+        f"{study_id}: Visited {crawl_counts['visited']} directories, skipped \
+{crawl_counts['skipped']} unchanged directories. {len(interviews)} new or changed \
+interviews."
+    )
+
+    # List the new or changed interview directories concurrently
+    scan_stats = scanner.ScanStats()
+    files_listings = scanner.scan_dirs(
+        paths=[interview.interview_path for interview in interviews]
+        + [interview.interview_path / "Audio Record" for interview in interviews],
+        max_workers=scanner.get_scan_workers(config_file=config_file),
+        stats=scan_stats,
+    )
+    scan_stats.log(description=f"{study_id} interview files")
 
     # Get the interview files
     logger.info("Fetching interview files...")
@@ -375,7 +726,9 @@ def import_interviews(config_file: Path, study_id: str, progress: Progress) -> N
     for interview in interviews:
         interview_counter += 1
         progress.update(task, advance=1)
-        interview_files.extend(fetch_interview_files(interview=interview))
+        interview_files.extend(
+            fetch_interview_files(interview=interview, listings=files_listings)
+        )
 
     # Generate the SQL queries to import the interview files
     sql_queries = generate_queries(
@@ -383,8 +736,14 @@ def import_interviews(config_file: Path, study_id: str, progress: Progress) -> N
         interview_files=interview_files,
         config_file=config_file,
         progress=progress,
+        existing_interview_paths=existing_interview_paths,
+        existing_file_tags=existing_file_tags,
     )
 
+    # Record the crawl state along with the imported rows, so that
+    # directories are only skipped once their contents are imported
+    sql_queries.extend(crawl_state_queries)
+
     # Execute the SQL queries
     db.execute_queries(config_file=config_file, queries=sql_queries)
 
@@ -396,6 +755,11 @@ if __name__ == "__main__":
     parser.add_argument(
         "-c", "--config", type=str, help="Path to the config file.", required=False
     )
+    parser.add_argument(
+        "--full-crawl",
+        action="store_true",
+        help="Ignore the crawl state, and crawl all directories.",
+    )
 
     args = parser.parse_args()
 
@@ -427,7 +791,10 @@ if __name__ == "__main__":
                 description=f"Importing interviews for {study_id}...",
             )
             import_interviews(
-                config_file=config_file, study_id=study_id, progress=progress
+                config_file=config_file,
+                study_id=study_id,
+                progress=progress,
+                full_crawl=args.full_crawl,
             )
 
     logger.info("[bold green]Done!", extra={"markup": True})
@@ -29,15 +29,17 @@ except ValueError:
 
 import argparse
 import logging
-import multiprocessing
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, time
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from rich.logging import RichHandler
 
-from pipeline import core
-from pipeline.helpers import cli, db, dpdash, utils
+from pipeline import core, models
+from pipeline.helpers import cli, db, dpdash, scanner, utils
+from pipeline.helpers import hash as hash_helper
 from pipeline.helpers.config import config
 from pipeline.models.files import File
 from pipeline.models.interview_files import InterviewFile
@@ -152,17 +154,24 @@ def catogorize_audio_files(
 
 
 def fetch_interview_files(
-    config_file: Path, interview: Interview
+    config_file: Path,
+    interview: Interview,
+    listings: Optional[Dict[Path, Optional[List[os.DirEntry]]]] = None,
 ) -> List[InterviewFile]:
     """
     Fetches the interview files for a given interview.
 
     Args:
         interview (Interview): The interview object.
+        listings (Optional[Dict[Path, Optional[List[os.DirEntry]]]]): Directory
+            listings gathered beforehand by the scanner. Directories not in it
+            are listed here. Defaults to None.
 
     Returns:
         List[InterviewFile]: A list of InterviewFile objects.
     """
+    if listings is None:
+        listings = {}
 
     crawler_params = config(path=config_file, section="crawler")
     known_interviewers: List[str] = crawler_params.get("known_interviewers", "").split(
@@ -174,7 +183,11 @@ def fetch_interview_files(
 
     interview_path = interview.interview_path
     # list all files in the directory
-    files = [f for f in interview_path.iterdir() if f.is_file()]
+    if interview_path in listings:
+        entries = listings[interview_path]
+    else:
+        entries = scanner.scan_dir(interview_path)
+    files = [Path(entry.path) for entry in entries or [] if entry.is_file()]
 
     audio_files: List[Path] = []
     video_files: List[Path] = []
@@ -211,30 +224,66 @@ def fetch_interview_files(
     return interview_files
 
 
-def fetch_interviews(config_file: Path, subject_id: str) -> List[Interview]:
+def get_offsite_interview_path(config_file: Path, subject_id: str) -> Path:
     """
-    Fetches the interviews for a given subject ID.
+    Returns the directory holding the offsite interviews of a subject.
 
     Args:
         config_file (Path): The path to the config file.
         subject_id (str): The subject ID.
 
     Returns:
-        List[Interview]: A list of Interview objects.
+        Path: The offsite interview directory.
     """
     config_params = config(path=config_file, section="general")
     data_root = Path(config_params["data_root"])
     study_id = config_params["study"]
 
     study_path: Path = data_root / "PROTECTED" / study_id
-    offsite_interview_path: Path = study_path / subject_id / "offsite_interview" / "raw"
+    return study_path / subject_id / "offsite_interview" / "raw"
+
+
+def fetch_interviews(
+    config_file: Path,
+    subject_id: str,
+    consent_date_s: Optional[str],
+    listings: Optional[Dict[Path, Optional[List[os.DirEntry]]]] = None,
+) -> List[Interview]:
+    """
+    Fetches the interviews for a given subject ID.
+
+    Args:
+        config_file (Path): The path to the config file.
+        subject_id (str): The subject ID.
+        consent_date_s (Optional[str]): The consent date of the subject
+            (YYYY-MM-DD), None if not known.
+        listings (Optional[Dict[Path, Optional[List[os.DirEntry]]]]): Directory
+            listings gathered beforehand by the scanner. Directories not in it
+            are listed here. Defaults to None.
+
+    Returns:
+        List[Interview]: A list of Interview objects.
+    """
+    if listings is None:
+        listings = {}
+
+    config_params = config(path=config_file, section="general")
+    study_id = config_params["study"]
+
+    offsite_interview_path = get_offsite_interview_path(
+        config_file=config_file, subject_id=subject_id
+    )
+    if offsite_interview_path in listings:
+        entries = listings[offsite_interview_path]
+    else:
+        entries = scanner.scan_dir(offsite_interview_path)
 
-    if not offsite_interview_path.exists():
+    if entries is None:
         logger.warning(f"Could not find offsite interview path for {subject_id}")
         return []
 
     interviews: List[Interview] = []
-    interview_dirs = [d for d in offsite_interview_path.iterdir() if d.is_dir()]
+    interview_dirs = [Path(entry.path) for entry in entries if entry.is_dir()]
 
     for interview_dir in interview_dirs:
         base_name = interview_dir.name
@@ -245,9 +294,6 @@ def fetch_interviews(config_file: Path, subject_id: str) -> List[Interview]:
         time_dt = time.fromisoformat(parts[1].replace(".", ":"))
         interview_datetime = datetime.combine(date_dt, time_dt)
 
-        consent_date_s = core.get_consent_date_from_subject_id(
-            config_file=config_file, subject_id=subject_id, study_id=study_id
-        )
         if consent_date_s is None:
             logger.warning(f"Could not find consent date for {subject_id}")
             continue
@@ -276,53 +322,119 @@ def fetch_interviews(config_file: Path, subject_id: str) -> List[Interview]:
     return interviews
 
 
-def hash_file_worker(interview_file: InterviewFile) -> File:
+def hash_file_worker(
+    params: Tuple[InterviewFile, Optional[Dict[str, Any]], hash_helper.HashStats]
+) -> File:
     """
     Hashes the file and returns a File object.
 
     Args:
-        interview_file (InterviewFile): The interview file to hash.
+        params (Tuple[InterviewFile, Optional[Dict[str, Any]], HashStats]): A tuple
+            containing the interview file to hash, its existing 'files' row
+            (reused if the file did not change), and the hashing statistics
+            to update.
     """
-    file = File(file_path=interview_file.interview_file)
+    interview_file, hash_record, hash_stats = params
+    file = File(
+        file_path=interview_file.interview_file,
+        hash_record=hash_record,
+        hash_stats=hash_stats,
+    )
     return file
 
 
-def generate_queries(interviews: List[Interview], interview_files: List[InterviewFile]):
+def generate_queries(
+    interviews: List[Interview],
+    interview_files: List[InterviewFile],
+    config_file: Path,
+    existing_interview_paths: Set[str],
+    existing_file_tags: Dict[str, str],
+):
     """
-    Generates the SQL queries to insert the interview files into the database.
+    Generates the SQL queries to insert the new or changed interview files
+    into the database.
 
     Args:
         interviews (List[Interview]): A list of Interview objects.
         interview_files (List[InterviewFile]): A list of InterviewFile objects.
+        config_file (Path): The path to the configuration file.
+        existing_interview_paths (Set[str]): Paths of the interviews already
+            in the database.
+        existing_file_tags (Dict[str, str]): Tags of the interview files
+            already in the database.
     """
 
     files: List[File] = []
 
     logger.info("Hashing files...")
+    hash_records = File.fetch_hash_records(
+        config_file=config_file,
+        file_paths=[
+            interview_file.interview_file for interview_file in interview_files
+        ],
+    )
+    hash_stats = hash_helper.HashStats()
+    params = [
+        (
+            interview_file,
+            hash_records.get(str(interview_file.interview_file)),
+            hash_stats,
+        )
+        for interview_file in interview_files
+    ]
 
-    num_processes = multiprocessing.cpu_count() / 4
-    logger.info(f"Using {num_processes} processes")
-    with multiprocessing.Pool(processes=int(num_processes)) as pool:
+    # Hashing is I/O bound, and hashlib releases the GIL: use threads
+    num_threads = hash_helper.get_hash_workers(config_file=config_file)
+    logger.info(f"Using {num_threads} threads")
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
         with utils.get_progress_bar() as progress:
             task = progress.add_task("Hashing files...", total=len(interview_files))
-            for result in pool.imap_unordered(hash_file_worker, interview_files):
+            for result in executor.map(hash_file_worker, params):
                 files.append(result)
                 progress.update(task, advance=1)
+    hash_stats.log(description="interview files")
 
+    reused_count = sum(1 for file in files if file.hash_reused)
+    logger.info(
+        f"Hash cache: {reused_count} hits (unchanged files), \
+{len(files) - reused_count} misses (hashed)"
+    )
+
+    # Only insert new or changed rows
     sql_queries = []
     logger.info("Generating SQL queries...")
     # Insert the files
     for file in files:
+        if file.row_current:
+            # Unchanged since it was last imported
+            continue
         sql_queries.append(file.to_sql())
+    files_count = len(sql_queries)
 
     # Insert the interviews
-    for interview in interviews:
+    new_interviews = [
+        interview
+        for interview in interviews
+        if str(interview.interview_path) not in existing_interview_paths
+    ]
+    for interview in new_interviews:
         sql_queries.append(interview.to_sql())
 
     # Insert the interview files
-    for interview_file in interview_files:
+    new_interview_files = [
+        interview_file
+        for interview_file in interview_files
+        if existing_file_tags.get(str(interview_file.interview_file))
+        != interview_file.tags
+    ]
+    for interview_file in new_interview_files:
         sql_queries.append(interview_file.to_sql())
 
+    logger.info(
+        f"Inserting {files_count} files, {len(new_interviews)} interviews and \
+{len(new_interview_files)} interview files (new or changed)"
+    )
+
     return sql_queries
 
 
@@ -336,8 +448,30 @@ def import_interviews(config_file: Path) -> None:
     config_params = config(path=config_file, section="general")
     study_id = config_params["study"]
 
-    # Get the subjects
-    subjects = core.get_subject_ids(config_file=config_file, study_id=study_id)
+    models.migrate_db(config_file=config_file)
+
+    # Get the subjects, and what is already imported, once for the study
+    consent_dates = core.get_consent_dates(config_file=config_file, study_id=study_id)
+    subjects = list(consent_dates)
+    existing_interview_paths = Interview.fetch_interview_paths(
+        config_file=config_file, study_id=study_id
+    )
+    existing_file_tags = InterviewFile.fetch_interview_file_tags(
+        config_file=config_file, study_id=study_id
+    )
+
+    # List the offsite interview directories concurrently
+    max_workers = scanner.get_scan_workers(config_file=config_file)
+    scan_stats = scanner.ScanStats()
+    listings = scanner.scan_dirs(
+        paths=[
+            get_offsite_interview_path(config_file=config_file, subject_id=subject_id)
+            for subject_id in subjects
+        ],
+        max_workers=max_workers,
+        stats=scan_stats,
+    )
+    scan_stats.log(description=f"{study_id} interview directories")
 
     # Get the interviews
     logger.info(f"Fetching interviews for {study_id}")
@@ -352,9 +486,23 @@ def import_interviews(config_file: Path) -> None:
                 task, advance=1, description=f"Fetching {subject_id}'s interviews..."
             )
             interviews.extend(
-                fetch_interviews(config_file=config_file, subject_id=subject_id)
+                fetch_interviews(
+                    config_file=config_file,
+                    subject_id=subject_id,
+                    consent_date_s=consent_dates.get(subject_id),
+                    listings=listings,
+                )
             )
 
+        # List the interview directories concurrently
+        scan_stats = scanner.ScanStats()
+        files_listings = scanner.scan_dirs(
+            paths=[interview.interview_path for interview in interviews],
+            max_workers=max_workers,
+            stats=scan_stats,
+        )
+        scan_stats.log(description=f"{study_id} interview files")
+
         # Get the interview files
         logger.info("Fetching interview files...")
         interview_files: List[InterviewFile] = []
@@ -363,12 +511,20 @@ def import_interviews(config_file: Path) -> None:
         for interview in interviews:
             progress.update(task, advance=1)
             interview_files.extend(
-                fetch_interview_files(interview=interview, config_file=config_file)
+                fetch_interview_files(
+                    interview=interview,
+                    config_file=config_file,
+                    listings=files_listings,
+                )
             )
 
     # Generate the SQL queries to import the interview files
     sql_queries = generate_queries(
-        interviews=interviews, interview_files=interview_files
+        interviews=interviews,
+        interview_files=interview_files,
+        config_file=config_file,
+        existing_interview_paths=existing_interview_paths,
+        existing_file_tags=existing_file_tags,
     )
 
     # Execute the SQL queries
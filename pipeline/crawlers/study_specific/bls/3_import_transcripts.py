@@ -26,8 +26,8 @@ from typing import List, Tuple
 
 from rich.logging import RichHandler
 
-from pipeline import core, orchestrator
-from pipeline.helpers import cli, utils, db
+from pipeline import core, models, orchestrator
+from pipeline.helpers import cli, utils, db, scanner
 from pipeline.models.files import File
 from pipeline.models.interview_files import InterviewFile
 
@@ -153,9 +153,14 @@ def import_transcripts(data_root: Path, study: str, config_file: Path) -> None:
     crawler_params = utils.config(path=config_file, section="crawler")
     transcripts_study_pattern = crawler_params["transcripts_study_pattern"]
 
-    transcripts = list(
-        subjects_root.glob(transcripts_study_pattern)
+    scan_stats = scanner.ScanStats()
+    transcripts = scanner.glob(
+        root=subjects_root,
+        pattern=transcripts_study_pattern,
+        max_workers=scanner.get_scan_workers(config_file=config_file),
+        stats=scan_stats,
     )
+    scan_stats.log(description=f"{study} transcripts")
 
     logger.info(f"Found {len(transcripts)} transcripts.")
 
@@ -200,6 +205,8 @@ if __name__ == "__main__":
     data_root = orchestrator.get_data_root(config_file=config_file, enforce_real=True)
     studies = orchestrator.get_studies(config_file=config_file)
 
+    models.migrate_db(config_file=config_file)
+
     for study in studies:
         logger.info(f"Processing study: {study}")
         import_transcripts(data_root=data_root, study=study, config_file=config_file)
@@ -11,7 +11,7 @@ import subprocess
 import sys
 import tempfile
 from pathlib import Path
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from pipeline.helpers.config import config
 
@@ -294,6 +294,7 @@ def execute_commands(
     command_array: list,
     shell: bool = False,
     on_fail: Callable = lambda: sys.exit(1),
+    env: Optional[Dict[str, str]] = None,
 ) -> subprocess.CompletedProcess:
     """
     Executes a command and returns the result.
@@ -305,6 +306,8 @@ def execute_commands(
             Defaults to None.
         on_fail (Callable, optional): The function to call if the command fails.
             Defaults to lambda: sys.exit(1).
+        env (Optional[Dict[str, str]], optional): The environment of the command.
+            Defaults to None, which inherits the environment of this process.
 
     Returns:
         subprocess.CompletedProcess: The result of the command execution.
@@ -324,10 +327,15 @@ def execute_commands(
             stderr=subprocess.PIPE,
             shell=True,
             check=False,
+            env=env,
         )
     else:
         result = subprocess.run(
-            command_array, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
+            command_array,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+            env=env,
         )
 
     if result.returncode != 0:
@@ -2,12 +2,17 @@
 Helper functions for interacting with a PostgreSQL database.
 """
 
+import io
 import json
 import logging
+import os
+import select
 import sys
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Dict, Literal, Optional
+from typing import Callable, Dict, List, Literal, Optional, Set, Tuple
 
 import pandas as pd
 import psycopg2
@@ -18,6 +23,27 @@ from pipeline.helpers import cli, utils
 
 logger = logging.getLogger(__name__)
 
+# Optional connection pool parameters, read from the database section of the
+# configuration file. These are not passed on to psycopg2.
+POOL_PARAMS: Dict[str, int] = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_recycle_seconds": 1800,
+}
+
+# Process-wide engines, keyed by (config file, db section)
+_engines: Dict[Tuple[str, str], sqlalchemy.engine.base.Engine] = {}
+_engines_lock = threading.Lock()
+_pool_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+# Process-wide LISTEN connections, keyed by (config file, db section)
+_listeners: Dict[Tuple[str, str], psycopg2.extensions.connection] = {}
+_listener_channels: Dict[Tuple[str, str], Set[str]] = {}
+
+# Number of queries issued by the current process, see QueryCounter
+_query_count = 0
+_query_count_lock = threading.Lock()
+
 
 def handle_null(query: str) -> str:
     """
@@ -111,9 +137,148 @@ def get_db_credentials(config_file: Path, db: str = "postgresql") -> Dict[str, s
     else:
         credentials = db_params
 
+    credentials = {
+        key: value for key, value in credentials.items() if key not in POOL_PARAMS
+    }
+
     return credentials
 
 
+def get_pool_params(config_file: Path, db: str = "postgresql") -> Dict[str, int]:
+    """
+    Retrieves the connection pool parameters from the configuration file.
+
+    Falls back to the defaults in POOL_PARAMS for any parameter that is not set.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        db (str, optional): The section of the configuration file to use.
+            Defaults to "postgresql".
+
+    Returns:
+        Dict[str, int]: A dictionary containing the pool parameters.
+    """
+    db_params = utils.config(path=config_file, section=db)
+
+    pool_params: Dict[str, int] = {}
+    for key, default in POOL_PARAMS.items():
+        pool_params[key] = int(db_params.get(key, default))
+
+    return pool_params
+
+
+def get_pool_stats() -> Dict[str, int]:
+    """
+    Returns the connection pool counters for the current process.
+
+    A 'hit' is a checkout served by an already open connection, a 'miss'
+    is a checkout that required opening a new connection to the database.
+
+    Returns:
+        Dict[str, int]: A dictionary with 'hits' and 'misses' counts.
+    """
+    return dict(_pool_stats)
+
+
+def count_queries(count: int = 1) -> None:
+    """
+    Adds to the number of queries issued by the current process.
+
+    Args:
+        count (int, optional): The number of queries issued. Defaults to 1.
+    """
+    global _query_count  # pylint: disable=global-statement
+    with _query_count_lock:
+        _query_count += count
+
+
+def get_query_count() -> int:
+    """
+    Returns the number of queries issued by the current process.
+
+    Returns:
+        int: The number of queries.
+    """
+    return _query_count
+
+
+class QueryCounter:
+    """
+    Counts the queries issued by the current process (all threads),
+    since the counter was created.
+
+    Usage:
+    ```
+    query_counter = QueryCounter()
+    # code issuing queries
+    print(f"Queries issued: {query_counter.count}")
+    ```
+    """
+
+    def __init__(self) -> None:
+        self.start = get_query_count()
+
+    @property
+    def count(self) -> int:
+        """
+        Returns the number of queries issued since the counter was created.
+        """
+        return get_query_count() - self.start
+
+
+def dispose_engines() -> None:
+    """
+    Closes all pooled connections and forgets all engines in this process.
+    """
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+def _reset_engines_after_fork() -> None:
+    """
+    Drops engines inherited from the parent process, without closing
+    the parent's connections.
+
+    Sockets can not be shared across processes, so children
+    (e.g. multiprocessing.Pool workers) must open their own connections.
+    The module's locks are re-created, as the child has no other threads
+    to release them.
+    """
+    global _engines_lock, _query_count_lock  # pylint: disable=global-statement
+
+    _engines_lock = threading.Lock()
+    _query_count_lock = threading.Lock()
+    for engine in _engines.values():
+        engine.dispose(close=False)
+    _engines.clear()
+    _pool_stats["hits"] = 0
+    _pool_stats["misses"] = 0
+    _listeners.clear()
+    _listener_channels.clear()
+
+
+os.register_at_fork(after_in_child=_reset_engines_after_fork)
+
+
+def _on_connect(_dbapi_connection, connection_record) -> None:
+    """
+    Marks a newly opened DBAPI connection, so its first checkout counts as a miss.
+    """
+    connection_record.info["fresh"] = True
+
+
+def _on_checkout(_dbapi_connection, connection_record, _connection_proxy) -> None:
+    """
+    Updates the pool hit / miss counters on every connection checkout.
+    """
+    if connection_record.info.pop("fresh", False):
+        _pool_stats["misses"] += 1
+    else:
+        _pool_stats["hits"] += 1
+
+
 def execute_queries(
     config_file: Path,
     queries: list,
@@ -162,8 +327,8 @@ def execute_queries(
         orchestrator.fix_permissions(config_file=config_file, file_path=backup_file)
 
     try:
-        credentials = get_db_credentials(config_file=config_file, db=db)
-        conn = psycopg2.connect(**credentials)  # type: ignore
+        engine = get_db_connection(config_file=config_file, db=db)
+        conn = engine.raw_connection()
         cur = conn.cursor()
 
         def execute_query(query: str):
@@ -171,6 +336,7 @@ def execute_queries(
                 logger.debug("Executing query:")
                 logger.debug(f"[bold blue]{query}", extra={"markup": True})
             cur.execute(query)
+            count_queries()
             try:
                 output.append(cur.fetchall())
             except psycopg2.ProgrammingError:
@@ -207,6 +373,7 @@ def execute_queries(
             raise e
     finally:
         if conn is not None:
+            # Returns the connection to the pool, rolling back any open transaction
             conn.close()
 
     return output
@@ -216,27 +383,54 @@ def get_db_connection(
     config_file: Path, db: str = "postgresql"
 ) -> sqlalchemy.engine.base.Engine:
     """
-    Establishes a connection to the PostgreSQL database using the provided configuration file.
+    Returns the pooled database engine for the given configuration file and section.
+
+    Engines are created once per process and reused by all subsequent calls.
+    Connections are health checked (pre-ping) before being handed out,
+    and recycled after 'pool_recycle_seconds'.
 
     Args:
         config_file (Path): The path to the configuration file.
+        db (str, optional): The section of the configuration file to use.
+            Defaults to "postgresql".
 
     Returns:
         sqlalchemy.engine.base.Engine: The database connection engine.
     """
-    credentials = get_db_credentials(config_file=config_file, db=db)
-    engine = sqlalchemy.create_engine(
-        "postgresql+psycopg2://"
-        + credentials["user"]
-        + ":"
-        + credentials["password"]
-        + "@"
-        + credentials["host"]
-        + ":"
-        + credentials["port"]
-        + "/"
-        + credentials["database"]
-    )
+    key = (str(Path(config_file).resolve()), db)
+
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            return engine
+
+        credentials = get_db_credentials(config_file=config_file, db=db)
+        pool_params = get_pool_params(config_file=config_file, db=db)
+
+        url = sqlalchemy.engine.URL.create(
+            drivername="postgresql+psycopg2",
+            username=credentials["user"],
+            password=credentials["password"],
+            host=credentials["host"],
+            port=int(credentials["port"]),
+            database=credentials["database"],
+        )
+        engine = sqlalchemy.create_engine(
+            url,
+            pool_size=pool_params["pool_size"],
+            max_overflow=pool_params["max_overflow"],
+            pool_recycle=pool_params["pool_recycle_seconds"],
+            pool_pre_ping=True,
+        )
+        sqlalchemy.event.listen(engine, "connect", _on_connect)
+        sqlalchemy.event.listen(engine, "checkout", _on_checkout)
+
+        logger.debug(f"Created connection pool for [{db}] ({pool_params})")
+        _engines[key] = engine
 
     return engine
 
@@ -256,8 +450,7 @@ def execute_sql(config_file: Path, query: str, db: str = "postgresql") -> pd.Dat
     engine = get_db_connection(config_file=config_file, db=db)
 
     df = pd.read_sql(query, engine)
-
-    engine.dispose()
+    count_queries()
 
     return df
 
@@ -292,6 +485,7 @@ def df_to_table(
     df: pd.DataFrame,
     table_name: str,
     if_exists: Literal["fail", "replace", "append"] = "replace",
+    db: str = "postgresql",
 ) -> None:
     """
     Writes a pandas DataFrame to a table in a PostgreSQL database.
@@ -302,8 +496,218 @@ def df_to_table(
         table_name (str): The name of the table to write to.
         if_exists (Literal["fail", "replace", "append"], optional): What to do
             if the table already exists.
+        db (str, optional): The section of the configuration file to use.
+            Defaults to "postgresql".
     """
 
-    engine = get_db_connection(config_file=config_file)
+    engine = get_db_connection(config_file=config_file, db=db)
     df.to_sql(table_name, engine, if_exists=if_exists, index=False)
-    engine.dispose()
+    count_queries()
+
+
+def copy_df_to_table(
+    config_file: Path,
+    df: pd.DataFrame,
+    table_name: str,
+    conflict_columns: Optional[List[str]] = None,
+    update_on_conflict: bool = False,
+    chunk_size: int = 10000,
+    db: str = "postgresql",
+) -> int:
+    """
+    Bulk loads a pandas DataFrame into an existing table using PostgreSQL COPY.
+
+    Rows are streamed into a temporary staging table, and then merged into the
+    target table with 'INSERT ... ON CONFLICT DO NOTHING', so rows that already
+    exist are skipped, instead of failing the load. With 'update_on_conflict',
+    rows that already exist are updated with the loaded values instead.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        df (pd.DataFrame): The DataFrame to load. Column names must match the
+            column names of the target table.
+        table_name (str): The name of the table to load into.
+        conflict_columns (Optional[List[str]], optional): The columns of the unique
+            constraint to dedupe on. Defaults to None (any constraint).
+        update_on_conflict (bool, optional): Whether to update the rows that
+            already exist, instead of skipping them. Requires 'conflict_columns'.
+            Defaults to False.
+        chunk_size (int, optional): The number of rows to serialize per COPY
+            call. Defaults to 10000.
+        db (str, optional): The section of the configuration file to use.
+            Defaults to "postgresql".
+
+    Returns:
+        int: The number of rows inserted (or updated) in the target table.
+
+    Raises:
+        ValueError: If 'update_on_conflict' is set without 'conflict_columns'.
+    """
+    staging_table = f"{table_name}_staging"
+    columns = ", ".join([f'"{col}"' for col in df.columns])
+
+    if conflict_columns is not None:
+        conflict_target = f"({', '.join(conflict_columns)})"
+    else:
+        conflict_target = ""
+
+    if update_on_conflict:
+        if conflict_columns is None:
+            raise ValueError("update_on_conflict requires conflict_columns")
+        update_columns = ", ".join(
+            [
+                f'"{col}" = excluded."{col}"'
+                for col in df.columns
+                if col not in conflict_columns
+            ]
+        )
+        conflict_action = f"DO UPDATE SET {update_columns}"
+    else:
+        conflict_action = "DO NOTHING"
+
+    engine = get_db_connection(config_file=config_file, db=db)
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            CREATE TEMP TABLE {staging_table}
+            (LIKE {table_name} INCLUDING DEFAULTS)
+            ON COMMIT DROP;
+            """
+        )
+
+        copy_query = f"COPY {staging_table} ({columns}) FROM STDIN WITH (FORMAT csv)"
+        for start in range(0, len(df), chunk_size):
+            buffer = io.StringIO()
+            df.iloc[start : start + chunk_size].to_csv(
+                buffer, header=False, index=False
+            )
+            buffer.seek(0)
+            cur.copy_expert(copy_query, buffer)
+            count_queries()
+
+        cur.execute(
+            f"""
+            INSERT INTO {table_name} ({columns})
+            SELECT {columns} FROM {staging_table}
+            ON CONFLICT {conflict_target} {conflict_action};
+            """
+        )
+        inserted_rows = cur.rowcount
+        # Staging table and merge
+        count_queries(2)
+
+        cur.close()
+        conn.commit()
+    except (Exception, psycopg2.DatabaseError) as e:
+        logger.error(
+            f"[bold red]Error copying data into {table_name}.", extra={"markup": True}
+        )
+        logger.error(e)
+        raise e
+    finally:
+        # Returns the connection to the pool, rolling back any open transaction
+        conn.close()
+
+    return inserted_rows
+
+
+def notify_query(channel: str, payload: str = "") -> str:
+    """
+    Returns the SQL query to publish a notification on a channel.
+
+    Notifications are delivered to listeners when the transaction commits,
+    so the query should be executed along with the queries logging the work.
+
+    Args:
+        channel (str): The channel to notify.
+        payload (str, optional): The payload of the notification. Defaults to "".
+
+    Returns:
+        str: The SQL query to publish the notification.
+    """
+    payload = santize_string(payload)
+
+    sql_query = f"""
+    NOTIFY {channel}, '{payload}';
+    """
+
+    return sql_query
+
+
+def _get_listener(
+    config_file: Path, channels: List[str], db: str = "postgresql"
+) -> psycopg2.extensions.connection:
+    """
+    Returns the LISTEN connection for this process, listening on 'channels'.
+
+    The connection is kept open between waits, so notifications sent while
+    the process is busy are not lost.
+    """
+    key = (str(Path(config_file).resolve()), db)
+
+    conn = _listeners.get(key)
+    if conn is None or conn.closed:
+        credentials = get_db_credentials(config_file=config_file, db=db)
+        conn = psycopg2.connect(
+            host=credentials["host"],
+            port=int(credentials["port"]),
+            user=credentials["user"],
+            password=credentials["password"],
+            dbname=credentials["database"],
+        )
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        _listeners[key] = conn
+        _listener_channels[key] = set()
+
+    cur = conn.cursor()
+    for channel in channels:
+        if channel not in _listener_channels[key]:
+            cur.execute(f"LISTEN {channel};")
+            _listener_channels[key].add(channel)
+    cur.close()
+
+    return conn
+
+
+def wait_for_notification(
+    config_file: Path,
+    channels: List[str],
+    timeout: float,
+    db: str = "postgresql",
+) -> List[str]:
+    """
+    Blocks until a notification is received on any of the channels, or
+    until the timeout expires.
+
+    Falls back to sleeping for 'timeout' seconds if the database is unreachable.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        channels (List[str]): The channels to listen on.
+        timeout (float): The maximum time to wait, in seconds.
+        db (str, optional): The section of the configuration file to use.
+            Defaults to "postgresql".
+
+    Returns:
+        List[str]: The channels that were notified. Empty if the timeout expired.
+    """
+    try:
+        conn = _get_listener(config_file=config_file, channels=channels, db=db)
+
+        # Notifications received while the process was busy
+        conn.poll()
+        if not conn.notifies:
+            if select.select([conn], [], [], timeout) != ([], [], []):
+                conn.poll()
+    except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+        logger.warning(f"Unable to listen for notifications: {e}")
+        _listeners.pop((str(Path(config_file).resolve()), db), None)
+        time.sleep(timeout)
+        return []
+
+    notified = {notify.channel for notify in conn.notifies}
+    conn.notifies.clear()
+
+    return sorted(notified)
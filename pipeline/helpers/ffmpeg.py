@@ -2,11 +2,15 @@
 Helper functions for interacting with FFmpeg.
 """
 
+import json
 import logging
+import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+import numpy as np
 from rich.progress import Progress
 
 from pipeline.helpers import cli, utils
@@ -75,6 +79,300 @@ def extract_screenshots_from_video(
     return screenshots
 
 
+def get_video_dimensions(video_file: Path) -> Tuple[int, int]:
+    """
+    Gets the width and height of the first video stream using ffprobe.
+
+    ffmpeg rotates decoded frames according to the rotation metadata of the
+    stream (display matrix side data, or the legacy 'rotate' tag), so the
+    dimensions are swapped for videos rotated by 90 or 270 degrees.
+
+    Args:
+        video_file (Path): The path to the video file.
+
+    Returns:
+        Tuple[int, int]: The width and height of the decoded frames, in pixels.
+    """
+    command_array = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "stream=width,height:stream_tags=rotate:stream_side_data=rotation",
+        "-of",
+        "json",
+        str(video_file),
+    ]
+
+    result = cli.execute_commands(command_array)
+    stream = json.loads(result.stdout.decode("utf-8"))["streams"][0]
+    width = int(stream["width"])
+    height = int(stream["height"])
+
+    rotation = stream.get("tags", {}).get("rotate", 0)
+    for side_data in stream.get("side_data_list", []):
+        if "rotation" in side_data:
+            rotation = side_data["rotation"]
+
+    if int(float(rotation)) % 180 != 0:
+        width, height = height, width
+
+    return width, height
+
+
+def get_video_duration(video_file: Path) -> float:
+    """
+    Gets the duration of a video file using ffprobe.
+
+    Args:
+        video_file (Path): The path to the video file.
+
+    Returns:
+        float: The duration of the video, in seconds.
+    """
+    command_array = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        str(video_file),
+    ]
+
+    result = cli.execute_commands(command_array)
+
+    return float(result.stdout.decode("utf-8").strip())
+
+
+def get_video_frame_count(video_file: Path) -> int:
+    """
+    Gets the number of frames of the first video stream using ffprobe.
+
+    Packets are counted, which does not require decoding the video.
+
+    Args:
+        video_file (Path): The path to the video file.
+
+    Returns:
+        int: The number of frames.
+    """
+    command_array = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-count_packets",
+        "-show_entries",
+        "stream=nb_read_packets",
+        "-of",
+        "csv=p=0",
+        str(video_file),
+    ]
+
+    result = cli.execute_commands(command_array)
+    frame_count = result.stdout.decode("utf-8").strip().split(",")[0]
+
+    return int(frame_count)
+
+
+def split_video_segments(
+    source: Path, output_dir: Path, segment_time: float
+) -> List[Tuple[Path, float]]:
+    """
+    Splits a video into consecutive segments, without re-encoding.
+
+    Cuts are made at the first keyframe after each multiple of 'segment_time',
+    so the segments cover the whole video without gaps or overlaps.
+    Timestamps of each segment start at 0.
+
+    Args:
+        source (Path): The path to the input video file.
+        output_dir (Path): The directory to write the segments to.
+        segment_time (float): The target duration of each segment, in seconds.
+
+    Returns:
+        List[Tuple[Path, float]]: The segments, with their start time in the
+            source video (in seconds), in order.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    segment_list = output_dir / "segments.csv"
+
+    cli_command_array = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        source,
+        "-map",
+        "0:v:0",
+        "-c",
+        "copy",
+        "-f",
+        "segment",
+        "-segment_time",
+        f"{segment_time:.3f}",
+        "-reset_timestamps",
+        "1",
+        "-segment_list",
+        segment_list,
+        "-segment_list_type",
+        "csv",
+        f"{output_dir}/segment_%03d{source.suffix}",
+    ]
+
+    with utils.get_progress_bar() as progress:
+        progress.add_task("[green]Splitting video into segments...", total=None)
+        cli.execute_commands(command_array=cli_command_array)
+
+    segments: List[Tuple[Path, float]] = []
+    with open(segment_list, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            # segment file name, start time, end time
+            segment_name, start_time, _ = line.strip().split(",")
+            segments.append((output_dir / segment_name, float(start_time)))
+
+    return segments
+
+
+def concat_videos(sources: List[Path], target: Path) -> None:
+    """
+    Concatenates videos with the same encoding parameters, without re-encoding.
+
+    Args:
+        sources (List[Path]): The videos to concatenate, in order.
+        target (Path): The path to the output video file.
+
+    Returns:
+        None
+    """
+    concat_list = target.parent / f"{target.stem}_concat.txt"
+    with open(concat_list, "w", encoding="utf-8") as f:
+        for source in sources:
+            f.write(f"file '{source}'\n")
+
+    cli_command_array = [
+        "ffmpeg",
+        "-y",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        concat_list,
+        "-c",
+        "copy",
+        target,
+    ]
+
+    with utils.get_progress_bar() as progress:
+        progress.add_task("[green]Concatenating videos...", total=None)
+        cli.execute_commands(command_array=cli_command_array)
+
+    concat_list.unlink()
+
+
+def extract_frame_at(
+    video_file: Path, timestamp: float, width: int, height: int
+) -> Optional[np.ndarray]:
+    """
+    Decodes a single frame at the given timestamp, without writing it to disk.
+
+    Seeks with '-ss' before the input, so only the frames from the nearest
+    keyframe onwards are decoded.
+
+    Args:
+        video_file (Path): The path to the video file.
+        timestamp (float): The timestamp of the frame, in seconds.
+        width (int): The width of the video.
+        height (int): The height of the video.
+
+    Returns:
+        Optional[np.ndarray]: The frame as a (height, width, 3) BGR array,
+            or None if the frame could not be decoded.
+    """
+    command_array = [
+        "ffmpeg",
+        "-v",
+        "error",
+        "-ss",
+        f"{timestamp:.3f}",
+        "-i",
+        str(video_file),
+        "-frames:v",
+        "1",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "bgr24",
+        "pipe:1",
+    ]
+
+    result = subprocess.run(
+        command_array, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
+    )
+
+    frame_size = width * height * 3
+    if result.returncode != 0 or len(result.stdout) < frame_size:
+        logger.warning(f"Unable to extract frame at {timestamp:.3f}s from {video_file}")
+        return None
+
+    frame = np.frombuffer(result.stdout[:frame_size], dtype=np.uint8)
+    return frame.reshape((height, width, 3))
+
+
+def sample_frames(
+    video_file: Path,
+    video_duration: float,
+    num_frames: int = 10,
+) -> np.ndarray:
+    """
+    Samples frames evenly spaced across a video, into a NumPy stack.
+
+    Each frame is decoded by its own ffmpeg process, seeking directly to
+    the middle of its interval, so the run time does not depend on the
+    length of the video.
+
+    Args:
+        video_file (Path): The path to the video file.
+        video_duration (float): The duration of the video in seconds.
+        num_frames (int, optional): The number of frames to sample. Defaults to 10.
+
+    Returns:
+        np.ndarray: The frames as a (num_frames, height, width, 3) BGR array.
+            Frames that could not be decoded are left out.
+    """
+    logger.info("[green]Sampling frames from video...", extra={"markup": True})
+    width, height = get_video_dimensions(video_file=video_file)
+
+    interval = video_duration / num_frames
+    timestamps = [interval * (idx + 0.5) for idx in range(num_frames)]
+
+    with ThreadPoolExecutor(max_workers=num_frames) as executor:
+        frames = list(
+            executor.map(
+                lambda timestamp: extract_frame_at(
+                    video_file=video_file,
+                    timestamp=timestamp,
+                    width=width,
+                    height=height,
+                ),
+                timestamps,
+            )
+        )
+
+    decoded_frames = [frame for frame in frames if frame is not None]
+    if not decoded_frames:
+        return np.empty((0, height, width, 3), dtype=np.uint8)
+
+    return np.stack(decoded_frames)
+
+
 def crop_video(
     source: Path,
     target: Path,
@@ -130,18 +428,89 @@ def crop_video(
         progress.remove_task(task)
 
 
+def crop_video_multi(
+    source: Path,
+    targets: List[Tuple[Path, str]],
+    remove_audio: bool = True,
+    progress: Optional[Progress] = None,
+) -> None:
+    """
+    Crop several regions of a video stream in a single FFmpeg run.
+
+    The source is decoded once, and split into one crop branch per target
+    using 'filter_complex'.
+
+    Args:
+        source (Path): The path to the input video file.
+        targets (List[Tuple[Path, str]]): The output video files, with their
+            crop parameters in the format "out_w:out_h:x:y".
+        remove_audio (bool, optional): Whether to drop the audio stream. Defaults to True.
+        progress (Optional[Progress], optional): Progress bar to use. Defaults to None.
+
+    Returns:
+        None
+    """
+    branches = "".join(f"[v{idx}]" for idx in range(len(targets)))
+    filters = [f"[0:v]split={len(targets)}{branches}"]
+    for idx, (_, crop_params) in enumerate(targets):
+        filters.append(f"[v{idx}]crop={crop_params}[out{idx}]")
+
+    cli_command_array = [
+        "ffmpeg",
+        "-y",  # overwrite output files if they exist
+        "-i",
+        source,
+        "-filter_complex",
+        ";".join(filters),
+    ]
+
+    for idx, (target, _) in enumerate(targets):
+        cli_command_array += ["-map", f"[out{idx}]"]
+        if remove_audio:
+            cli_command_array += ["-an"]
+        else:
+            # copy audio stream
+            cli_command_array += ["-map", "0:a?", "-c:a", "copy"]
+        cli_command_array += [target]
+
+    def _on_fail() -> None:
+        logger.error(f"Failed to crop video streams from {source}")
+        sys.exit(1)
+
+    if progress is None:
+        progress = utils.get_progress_bar()
+
+    with progress:
+        logger.debug(f"Cropping {len(targets)} video streams from {source}")
+        task = progress.add_task("[green]Cropping video streams...", total=None)
+        cli.execute_commands(
+            command_array=cli_command_array,
+            on_fail=_on_fail,
+        )
+
+        # end task
+        progress.remove_task(task)
+
+
 def images_to_vid(
     image_dir: Path,
     output_file: Path,
     frame_rate: int = 25,
-    images_pattern: str = "frame_det_00_%06d.bmp",
+    images_glob: str = "*.bmp",
+    padding: int = 0,
 ) -> None:
     """
     Convert a sequence of images to a video using FFmpeg.
 
+    Images are read in name order, and optionally padded with a black border
+    by the 'pad' filter, so no padded copies of the images are needed.
+
     Args:
         image_dir (Path): The directory containing the images.
         output_file (Path): The path to the output video file.
+        frame_rate (int, optional): The frame rate of the video. Defaults to 25.
+        images_glob (str, optional): Pattern matching the images. Defaults to "*.bmp".
+        padding (int, optional): Border to add on all sides, in pixels. Defaults to 0.
 
     Returns:
         None
@@ -152,8 +521,19 @@ def images_to_vid(
         "-y",  # overwrite output file if it exists
         "-framerate",
         str(frame_rate),
+        "-pattern_type",
+        "glob",
         "-i",
-        f"{image_dir}/{images_pattern}",
+        f"{image_dir}/{images_glob}",
+    ]
+
+    if padding > 0:
+        cli_command_array += [
+            "-vf",
+            f"pad=iw+{2 * padding}:ih+{2 * padding}:{padding}:{padding}:color=black",
+        ]
+
+    cli_command_array += [
         "-c:v",
         "libx264",
         "-pix_fmt",
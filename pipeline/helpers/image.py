@@ -4,7 +4,7 @@ Provides helper functions for image processing.
 
 import math
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional
 
 import cv2
 import numpy as np
@@ -65,6 +65,16 @@ def get_black_bars_height(image_file: Path) -> float:
     image = cv2.imread(str(image_file))
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
+    return get_gray_black_bars_height(gray=gray)
+
+
+def get_gray_black_bars_height(gray: np.ndarray) -> float:
+    """
+    Gets the height of the black bars in a grayscale image.
+
+    Args:
+        gray (np.ndarray): The image as a (height, width) grayscale array.
+    """
     # apply threshold to invert the image
     _, thresh = cv2.threshold(gray, 3, 255, cv2.THRESH_BINARY_INV)
 
@@ -97,6 +107,70 @@ def get_black_bars_height(image_file: Path) -> float:
         return height
 
 
+def to_grayscale_stack(frames: np.ndarray) -> np.ndarray:
+    """
+    Converts a stack of BGR frames to grayscale.
+
+    Args:
+        frames (np.ndarray): The frames as a (n, height, width, 3) BGR array.
+
+    Returns:
+        np.ndarray: The frames as a (n, height, width) grayscale array.
+    """
+    if len(frames) == 0:
+        return np.empty(frames.shape[:3], dtype=np.uint8)
+
+    return np.stack([cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in frames])
+
+
+def check_if_frames_have_black_bars(
+    gray_frames: np.ndarray, bars_height: float = 0.2, threshold: float = 0.8
+) -> np.ndarray:
+    """
+    Checks which frames of a stack have black bars.
+
+    Vectorised equivalent of check_if_image_has_black_bars.
+
+    Args:
+        gray_frames (np.ndarray): The frames as a (n, height, width) grayscale array.
+        bars_height (float, optional): Height of the top and bottom bars. Defaults to 0.2.
+        threshold (float, optional): Ratio of black pixels above which a frame
+            has black bars. Defaults to 0.8.
+
+    Returns:
+        np.ndarray: A boolean array, True for the frames with black bars.
+    """
+    _, height, width = gray_frames.shape
+
+    bar_height = int(height * bars_height)
+    top_pixels = gray_frames[:, 0:bar_height, :]
+    bottom_pixels = gray_frames[:, height - bar_height : height, :]
+
+    total_black_pixels = np.count_nonzero(top_pixels == 0, axis=(1, 2))
+    total_black_pixels += np.count_nonzero(bottom_pixels == 0, axis=(1, 2))
+    total_pixels = width * bar_height * 2
+
+    return total_black_pixels / total_pixels > threshold
+
+
+def get_black_bars_heights(gray_frames: np.ndarray) -> np.ndarray:
+    """
+    Gets the height of the black bars for each frame of a stack.
+
+    Same contour based estimate as get_black_bars_height, on frames that
+    are already decoded and converted to grayscale.
+
+    Args:
+        gray_frames (np.ndarray): The frames as a (n, height, width) grayscale array.
+
+    Returns:
+        np.ndarray: The black bar height of each frame.
+    """
+    heights = [get_gray_black_bars_height(gray=gray) for gray in gray_frames]
+
+    return np.asarray(heights, dtype=int)
+
+
 def get_frame_by_number(
     video_path: Path,
     frame_number: int,
@@ -172,6 +246,84 @@ def get_frames_by_numbers(
     return frame_paths
 
 
+def read_frames_by_numbers(
+    video_path: Path,
+    frame_numbers: Iterable[int],
+    max_grab_frames: int = 250,
+) -> Dict[int, np.ndarray]:
+    """
+    Reads frames from a video by frame numbers, in a single pass.
+
+    The video is opened once, and frames are read in frame order. Frames
+    between requested frames are skipped with 'grab', unless the gap is large,
+    in which case the video is seeked instead.
+
+    Args:
+        video_path (Path): The path to the video.
+        frame_numbers (Iterable[int]): The frame numbers to read (1-indexed).
+        max_grab_frames (int, optional): The largest gap to skip by grabbing
+            frames, instead of seeking. Defaults to 250.
+
+    Returns:
+        Dict[int, np.ndarray]: The frames (BGR), by frame number. Frame numbers
+            that are out of range, or could not be read, are omitted.
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    frames: Dict[int, np.ndarray] = {}
+    next_frame = 1  # Frame number that the next read returns
+    for frame_number in sorted(set(frame_numbers)):
+        if frame_number < 1 or frame_number > total_frames:
+            continue
+
+        gap = frame_number - next_frame
+        if gap > max_grab_frames:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number - 1)
+        else:
+            for _ in range(gap):
+                cap.grab()
+
+        ret, frame = cap.read()
+        next_frame = frame_number + 1
+        if ret:
+            frames[frame_number] = frame
+
+    cap.release()
+
+    return frames
+
+
+def draw_bars_over_frame(
+    frame: np.ndarray,
+    start_h: float = 0.1,
+    end_h: float = 0.4,
+    bar_color: Tuple[int, int, int] = (0, 0, 0),
+) -> np.ndarray:
+    """
+    Sets a horizontal band of a frame to a solid color.
+
+    Args:
+        frame (np.ndarray): The frame (BGR). Modified in place.
+        start_h (float, optional): The starting height ratio of the band.
+            Defaults to 0.1.
+        end_h (float, optional): The ending height ratio of the band.
+            Defaults to 0.4.
+        bar_color (Tuple[int, int, int], optional): The color of the band.
+            Defaults to (0, 0, 0), which is black.
+
+    Returns:
+        np.ndarray: The frame.
+    """
+    height = frame.shape[0]
+
+    start_row = int(height * start_h)
+    end_row = int(height * end_h)
+    frame[start_row:end_row, :] = bar_color
+
+    return frame
+
+
 def draw_bars_over_image(
     source_image: Path,
     dest_image: Path,
@@ -195,13 +347,9 @@ def draw_bars_over_image(
     # Read the image
     img = cv2.imread(str(source_image))
 
-    # Get the image dimensions (OpenCV stores image data as NumPy ndarray)
-    height, _, _ = img.shape  # height, width, channels
-
-    # Set all pixels between start_row and end_row to black
-    start_row = int(height * start_h)
-    end_row = int(height * end_h)
-    img[start_row:end_row, :] = bar_color
+    img = draw_bars_over_frame(
+        frame=img, start_h=start_h, end_h=end_h, bar_color=bar_color
+    )
 
     # Save the cropped image
     cv2.imwrite(str(dest_image), img)
@@ -220,12 +368,26 @@ def blur_image(source_image: Path, dest_image: Path, blur_kernel_size: int = 15)
     img = cv2.imread(source_image)
 
     # Blur the image
-    img = cv2.blur(img, (blur_kernel_size, blur_kernel_size))
+    img = blur_frame(frame=img, blur_kernel_size=blur_kernel_size)
 
     # Save the blurred image
     cv2.imwrite(dest_image, img)
 
 
+def blur_frame(frame: np.ndarray, blur_kernel_size: int = 15) -> np.ndarray:
+    """
+    Blurs a frame.
+
+    Args:
+        frame (np.ndarray): The frame (BGR).
+        blur_kernel_size (int, optional): The size of the blur kernel. Defaults to 15.
+
+    Returns:
+        np.ndarray: The blurred frame.
+    """
+    return cv2.blur(frame, (blur_kernel_size, blur_kernel_size))
+
+
 def pad_image(
     source_image: Path,
     dest_image: Path,
@@ -286,17 +448,46 @@ def filter_by_range(
     """
     img = cv2.imread(str(source_image))
 
+    result = filter_frame_by_range(
+        frame=img,
+        lower_bound=lower_bound,
+        upper_bound=upper_bound,
+        background_color=background_color,
+    )
+
+    # Save the result
+    cv2.imwrite(str(dest_image), result)
+
+
+def filter_frame_by_range(
+    frame: np.ndarray,
+    lower_bound: Tuple[int, int, int] = (50, 180, 70),
+    upper_bound: Tuple[int, int, int] = (180, 255, 255),
+    background_color: Tuple[int, int, int] = (255, 255, 255),
+) -> np.ndarray:
+    """
+    Keeps only the pixels of a frame within an HSV color range.
+
+    Args:
+        frame (np.ndarray): The frame (BGR).
+        lower_bound (Tuple[int, int, int]): The lower bound of the color range.
+        upper_bound (Tuple[int, int, int]): The upper bound of the color range.
+        background_color (Tuple[int, int, int], optional): The color to use for the background.
+            Defaults to (255, 255, 255).
+
+    Returns:
+        np.ndarray: The filtered frame.
+    """
     # Convert the image to HSV
-    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
 
     # Create a mask for the color
     mask = cv2.inRange(hsv, lower_bound, upper_bound)
 
     # Use only the mask to select the color
-    result = cv2.bitwise_and(img, img, mask=mask)
+    result = cv2.bitwise_and(frame, frame, mask=mask)
 
     # Make all other pixels white (instead of black)
-    result[np.where((result == [0, 0, 0]).all(axis=2))] = background_color
+    result[(result == 0).all(axis=2)] = background_color
 
-    # Save the result
-    cv2.imwrite(str(dest_image), result)
+    return result
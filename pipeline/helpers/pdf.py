@@ -2,11 +2,17 @@
 Helper functions for drawing on PDF canvases
 """
 
+import functools
+import hashlib
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 
+import numpy as np
+from PIL import Image
 from reportlab.graphics import renderPDF
+from reportlab.graphics.shapes import Drawing
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.pdfgen import canvas
 from svglib.svglib import svg2rlg
@@ -19,6 +25,51 @@ cw = w / iw
 ch = h / ih
 
 
+def get_form_name(*parts: object) -> str:
+    """
+    Returns a valid Form XObject name, unique to the given parts.
+    """
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f"static{digest}"
+
+
+def draw_form(
+    canvas: canvas.Canvas, form_name: str, draw: Callable[[canvas.Canvas], None]
+):
+    """
+    Draw static artwork as a Form XObject.
+
+    The artwork is drawn (in page coordinates) into the form the first time
+    it is used in a document. Later pages only reference the form, so the
+    artwork is neither drawn again nor duplicated in the PDF.
+
+    Args:
+        canvas (canvas.Canvas): The PDF canvas to draw on.
+        form_name (str): Name of the form, unique to the artwork and its position.
+        draw (Callable[[canvas.Canvas], None]): Draws the artwork on a canvas.
+    """
+    if not canvas.hasForm(form_name):
+        canvas.beginForm(form_name)
+        draw(canvas)
+        canvas.endForm()
+
+    canvas.doForm(form_name)
+
+
+@functools.lru_cache(maxsize=None)
+def load_svg(svg_path: Path) -> Optional[Drawing]:
+    """
+    Parse an SVG image, once per process.
+
+    Args:
+        svg_path (Path): The path to the SVG image file.
+
+    Returns:
+        Optional[Drawing]: The drawing, or None if the file could not be parsed.
+    """
+    return svg2rlg(svg_path)
+
+
 def draw_svg(
     canvas: canvas.Canvas,
     svg_path: Path,
@@ -30,6 +81,9 @@ def draw_svg(
     """
     Draw an SVG image onto a PDF canvas.
 
+    The image is drawn as a Form XObject, shared by all pages of the document
+    that draw it with the same position and size.
+
     Args:
         canvas (canvas.Canvas): The PDF canvas to draw on.
         svg_path (Path): The path to the SVG image file.
@@ -38,17 +92,24 @@ def draw_svg(
         width (float): The width of the image.
         height (float): The height of the image.
     """
-    drawing = svg2rlg(svg_path)
+    drawing = load_svg(svg_path)
 
     if drawing is None:
         return
 
-    xL, yL, xH, yH = drawing.getBounds()  # type: ignore
+    def draw(form_canvas):
+        xL, yL, xH, yH = drawing.getBounds()  # type: ignore
 
-    drawing.renderScale = cw * width / (xH - xL)
-    drawing.renderScale = ch * height / (yH - yL)
+        drawing.renderScale = cw * width / (xH - xL)
+        drawing.renderScale = ch * height / (yH - yL)
 
-    renderPDF.draw(drawing, canvas, x * cw, h - y * ch)
+        renderPDF.draw(drawing, form_canvas, x * cw, h - y * ch)
+
+    draw_form(
+        canvas,
+        form_name=get_form_name(str(svg_path), x, y, width, height),
+        draw=draw,
+    )
 
 
 def draw_image(
@@ -73,6 +134,29 @@ def draw_image(
     canvas.drawImage(image_path, x * cw, h - y * ch, width * cw, height * ch)
 
 
+def draw_image_array(
+    canvas: canvas.Canvas,
+    img: np.ndarray,
+    x: float,
+    y: float,
+    width: float,
+    height: float,
+):
+    """
+    Draw an in-memory image on the canvas.
+
+    Args:
+        canvas (canvas.Canvas): The canvas to draw on.
+        img (np.ndarray): The image, as a BGR array (OpenCV).
+        x (float): The x-coordinate of the lower-left corner of the image.
+        y (float): The y-coordinate of the lower-left corner of the image.
+        width (float): The width of the image.
+        height (float): The height of the image.
+    """
+    rgb_img = Image.fromarray(np.ascontiguousarray(img[:, :, ::-1]))
+    canvas.drawImage(ImageReader(rgb_img), x * cw, h - y * ch, width * cw, height * ch)
+
+
 def draw_text(
     canvas: canvas.Canvas,
     text: str,
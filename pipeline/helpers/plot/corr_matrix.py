@@ -3,7 +3,7 @@ Plot the correlation matrix
 """
 
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
@@ -15,6 +15,7 @@ from pipeline import core
 from pipeline.helpers import dpdash
 from pipeline.models.interview_roles import InterviewRole
 from pipeline.models.lite.heatmap_config import HeatmapConfig
+from pipeline.models.lite.report_context import ReportContext
 
 
 def combine_matrices(df_bottom: pd.DataFrame, df_top: pd.DataFrame) -> np.ndarray:
@@ -104,6 +105,7 @@ def plot_correrlation_matrix(
 
     # Save the plot
     plt.savefig(output_path, bbox_inches="tight", pad_inches=0)
+    plt.close()
 
 
 def generate_correlation_matric(
@@ -115,6 +117,7 @@ def generate_correlation_matric(
     config_file_path: str,
     au_cols: List[str],
     data_path: Path,
+    report_context: Optional[ReportContext] = None,
 ) -> None:
     """
     Generates a correlation matrix for the given interview, and saves the plot to the specified
@@ -129,6 +132,8 @@ def generate_correlation_matric(
         config_file_path (str): The path to the configuration file.
         au_cols (List[str]): The columns to use for the correlation matrix.
         data_path (Path): The path to the data directory.
+        report_context (Optional[ReportContext]): Features already loaded for
+            the report. Defaults to None (fetch them from the database).
 
     Returns:
         None
@@ -137,32 +142,41 @@ def generate_correlation_matric(
     subject_id = dpdash_dict["subject"]
     study_id = dpdash_dict["study"]
 
-    of_fau_session = core.fetch_openface_features(
-        interview_name=interview_name,
-        subject_id=subject_id,
-        study_id=study_id,
-        role=role,
-        cols=au_cols,
-        config_file=config_file_path,
-    )
+    if report_context is not None:
+        of_fau_session = report_context.get_session_features(role=role, cols=au_cols)
+    else:
+        of_fau_session = core.fetch_openface_features(
+            interview_name=interview_name,
+            subject_id=subject_id,
+            study_id=study_id,
+            role=role,
+            cols=au_cols,
+            config_file=Path(config_file_path),
+        )
 
     match role:
         case InterviewRole.SUBJECT:
-            of_fau_dist = core.fetch_openface_subject_distribution(
-                subject_id=subject_id,
-                cols=au_cols,
-                config_file=config_file_path,
+            # Derived from the subject's sufficient statistics, instead of
+            # reading all of the subject's frames
+            if report_context is not None:
+                subject_stats = report_context.subject_stats
+            else:
+                subject_stats = core.get_openface_subject_stats(
+                    subject_id=subject_id, config_file=Path(config_file_path)
+                )
+            corr_matrix_dist = core.get_subject_stats_correlation(
+                subject_stats=subject_stats, cols=au_cols
             )
         case InterviewRole.INTERVIEWER:
             of_int_fau_dist_path = data_path / "correlation_matrix_int.csv"
             if not of_int_fau_dist_path.exists():
                 raise FileNotFoundError(f"File not found: {of_int_fau_dist_path}")
             of_fau_dist = pd.read_csv(of_int_fau_dist_path)
+            corr_matrix_dist = of_fau_dist.corr(method="pearson")
         case _:
             raise ValueError(f"Invalid role: {role}")
 
     corr_matrix_session = of_fau_session.corr(method="pearson")
-    corr_matrix_dist = of_fau_dist.corr(method="pearson")
 
     matrix = combine_matrices(df_top=corr_matrix_dist, df_bottom=corr_matrix_session)
 
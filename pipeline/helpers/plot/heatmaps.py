@@ -1,19 +1,194 @@
 """
 Plotting helper functions for creating heatmaps.
+
+Heatmaps are small grids of colored cells, so they are rasterized directly
+with NumPy instead of going through a matplotlib figure. The layout mirrors
+a square-celled seaborn heatmap on a figure of the same size: cell borders
+of 'linewidth' points, and white gaps of 'gap_size' points painted over the
+cells, centered on cell boundaries (as axvline / axhline drew them).
+
+The tiles approximate the seaborn figure, they are not pixel-identical to it:
+the axes size comes from matplotlib's default subplot params
+(AXES_*_FRACTION), cell edges fall on fractional pixels and are rounded, and
+borders and gaps are not anti-aliased. pipeline/tests/test_heatmaps.py checks
+the tiles against seaborn renderings, within its documented tolerances.
 """
 
-from typing import List
+from typing import Iterable, List, Optional, Tuple
 
+import cv2
 import matplotlib as mpl
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
-import seaborn as sns
 
 from pipeline.models.lite.heatmap_config import HeatmapConfig
 
+# Resolution of the rendered tiles (matplotlib's default figure DPI)
+DPI = 100
+# Fraction of the figure used by the axes (matplotlib's default subplot params)
+AXES_WIDTH_FRACTION = 0.9 - 0.125
+AXES_HEIGHT_FRACTION = 0.88 - 0.11
+# Color of cell borders and gaps
+GAP_COLOR = 255
+
+
+def points_to_pixels(points: float) -> int:
+    """
+    Converts a length in points to pixels, at least 1 pixel for non-zero lengths.
+
+    Args:
+        points (float): Length in points.
+
+    Returns:
+        int: Length in pixels.
+    """
+    if points <= 0:
+        return 0
+    return max(1, round(points * DPI / 72))
+
+
+def get_boundaries(indices: Iterable[int], cell_size: float) -> np.ndarray:
+    """
+    Returns the pixel positions of cell boundaries.
+
+    Args:
+        indices (Iterable[int]): Indices of the cells the boundaries are before.
+        cell_size (float): Size of a cell, in pixels.
+
+    Returns:
+        np.ndarray: The pixel positions.
+    """
+    return np.round(np.asarray(list(indices), dtype=float) * cell_size).astype(int)
+
+
+def paint_lines(
+    tile: np.ndarray, positions: np.ndarray, line_px: int, axis: int
+) -> None:
+    """
+    Paints lines over a tile, in place, centered on pixel positions.
+
+    Args:
+        tile (np.ndarray): The RGB image.
+        positions (np.ndarray): Pixel positions of the line centers.
+        line_px (int): Width of the lines, in pixels.
+        axis (int): 0 for horizontal lines (rows), 1 for vertical lines (columns).
+    """
+    if line_px <= 0 or len(positions) == 0:
+        return
+
+    offsets = np.arange(line_px) - line_px // 2
+    indices = (np.asarray(positions)[:, None] + offsets).ravel()
+    indices = indices[(indices >= 0) & (indices < tile.shape[axis])]
+
+    if axis == 0:
+        tile[indices, :] = GAP_COLOR
+    else:
+        tile[:, indices] = GAP_COLOR
+
+
+def get_colormap(name: str) -> mpl.colors.Colormap:
+    """
+    Returns a colormap that shows missing and out of range values in gray.
+
+    Args:
+        name (str): Name of the matplotlib colormap.
+
+    Returns:
+        mpl.colors.Colormap: The colormap.
+    """
+    cmap: mpl.colors.Colormap = mpl.colormaps[name]  # type: ignore
+    cmap.set_under("gray")
+    cmap.set_over("gray")
+    cmap.set_bad("gray")
+
+    return cmap
+
+
+def render_heatmap(
+    matrix: np.ndarray,
+    cmap: mpl.colors.Colormap,
+    heatmap_config: HeatmapConfig,
+    figsize: Tuple[float, float],
+    h_gap_idx: Optional[List[int]] = None,
+) -> np.ndarray:
+    """
+    Rasterizes a matrix as a heatmap tile.
+
+    Values are scaled between the minimum and maximum of the matrix, and
+    NaN values are shown with the colormap's 'bad' color.
+
+    The tile approximates a square-celled seaborn heatmap of the same figsize,
+    it is not an exact match: it can differ by up to 2 pixels in size, and in
+    the pixels along cell borders and gaps (rounded to whole pixels, without
+    anti-aliasing).
+
+    Args:
+        matrix (np.ndarray): The values, with one row per feature and one column per bin.
+        cmap (mpl.colors.Colormap): The colormap.
+        heatmap_config (HeatmapConfig): The configuration for the heatmap.
+        figsize (Tuple[float, float]): The size of the equivalent matplotlib figure.
+        h_gap_idx (Optional[List[int]]): Rows to add a horizontal gap before.
+
+    Returns:
+        np.ndarray: The tile, as an RGB image.
+    """
+    num_rows, num_bins = matrix.shape
+
+    # Scale to [0, 1], like seaborn does when vmin / vmax are not set
+    with np.errstate(invalid="ignore"):
+        vmin = np.nanmin(matrix) if not np.isnan(matrix).all() else 0.0
+        vmax = np.nanmax(matrix) if not np.isnan(matrix).all() else 1.0
+        scale = vmax - vmin if vmax != vmin else 1.0
+        scaled = (matrix - vmin) / scale
+
+    colors = (cmap(scaled)[:, :, :3] * 255).round().astype(np.uint8)
+
+    # Square cells, as large as fit in the axes. The tile has the size of the
+    # axes, so cells are a fractional number of pixels wide.
+    cell_size = min(
+        figsize[0] * DPI * AXES_WIDTH_FRACTION / num_bins,
+        figsize[1] * DPI * AXES_HEIGHT_FRACTION / num_rows,
+    )
+    height = max(1, round(num_rows * cell_size))
+    width = max(1, round(num_bins * cell_size))
+
+    # Map each pixel center to the cell it falls in
+    row_idx = np.minimum((np.arange(height) + 0.5) // cell_size, num_rows - 1)
+    col_idx = np.minimum((np.arange(width) + 0.5) // cell_size, num_bins - 1)
+    tile = colors[row_idx.astype(int)][:, col_idx.astype(int)]
+
+    # Cell borders, on every cell boundary
+    line_px = points_to_pixels(heatmap_config.linewidth)
+    paint_lines(tile, get_boundaries(range(num_rows + 1), cell_size), line_px, axis=0)
+    paint_lines(tile, get_boundaries(range(num_bins + 1), cell_size), line_px, axis=1)
+
+    gap_px = points_to_pixels(heatmap_config.gap_size)
+
+    # Vertical gaps, every 'bins_per_v_gap' bins
+    v_gap_bins = range(0, num_bins, heatmap_config.bins_per_v_gap)
+    paint_lines(tile, get_boundaries(v_gap_bins, cell_size), gap_px, axis=1)
+
+    # Horizontal gaps, between groups of features
+    if h_gap_idx:
+        h_gap_rows = [i for i in h_gap_idx if 0 <= i <= num_rows]
+        paint_lines(tile, get_boundaries(h_gap_rows, cell_size), gap_px, axis=0)
+
+    return tile
+
+
+def save_tile(tile: np.ndarray, output_path: str) -> None:
+    """
+    Saves an RGB tile as an image.
+
+    Args:
+        tile (np.ndarray): The RGB image.
+        output_path (str): The path to save the image to.
+    """
+    cv2.imwrite(str(output_path), cv2.cvtColor(tile, cv2.COLOR_RGB2BGR))
+
 
 def make_heatmap(
-    df: pd.DataFrame,
+    bin_means: pd.DataFrame,
     num_bins: int,
     cols: List[str],
     output_path: str,
@@ -24,21 +199,18 @@ def make_heatmap(
     Create a heatmap based on the given dataframe and configuration.
 
     Args:
-        df (pd.DataFrame): The input dataframe.
+        bin_means (pd.DataFrame): The mean of each column, indexed by bin.
+            Bins without data are shown in gray.
         num_bins (int): The number of bins.
         cols (List[str]): The columns to include in the heatmap.
         output_path (str): The path to save the heatmap image.
         heatmap_config (HeatmapConfig): The configuration for the heatmap.
-        figsize (tuple, optional): The size of the figure. Defaults to (10, 8).
+        figsize (tuple, optional): The size of the equivalent figure, which sets
+            the size of the cells. Defaults to (10, 8).
     """
 
-    # Create a new dataframe for Head Pose Heatmap data
-    df_heatmap = pd.DataFrame(columns=["bin"] + cols)
-
-    # Calculate the mean of each bin
-    for i in range(num_bins):
-        df_bin = df[df["bin"] == i]
-        df_heatmap.loc[i] = [i] + [df_bin[col].mean() for col in cols]  # type: ignore
+    # One row per bin, NaN for bins without data
+    df_heatmap = bin_means[cols].reindex(range(num_bins)).astype(float)
 
     # Normalize the data
     df_heatmap_norm = df_heatmap.copy()
@@ -46,43 +218,17 @@ def make_heatmap(
         lambda x: (x - x.min()) / (x.max() - x.min())
     )
 
-    # Setup Color Map
-    cmap: mpl.colors.Colormap = mpl.colormaps["PRGn"]  # type: ignore
-    cmap.set_under("gray")
-    cmap.set_over("gray")
-    cmap.set_bad("gray")
-
-    # Create a heatmap using the normalized data
-    plt.figure(figsize=figsize)
-    ax = sns.heatmap(
-        df_heatmap_norm[cols].T,
-        cmap=cmap,
-        cbar=False,
-        square=True,
-        linewidths=heatmap_config.linewidth,  # type: ignore
+    tile = render_heatmap(
+        matrix=df_heatmap_norm[cols].T.to_numpy(),
+        cmap=get_colormap("PRGn"),
+        heatmap_config=heatmap_config,
+        figsize=figsize,
     )
-
-    # No Labels
-    plt.xticks([])
-    plt.yticks([])
-
-    # add space between cells
-    for i in range(num_bins):
-        if i % heatmap_config.bins_per_v_gap == 0:
-            ax.axvline(i, color="white", lw=heatmap_config.gap_size)
-
-    # Make each cell square
-    plt.gca().set_aspect("equal", adjustable="box")
-
-    # Save the figure
-    plt.savefig(output_path, bbox_inches="tight", pad_inches=0)
-
-    # close the figure
-    plt.close()
+    save_tile(tile=tile, output_path=output_path)
 
 
 def make_standard_deviation_heatmap(
-    df: pd.DataFrame,
+    bin_means: pd.DataFrame,
     fau_avgs: pd.Series,
     fau_stds: pd.Series,
     num_bins: int,
@@ -98,7 +244,7 @@ def make_standard_deviation_heatmap(
     Creates a standard deviation heatmap based on the given data.
 
     Args:
-        df (pd.DataFrame): The input DataFrame containing the data.
+        bin_means (pd.DataFrame): The mean of each column, indexed by bin.
         fau_avgs (pd.Series): The average values for each feature.
         fau_stds (pd.Series): The standard deviation values for each feature.
         num_bins (int): The number of bins for the heatmap.
@@ -107,28 +253,21 @@ def make_standard_deviation_heatmap(
         output_path (str): The path to save the generated heatmap image.
         heatmap_config (HeatmapConfig): The configuration object for the heatmap.
         h_gap_idx (List[int]): The list of indices to add horizontal gaps in the heatmap.
-        figsize (tuple, optional): The size of the figure. Defaults to (20, 7).
+        figsize (tuple, optional): The size of the equivalent figure, which sets
+            the size of the cells. Defaults to (20, 7).
         normalize (bool, optional): Flag indicating whether to normalize the data. Defaults to True.
     """
-    df_heatmap = pd.DataFrame(columns=["bin"] + features)
-
-    for i in range(num_bins):
-        df_bin = df[df["bin"] == i]
-        for col, feature in zip(cols, features):
-            df_heatmap.loc[i, "bin"] = i
-            df_heatmap.loc[i, feature] = df_bin[col].mean()
-
-            # Scale each bin to be with 3 standard deviations of the distribution
-            dist_mean = fau_avgs[col]
-            dist_std = fau_stds[col]
-
-            max_val = dist_mean + (3 * dist_std)
-            min_val = dist_mean - (3 * dist_std)
-
-            if df_heatmap.loc[i, feature] > max_val:
-                df_heatmap.loc[i, feature] = max_val
-            elif df_heatmap.loc[i, feature] < min_val:
-                df_heatmap.loc[i, feature] = min_val
+    df_heatmap = bin_means[cols].reindex(range(num_bins)).astype(float)
+
+    # Scale each bin to be with 3 standard deviations of the distribution
+    dist_means = fau_avgs[cols].astype(float)
+    dist_stds = fau_stds[cols].astype(float)
+    df_heatmap = df_heatmap.clip(
+        lower=dist_means - (3 * dist_stds),
+        upper=dist_means + (3 * dist_stds),
+        axis=1,
+    )
+    df_heatmap.columns = features
 
     # Normalize the data if normalize is True
     if normalize:
@@ -138,40 +277,11 @@ def make_standard_deviation_heatmap(
             )
         )
 
-    # Setup Color Map
-    cmap: mpl.colors.Colormap = mpl.colormaps["bwr"]  # type: ignore
-    # cmap = cm.get_cmap('bwr')   # Deprecated
-    cmap.set_under("gray")
-    cmap.set_over("gray")
-
-    # Show grey boxes for NaN or no data
-    cmap.set_bad("gray")
-
-    # Create a heatmap using the data, matplotlib
-    plt.figure(figsize=figsize)
-    ax = sns.heatmap(
-        df_heatmap[features].T.astype(float),
-        cmap=cmap,
-        cbar=False,
-        square=True,
-        linewidths=heatmap_config.linewidth,  # type: ignore
+    tile = render_heatmap(
+        matrix=df_heatmap[features].T.to_numpy(dtype=float),
+        cmap=get_colormap("bwr"),
+        heatmap_config=heatmap_config,
+        figsize=figsize,
+        h_gap_idx=h_gap_idx,
     )
-
-    # Hide all labels
-    plt.xticks([])
-    plt.yticks([])
-
-    # add space between cells
-    for i in range(num_bins):
-        if i % heatmap_config.bins_per_v_gap == 0:
-            ax.axvline(i, color="white", lw=heatmap_config.gap_size)
-
-    # add horizontal lines to separate features
-    for i in h_gap_idx:
-        ax.axhline(i, color="white", lw=heatmap_config.gap_size)
-
-    # Save the figure
-    plt.savefig(output_path, bbox_inches="tight", pad_inches=0)
-
-    # close the figure
-    plt.close()
+    save_tile(tile=tile, output_path=output_path)
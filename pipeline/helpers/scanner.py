@@ -0,0 +1,220 @@
+"""
+Parallel directory scanner, for network-mounted (NFS / Lustre) data roots.
+
+Walking a tree on a network file system is dominated by the latency of each
+metadata call, not by bandwidth. The scanner issues the calls for many
+directories concurrently, in a bounded thread pool, using os.scandir.
+DirEntry objects carry the entry type from the directory listing itself,
+so telling files from directories does not cost an extra stat call.
+"""
+
+import fnmatch
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pipeline.helpers import utils
+
+logger = logging.getLogger(__name__)
+
+
+class ScanStats:
+    """
+    Counts the directories listed and the entries (or paths) returned by a scan,
+    to report its throughput.
+    """
+
+    def __init__(self):
+        self.dirs_count = 0
+        self.entries_count = 0
+        self.start_time = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, dirs_count: int, entries_count: int) -> None:
+        """
+        Records listed directories and returned entries.
+        """
+        with self._lock:
+            self.dirs_count += dirs_count
+            self.entries_count += entries_count
+
+    def log(self, description: str) -> None:
+        """
+        Logs the throughput of the scan.
+
+        Args:
+            description (str): What was scanned.
+        """
+        duration = max(time.perf_counter() - self.start_time, 1e-9)
+        logger.info(
+            f"Scanned {description}: {self.dirs_count} directories, \
+{self.entries_count} entries in {duration:.2f} seconds \
+({self.dirs_count / duration:.1f} dirs/s, {self.entries_count / duration:.1f} entries/s)"
+        )
+
+
+def get_scan_workers(config_file: Path) -> int:
+    """
+    Returns the number of threads used to scan directories.
+
+    Args:
+        config_file (Path): Path to the config file.
+
+    Returns:
+        int: The 'scan_workers' of [crawler]. Defaults to 16.
+    """
+    crawler_params = utils.config(config_file, section="crawler")
+    return max(1, int(crawler_params.get("scan_workers", 16)))
+
+
+def scan_dir(path: Path) -> Optional[List[os.DirEntry]]:
+    """
+    Lists a directory.
+
+    Args:
+        path (Path): The directory.
+
+    Returns:
+        Optional[List[os.DirEntry]]: The entries, or None if the path is not
+            a directory, or can not be read.
+    """
+    try:
+        with os.scandir(path) as entries:
+            return list(entries)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    except PermissionError as e:
+        logger.warning(f"Skipping {path}: {e}")
+        return None
+
+
+def scan_dirs(
+    paths: List[Path], max_workers: int, stats: Optional[ScanStats] = None
+) -> Dict[Path, Optional[List[os.DirEntry]]]:
+    """
+    Lists directories concurrently.
+
+    Args:
+        paths (List[Path]): The directories.
+        max_workers (int): The number of threads.
+        stats (Optional[ScanStats]): Updated with the listed directories and
+            entries. Defaults to None.
+
+    Returns:
+        Dict[Path, Optional[List[os.DirEntry]]]: The entries of each directory,
+            None for paths that are not directories, or can not be read.
+    """
+    if len(paths) == 0:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        listings = dict(zip(paths, executor.map(scan_dir, paths)))
+
+    if stats is not None:
+        stats.add(
+            dirs_count=len(paths),
+            entries_count=sum(len(entries or []) for entries in listings.values()),
+        )
+
+    return listings
+
+
+def stat_path(path: Path) -> Optional[os.stat_result]:
+    """
+    Returns the stat of a path, or None if it does not exist, or can not
+    be accessed.
+    """
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
+    except PermissionError as e:
+        logger.warning(f"Skipping {path}: {e}")
+        return None
+
+
+def stat_paths(
+    paths: List[Path], max_workers: int, stats: Optional[ScanStats] = None
+) -> Dict[Path, Optional[os.stat_result]]:
+    """
+    Stats paths concurrently.
+
+    Args:
+        paths (List[Path]): The paths.
+        max_workers (int): The number of threads.
+        stats (Optional[ScanStats]): Updated with the number of paths.
+            Defaults to None.
+
+    Returns:
+        Dict[Path, Optional[os.stat_result]]: The stat of each path, None for
+            paths that do not exist, or can not be accessed.
+    """
+    if len(paths) == 0:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = dict(zip(paths, executor.map(stat_path, paths)))
+
+    if stats is not None:
+        stats.add(dirs_count=0, entries_count=len(paths))
+
+    return results
+
+
+def glob(
+    root: Path, pattern: str, max_workers: int, stats: Optional[ScanStats] = None
+) -> List[Path]:
+    """
+    Returns the paths under root matching a relative pattern, like Path.glob.
+
+    The tree is matched one path component at a time: all directories at a
+    depth are listed concurrently, before moving to the next depth. Literal
+    components are joined without listing their parent.
+
+    Args:
+        root (Path): The directory to match the pattern in.
+        pattern (str): The pattern, with '*', '?' and '[...]' wildcards.
+            Recursive patterns ('**') fall back to Path.glob.
+        max_workers (int): The number of threads.
+        stats (Optional[ScanStats]): Updated with the listed directories and
+            entries. Defaults to None.
+
+    Returns:
+        List[Path]: The matching paths, sorted.
+    """
+    parts = Path(pattern).parts
+    if "**" in parts:
+        return sorted(root.glob(pattern))
+
+    current: List[Path] = [root]
+    for depth, part in enumerate(parts):
+        is_last = depth == len(parts) - 1
+
+        if not glob_has_magic(part):
+            current = [path / part for path in current]
+            continue
+
+        listings = scan_dirs(paths=current, max_workers=max_workers, stats=stats)
+        current = [
+            Path(entry.path)
+            for entries in listings.values()
+            for entry in entries or []
+            if fnmatch.fnmatchcase(entry.name, part) and (is_last or entry.is_dir())
+        ]
+
+    if len(parts) > 0 and not glob_has_magic(parts[-1]):
+        path_stats = stat_paths(paths=current, max_workers=max_workers)
+        current = [path for path, stat in path_stats.items() if stat is not None]
+
+    return sorted(current)
+
+
+def glob_has_magic(part: str) -> bool:
+    """
+    Returns whether a path component contains wildcards.
+    """
+    return any(char in part for char in "*?[")
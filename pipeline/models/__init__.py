@@ -22,6 +22,8 @@ from pipeline.models.openface_qc import OpenfaceQC
 from pipeline.models.load_openface import LoadOpenface
 from pipeline.models.pdf_reports import PdfReport
 from pipeline.models.ffprobe_metadata import FfprobeMetadata
+from pipeline.models.pipeline_jobs import PipelineJob
+from pipeline.models.crawl_state import CrawlState
 
 from pipeline.helpers import db
 
@@ -73,6 +75,8 @@ def init_db(config_file: Path):
         KeyStore.drop_table_query(),
         Log.drop_table_query(),
         FfprobeMetadata.drop_table_query(),
+        PipelineJob.drop_table_query(),
+        CrawlState.drop_table_query(),
     ]
 
     create_queries_l: List[Union[str, List[str]]] = [
@@ -93,6 +97,8 @@ def init_db(config_file: Path):
         LoadOpenface.init_table_query(),
         PdfReport.init_table_query(),
         FfprobeMetadata.init_table_query(),
+        PipelineJob.init_table_query(),
+        CrawlState.init_table_query(),
     ]
 
     drop_queries = flatten_list(drop_queries_l)
@@ -101,3 +107,39 @@ def init_db(config_file: Path):
     sql_queries: List[str] = drop_queries + create_queries
 
     db.execute_queries(config_file=config_file, queries=sql_queries)
+
+
+def migrate_db(config_file: Path) -> None:
+    """
+    Brings the tables of an existing database up to date, without dropping them.
+
+    Adds the tables and columns introduced since the database was initialized.
+    Safe to run repeatedly. Run by the crawlers, before they write to the database.
+
+    Only runs the DDL statements that are needed: ALTER TABLE takes an
+    exclusive lock on the table, even if the column already exists.
+
+    Args:
+        config_file (Path): Path to the config file.
+    """
+    migration_queries_l: List[Union[str, List[str]]] = []
+
+    if (
+        db.fetch_record(config_file=config_file, query=File.inode_column_exists_query())
+        is None
+    ):
+        migration_queries_l.append(File.add_inode_column_query())
+
+    if (
+        db.fetch_record(config_file=config_file, query=CrawlState.table_exists_query())
+        is None
+    ):
+        migration_queries_l.append(CrawlState.init_table_query())
+
+    migration_queries = flatten_list(migration_queries_l)
+    if len(migration_queries) == 0:
+        return
+
+    db.execute_queries(
+        config_file=config_file, queries=migration_queries, show_commands=False
+    )
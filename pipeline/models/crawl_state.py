@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+"""
+CrawlState Model
+"""
+
+import sys
+from pathlib import Path
+
+file = Path(__file__).resolve()
+parent = file.parent
+ROOT = None
+for parent in file.parents:
+    if parent.name == "av-pipeline-v2":
+        ROOT = parent
+sys.path.append(str(ROOT))
+
+# remove current directory from path
+try:
+    sys.path.remove(str(parent))
+except ValueError:
+    pass
+
+import os
+from typing import Dict, List, Optional
+
+from pipeline.helpers import db, utils
+
+console = utils.get_console()
+
+
+class CrawlState:
+    """
+    Represents a row in the 'crawl_state' table.
+
+    Records the signature of a directory, as last crawled. Crawlers compare it
+    with the current signature of the directory, and only descend into
+    directories that changed since.
+
+    A directory's modification time changes when entries are added, removed or
+    renamed directly inside it. The signature therefore also covers the nested
+    directories whose files are crawled along with the directory.
+
+    Attributes:
+        cs_path (Path): The directory.
+        cs_parent (Path): The directory it was listed from.
+        study_id (str): The study the directory belongs to.
+        cs_signature (str): Inode and modification time (ns) of the directory,
+            and of its crawled nested directories.
+    """
+
+    def __init__(
+        self,
+        cs_path: Path,
+        cs_parent: Path,
+        study_id: str,
+        cs_signature: str,
+    ):
+        self.cs_path = cs_path
+        self.cs_parent = cs_parent
+        self.study_id = study_id
+        self.cs_signature = cs_signature
+
+    def __repr__(self):
+        return f"CrawlState({self.cs_path}, {self.cs_signature})"
+
+    def __str__(self):
+        return self.__repr__()
+
+    @staticmethod
+    def get_signature(path: Path, nested: Optional[List[str]] = None) -> Optional[str]:
+        """
+        Returns the current signature of a directory.
+
+        Args:
+            path (Path): The directory.
+            nested (Optional[List[str]]): Names of nested directories whose
+                files are crawled along with the directory. Defaults to None.
+
+        Returns:
+            Optional[str]: The signature, or None if the directory does not exist.
+        """
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+
+        nested_stats: List[Optional[os.stat_result]] = []
+        for nested_name in nested or []:
+            try:
+                nested_stats.append((path / nested_name).stat())
+            except FileNotFoundError:
+                nested_stats.append(None)
+
+        return CrawlState.signature_from_stats(stat, nested_stats)
+
+    @staticmethod
+    def signature_from_stats(
+        stat: Optional[os.stat_result],
+        nested_stats: Optional[List[Optional[os.stat_result]]] = None,
+    ) -> Optional[str]:
+        """
+        Returns the signature of a directory, from stats gathered beforehand
+        (e.g. concurrently, by the scanner).
+
+        Args:
+            stat (Optional[os.stat_result]): The stat of the directory,
+                None if it does not exist.
+            nested_stats (Optional[List[Optional[os.stat_result]]]): The stats of
+                the nested directories, None for those that do not exist.
+                Defaults to None.
+
+        Returns:
+            Optional[str]: The signature, or None if the directory does not exist.
+        """
+        if stat is None:
+            return None
+
+        signature = [f"{stat.st_ino}:{stat.st_mtime_ns}"]
+        for nested_stat in nested_stats or []:
+            if nested_stat is None:
+                signature.append("-")
+            else:
+                signature.append(f"{nested_stat.st_ino}:{nested_stat.st_mtime_ns}")
+
+        return ",".join(signature)
+
+    @staticmethod
+    def init_table_query() -> List[str]:
+        """
+        Return the SQL queries to create the 'crawl_state' table.
+        """
+        sql_query = """
+        CREATE TABLE IF NOT EXISTS crawl_state (
+            cs_path TEXT NOT NULL PRIMARY KEY,
+            cs_parent TEXT NOT NULL,
+            study_id TEXT NOT NULL,
+            cs_signature TEXT NOT NULL,
+            cs_timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+
+        index_query = """
+        CREATE INDEX IF NOT EXISTS crawl_state_study_id_index
+        ON crawl_state (study_id);
+        """
+
+        return [sql_query, index_query]
+
+    @staticmethod
+    def table_exists_query() -> str:
+        """
+        Return the SQL query to check if the 'crawl_state' table exists.
+        """
+        sql_query = """
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = current_schema() AND
+            table_name = 'crawl_state';
+        """
+
+        return sql_query
+
+    @staticmethod
+    def drop_table_query() -> str:
+        """
+        Return the SQL query to drop the 'crawl_state' table.
+        """
+        sql_query = """
+        DROP TABLE IF EXISTS crawl_state;
+        """
+
+        return sql_query
+
+    @staticmethod
+    def delete_query(cs_path: Path) -> str:
+        """
+        Return the SQL query to forget a directory that no longer exists.
+
+        Args:
+            cs_path (Path): The directory.
+        """
+        path = db.santize_string(str(cs_path))
+
+        sql_query = f"""
+        DELETE FROM crawl_state
+        WHERE cs_path = '{path}';
+        """
+
+        return sql_query
+
+    @staticmethod
+    def fetch_states(config_file: Path, study_id: str) -> Dict[str, "CrawlState"]:
+        """
+        Fetches the crawl state of all directories of a study.
+
+        Args:
+            config_file (Path): The path to the configuration file.
+            study_id (str): The study ID.
+
+        Returns:
+            Dict[str, CrawlState]: The crawl states, by directory.
+        """
+        query = f"""
+            SELECT cs_path, cs_parent, study_id, cs_signature
+            FROM crawl_state
+            WHERE study_id = '{study_id}';
+        """
+
+        results_df = db.execute_sql(config_file=config_file, query=query)
+
+        crawl_states: Dict[str, CrawlState] = {}
+        for _, row in results_df.iterrows():
+            crawl_states[row["cs_path"]] = CrawlState(
+                cs_path=Path(row["cs_path"]),
+                cs_parent=Path(row["cs_parent"]),
+                study_id=row["study_id"],
+                cs_signature=row["cs_signature"],
+            )
+
+        return crawl_states
+
+    def to_sql(self) -> str:
+        """
+        Return the SQL query to record the crawl state of the directory.
+        """
+        path = db.santize_string(str(self.cs_path))
+        parent_path = db.santize_string(str(self.cs_parent))
+
+        sql_query = f"""
+        INSERT INTO crawl_state (cs_path, cs_parent, study_id, cs_signature)
+        VALUES ('{path}', '{parent_path}', '{self.study_id}', '{self.cs_signature}')
+        ON CONFLICT (cs_path) DO UPDATE SET
+            cs_parent = EXCLUDED.cs_parent,
+            study_id = EXCLUDED.study_id,
+            cs_signature = EXCLUDED.cs_signature,
+            cs_timestamp = CURRENT_TIMESTAMP;
+        """
+
+        return sql_query
+
+
+if __name__ == "__main__":
+    config_file = utils.get_config_file_path()
+
+    console.log("Initializing 'crawl_state' table...")
+    console.log("[red]This will delete all existing data in the 'crawl_state' table!")
+
+    drop_queries = [CrawlState.drop_table_query()]
+    create_queries = CrawlState.init_table_query()
+
+    sql_queries = drop_queries + create_queries
+
+    db.execute_queries(config_file=config_file, queries=sql_queries, show_commands=True)
+
+    console.log("'crawl_state' table initialized.")
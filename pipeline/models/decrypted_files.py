@@ -34,6 +34,9 @@ console = utils.get_console()
 class DecryptedFile:
     """Represents a decrypted file."""
 
+    # Notified when a file is decrypted
+    NOTIFY_CHANNEL = "decrypted_files"
+
     def __init__(
         self,
         source_path: Path,
@@ -223,8 +226,11 @@ class DecryptedFile:
         """
 
         sql_query = db.handle_null(sql_query)
+        notify_query = db.notify_query(
+            channel=DecryptedFile.NOTIFY_CHANNEL, payload=str(file_path)
+        )
 
-        db.execute_queries(config_file=config_file, queries=[sql_query])
+        db.execute_queries(config_file=config_file, queries=[sql_query, notify_query])
 
 
 if __name__ == "__main__":
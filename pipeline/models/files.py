@@ -5,9 +5,12 @@ File Model
 
 from pathlib import Path
 from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
 
 from pipeline.helpers import db
-from pipeline.helpers.hash import compute_hash
+from pipeline.helpers.hash import HashStats, compute_hash
 
 
 class File:
@@ -21,13 +24,22 @@ class File:
     def __init__(
         self,
         file_path: Path,
-        with_hash: bool = True
+        with_hash: bool = True,
+        hash_record: Optional[Dict[str, Any]] = None,
+        hash_stats: Optional[HashStats] = None,
     ):
         """
         Initialize a File object.
 
         Args:
             file_path (Path): The path to the file.
+            with_hash (bool): Whether to compute the md5 digest of the file.
+            hash_record (Optional[Dict[str, Any]]): The existing 'files' row of
+                the file, from File.fetch_hash_records. Its md5 digest is reused
+                if the size, modification time and inode of the file did not
+                change. Defaults to None (hash the file).
+            hash_stats (Optional[HashStats]): Updated if the file is hashed.
+                Defaults to None.
         """
         self.file_path = file_path
 
@@ -40,10 +52,25 @@ class File:
             # Use previous suffix for lock files
             self.file_type = file_path.suffixes[-2]
 
-        self.file_size_mb = file_path.stat().st_size / 1024 / 1024
-        self.m_time = datetime.fromtimestamp(file_path.stat().st_mtime)
+        file_stat = file_path.stat()
+        self.file_size_mb = file_stat.st_size / 1024 / 1024
+        self.m_time = datetime.fromtimestamp(file_stat.st_mtime)
+        self.file_inode = file_stat.st_ino
+
+        # Whether the md5 digest was reused from the existing 'files' row
+        self.hash_reused = False
+        # Whether the existing 'files' row is up to date, and need not be written
+        self.row_current = False
         if with_hash:
-            self.md5 = compute_hash(file_path=file_path, hash_type="md5")
+            if self.matches(hash_record):
+                self.md5 = hash_record["md5"]  # type: ignore
+                self.hash_reused = True
+                # Rows written before inodes were recorded get their inode filled in
+                self.row_current = hash_record["file_inode"] is not None  # type: ignore
+            else:
+                self.md5 = compute_hash(
+                    file_path=file_path, hash_type="md5", stats=hash_stats
+                )
         else:
             self.md5 = None
 
@@ -60,6 +87,31 @@ class File:
         """
         return self.__str__()
 
+    def matches(self, hash_record: Optional[Dict[str, Any]]) -> bool:
+        """
+        Check if an existing 'files' row describes the current contents of the file.
+
+        Rows written before inodes were recorded are matched on size and
+        modification time only.
+
+        Args:
+            hash_record (Optional[Dict[str, Any]]): The existing 'files' row.
+
+        Returns:
+            bool: True if the size, modification time and inode are unchanged.
+        """
+        if hash_record is None or hash_record["md5"] is None:
+            return False
+
+        inode = hash_record["file_inode"]
+        if inode is not None and inode != self.file_inode:
+            return False
+
+        return (
+            hash_record["file_size_mb"] == self.file_size_mb
+            and hash_record["m_time"] == self.m_time
+        )
+
     @staticmethod
     def init_table_query() -> str:
         """
@@ -72,12 +124,81 @@ class File:
             file_size_mb FLOAT NOT NULL,
             file_path TEXT PRIMARY KEY,
             m_time TIMESTAMP NOT NULL,
-            md5 TEXT
+            md5 TEXT,
+            file_inode BIGINT
         );
         """
 
         return sql_query
 
+    @staticmethod
+    def add_inode_column_query() -> str:
+        """
+        Return the SQL query to add the 'file_inode' column to an existing 'files' table.
+        """
+        sql_query = """
+        ALTER TABLE files ADD COLUMN IF NOT EXISTS file_inode BIGINT;
+        """
+
+        return sql_query
+
+    @staticmethod
+    def inode_column_exists_query() -> str:
+        """
+        Return the SQL query to check if the 'files' table has the 'file_inode' column.
+        """
+        sql_query = """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND
+            table_name = 'files' AND
+            column_name = 'file_inode';
+        """
+
+        return sql_query
+
+    @staticmethod
+    def fetch_hash_records(
+        config_file: Path, file_paths: List[Path]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch the existing 'files' rows with an md5 digest, for the given files.
+
+        Args:
+            config_file (Path): The path to the configuration file.
+            file_paths (List[Path]): The files.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: The rows, by file path.
+        """
+        if len(file_paths) == 0:
+            return {}
+
+        paths = ", ".join(
+            [f"'{db.santize_string(str(file_path))}'" for file_path in file_paths]
+        )
+
+        query = f"""
+            SELECT file_path, file_size_mb, m_time, file_inode, md5
+            FROM files
+            WHERE md5 IS NOT NULL AND
+                file_path IN ({paths});
+        """
+
+        results_df = db.execute_sql(config_file=config_file, query=query)
+
+        hash_records: Dict[str, Dict[str, Any]] = {}
+        for _, row in results_df.iterrows():
+            hash_records[row["file_path"]] = {
+                "file_size_mb": float(row["file_size_mb"]),
+                "m_time": pd.Timestamp(row["m_time"]).to_pydatetime(),
+                "file_inode": (
+                    None if pd.isna(row["file_inode"]) else int(row["file_inode"])
+                ),
+                "md5": row["md5"],
+            }
+
+        return hash_records
+
     @staticmethod
     def drop_table_query() -> str:
         """
@@ -103,15 +224,16 @@ class File:
 
         sql_query = f"""
         INSERT INTO files (file_name, file_type, file_size_mb,
-            file_path, m_time, md5)
+            file_path, m_time, md5, file_inode)
         VALUES ('{f_name}', '{self.file_type}', '{self.file_size_mb}',
-            '{f_path}', '{self.m_time}', '{hash_val}')
+            '{f_path}', '{self.m_time}', '{hash_val}', {self.file_inode})
         ON CONFLICT (file_path) DO UPDATE SET
             file_name = excluded.file_name,
             file_type = excluded.file_type,
             file_size_mb = excluded.file_size_mb,
             m_time = excluded.m_time,
-            md5 = excluded.md5;
+            md5 = excluded.md5,
+            file_inode = excluded.file_inode;
         """
 
         sql_query = db.handle_null(sql_query)
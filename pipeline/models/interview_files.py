@@ -3,7 +3,7 @@ InterviewFiles model
 """
 
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
 from pipeline.helpers import db
 
@@ -94,6 +94,31 @@ class InterviewFile:
 
         return sql_query
 
+    @staticmethod
+    def fetch_interview_file_tags(config_file: Path, study_id: str) -> Dict[str, str]:
+        """
+        Fetches the tags of all interview files of a study, with a single query.
+
+        Args:
+            config_file (Path): The path to the configuration file.
+            study_id (str): The study ID.
+
+        Returns:
+            Dict[str, str]: The tags of each interview file.
+        """
+        query = f"""
+            SELECT interview_file, interview_file_tags
+            FROM interview_files
+            INNER JOIN interviews USING (interview_path)
+            WHERE interviews.study_id = '{study_id}';
+        """
+
+        results_df = db.execute_sql(config_file=config_file, query=query)
+
+        return dict(
+            zip(results_df["interview_file"], results_df["interview_file_tags"])
+        )
+
     @staticmethod
     def get_interview_files_with_tag(config_file: Path, interview_name: str, tag: str) -> List[Path]:
         """
@@ -4,7 +4,7 @@ Interview model
 
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Set
 from enum import Enum
 
 from pipeline.helpers import db
@@ -145,6 +145,28 @@ class Interview:
 
         return sql_query
 
+    @staticmethod
+    def fetch_interview_paths(config_file: Path, study_id: str) -> Set[str]:
+        """
+        Fetches the paths of all interviews of a study, with a single query.
+
+        Args:
+            config_file (Path): The path to the configuration file.
+            study_id (str): The study ID.
+
+        Returns:
+            Set[str]: The interview paths.
+        """
+        query = f"""
+            SELECT interview_path
+            FROM interviews
+            WHERE study_id = '{study_id}';
+        """
+
+        results = db.execute_sql(config_file=config_file, query=query)
+
+        return set(results["interview_path"].tolist())
+
     @staticmethod
     def get_interview_name(config_file: Path, interview_file: Path) -> Optional[str]:
         """
@@ -6,7 +6,7 @@ Used to represent a request for a frame of video.
 
 from pathlib import Path
 from datetime import timedelta
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 from pipeline.helpers import db, dpdash
 from pipeline.models.interview_roles import InterviewRole
@@ -131,28 +131,118 @@ class FrameRequest:
             List[Optional[int]]: A list of frame numbers, with None for any frames that
                 could not be retrieved.
         """
+        windows = FrameRequest.get_windows(
+            start_time=start_time, end_time=end_time, frame_frequency=frame_frequency
+        )
+
+        return FrameRequest.get_frame_numbers_batch(
+            config_file=config_file,
+            interview_name=interview_name,
+            role=role,
+            windows=windows,
+        )
+
+    @staticmethod
+    def get_windows(
+        start_time: timedelta,
+        end_time: timedelta,
+        frame_frequency: timedelta,
+    ) -> List[Tuple[timedelta, timedelta]]:
+        """
+        Splits a time range into windows of a given frequency, one frame per window.
+
+        Args:
+            start_time (timedelta): The start time of the range.
+            end_time (timedelta): The end time of the range.
+            frame_frequency (timedelta): The length of each window.
+
+        Returns:
+            List[Tuple[timedelta, timedelta]]: The (start, end) of each window.
+        """
+        windows: List[Tuple[timedelta, timedelta]] = []
+
         current_time = start_time
-        frame_numbers: List[Optional[int]] = []
-        increment_time = frame_frequency
+        while current_time < end_time:
+            windows.append((current_time, current_time + frame_frequency))
+            current_time = current_time + frame_frequency
+
+        return windows
+
+    @staticmethod
+    def get_frame_numbers_batch(
+        config_file: Path,
+        interview_name: str,
+        role: InterviewRole,
+        windows: List[Tuple[timedelta, timedelta]],
+    ) -> List[Optional[int]]:
+        """
+        Gets a frame number for each time window, with a single query.
+
+        Selects the same frame as get_frame_number does for each window
+        (the frame in the middle of the window).
+
+        Args:
+            config_file (Path): The path to the configuration file.
+            interview_name (str): The name of the interview associated with the frame request.
+            role (str): The role of the user for whom the frame is requested.
+            windows (List[Tuple[timedelta, timedelta]]): The (start, end) of each window.
+
+        Returns:
+            List[Optional[int]]: A frame number per window, with None for any windows
+                without frames.
+        """
+        if len(windows) == 0:
+            return []
 
         dpdash_dict = dpdash.parse_dpdash_name(interview_name)
         subject_id = dpdash_dict["subject"]
         study_id = dpdash_dict["study"]
 
-        while current_time < end_time:
-            frame_request = FrameRequest(
-                interview_name=interview_name,
-                subject_id=subject_id,  # type: ignore
-                study_id=study_id,  # type: ignore
-                role=role,
-                start_time=current_time,
-                end_time=current_time + increment_time,
-            )
-            frame_number = FrameRequest.get_frame_number(
-                request=frame_request, config_file=config_file
-            )
-            frame_numbers.append(frame_number)
-
-            current_time = current_time + increment_time
+        windows_values = ",\n".join(
+            [
+                f"({idx}, TIME '{start}', TIME '{end}')"
+                for idx, (start, end) in enumerate(windows)
+            ]
+        )
+
+        sql_query = f"""
+        WITH windows (window_idx, start_time, end_time) AS (
+            VALUES {windows_values}
+        ), ranked_frames AS (
+        SELECT windows.window_idx,
+            frame,
+            timestamp,
+            RANK() OVER (
+                PARTITION BY windows.window_idx
+                ORDER BY timestamp
+            ) AS rank,
+            COUNT(*) OVER (PARTITION BY windows.window_idx) AS total_count
+        FROM openface_features
+        INNER JOIN windows
+            ON timestamp BETWEEN windows.start_time AND windows.end_time
+        where interview_name = '{interview_name}'
+            and subject_id = '{subject_id}'
+            and study_id = '{study_id}'
+            and ir_role = '{role}'
+        )
+        SELECT DISTINCT ON (window_idx) window_idx,
+            frame
+        FROM ranked_frames
+        WHERE total_count >= 2
+            AND rank > 1
+            AND MOD(
+                rank - 1,
+                cast(FLOOR(total_count / 2) as bigint)
+            ) = 0
+        ORDER BY window_idx, timestamp;
+        """
+
+        frames = db.execute_sql(
+            config_file=config_file, query=sql_query, db="openface_db"
+        )
+
+        frame_numbers: List[Optional[int]] = [None] * len(windows)
+        for _, row in frames.iterrows():
+            frame_numbers[int(row["window_idx"])] = int(row["frame"])
 
         return frame_numbers
@@ -0,0 +1,53 @@
+"""
+PageAssets Class
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from pipeline.models.interview_roles import InterviewRole
+
+
+class PageAssets:
+    """
+    Images rendered for a single page of a report, before the page is drawn.
+
+    Args:
+        page_number (int): The page number (1-indexed).
+        heatmap_vid_pose_paths (Dict[InterviewRole, Path]): Pose + Gaze heatmap per role.
+        heatmap_vid_fau_paths (Dict[InterviewRole, Path]): FAU heatmap per role.
+        sample_image_paths (Dict[InterviewRole, Optional[Path]]): Sample image
+            per role, None if no frame could be retrieved.
+        snapshot_frames (Dict[InterviewRole, List[Optional[np.ndarray]]]): Snapshot
+            frames per role, None for frames that could not be retrieved.
+        render_time (Optional[float]): Time taken to render the assets, in seconds.
+        query_count (int): Number of database queries issued to render the assets.
+    """
+
+    def __init__(
+        self,
+        page_number: int,
+        heatmap_vid_pose_paths: Dict[InterviewRole, Path],
+        heatmap_vid_fau_paths: Dict[InterviewRole, Path],
+        sample_image_paths: Dict[InterviewRole, Optional[Path]],
+        snapshot_frames: Optional[
+            Dict[InterviewRole, List[Optional[np.ndarray]]]
+        ] = None,
+        render_time: Optional[float] = None,
+        query_count: int = 0,
+    ):
+        self.page_number = page_number
+        self.heatmap_vid_pose_paths = heatmap_vid_pose_paths
+        self.heatmap_vid_fau_paths = heatmap_vid_fau_paths
+        self.sample_image_paths = sample_image_paths
+        self.snapshot_frames = snapshot_frames or {}
+        self.render_time = render_time
+        self.query_count = query_count
+
+    def __repr__(self):
+        return f"PageAssets(page_number={self.page_number}, render_time={self.render_time})"
+
+    def __str__(self):
+        return self.__repr__()
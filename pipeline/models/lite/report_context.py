@@ -0,0 +1,474 @@
+"""
+ReportContext Class
+"""
+
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from pipeline import core
+from pipeline.helpers import db, dpdash
+from pipeline.models.interview_roles import InterviewRole
+from pipeline.models.lite.interview_metadata import InterviewMetadata
+from pipeline.models.lite.openface_qc_metrics import OpenFaceQcMetrics
+from pipeline.models.lite.video_metadata import VideoMetadata
+from pipeline.models.openface_bin_stats import STAT_COLS
+
+
+class ReportContext:
+    """
+    Everything a report needs from the database, for a single interview.
+
+    Built once per report with ReportContext.get, and consumed by every
+    section of the report, instead of each section (and each page) issuing
+    its own queries.
+
+    Attributes:
+        interview_name (str): The name of the interview.
+        interview_metadata (InterviewMetadata): The interview metadata.
+        study_visits_count (Optional[int]): The number of visits in the study.
+        study_subjects_count (Optional[int]): The number of subjects in the study.
+        openface_paths (Dict[InterviewRole, Path]): OpenFace output directory
+            per role, for roles that have been processed.
+        video_metadata (Dict[InterviewRole, VideoMetadata]): Video metadata per role.
+        qc_metrics (Dict[InterviewRole, OpenFaceQcMetrics]): OpenFace QC metrics per role.
+        session_features (Dict[InterviewRole, pd.DataFrame]): Successful OpenFace
+            frames of the interview per role, with 'timestamp' and STAT_COLS.
+        subject_stats (pd.Series): Sufficient statistics of the OpenFace frames
+            of all interviews of the subject (see OpenfaceSubjectStats).
+        bin_stats (Dict[InterviewRole, pd.DataFrame]): Per-bin OpenFace
+            statistics per role, as computed by load_openface.
+    """
+
+    def __init__(
+        self,
+        interview_name: str,
+        interview_metadata: InterviewMetadata,
+        study_visits_count: Optional[int],
+        study_subjects_count: Optional[int],
+        openface_paths: Dict[InterviewRole, Path],
+        video_metadata: Dict[InterviewRole, VideoMetadata],
+        qc_metrics: Dict[InterviewRole, OpenFaceQcMetrics],
+        session_features: Dict[InterviewRole, pd.DataFrame],
+        subject_stats: pd.Series,
+        bin_stats: Dict[InterviewRole, pd.DataFrame],
+    ):
+        self.interview_name = interview_name
+        self.interview_metadata = interview_metadata
+        self.study_visits_count = study_visits_count
+        self.study_subjects_count = study_subjects_count
+        self.openface_paths = openface_paths
+        self.video_metadata = video_metadata
+        self.qc_metrics = qc_metrics
+        self.session_features = session_features
+        self.subject_stats = subject_stats
+        self.bin_stats = bin_stats
+
+    def __repr__(self):
+        return f"ReportContext(interview_name={self.interview_name}, \
+roles={list(self.openface_paths)})"
+
+    def __str__(self):
+        return self.__repr__()
+
+    def get_session_features(
+        self, role: InterviewRole, cols: List[str]
+    ) -> pd.DataFrame:
+        """
+        Returns the successful OpenFace frames of the interview, for a role.
+
+        Args:
+            role (InterviewRole): The role.
+            cols (List[str]): The columns to return.
+
+        Returns:
+            pd.DataFrame: The features. Empty if the role has no frames.
+        """
+        features = self.session_features.get(role)
+        if features is None:
+            return pd.DataFrame(columns=cols)
+
+        return features[cols]
+
+    def get_bin_stats(self, role: InterviewRole, bin_size: int) -> pd.DataFrame:
+        """
+        Returns the per-bin OpenFace statistics of the interview, for a role.
+
+        Falls back to aggregating the session features, for interviews loaded
+        before openface_bin_stats existed.
+
+        Args:
+            role (InterviewRole): The role.
+            bin_size (int): Size of each bin, in seconds.
+
+        Returns:
+            pd.DataFrame: The bin statistics.
+        """
+        bin_stats = self.bin_stats.get(role)
+        if bin_stats is not None and not bin_stats.empty:
+            return bin_stats
+
+        return core.compute_openface_bin_stats(
+            features_df=self.get_session_features(role, ["timestamp"] + STAT_COLS),
+            bin_size=bin_size,
+        )
+
+    def get_video_metadata(self, role: InterviewRole) -> VideoMetadata:
+        """
+        Returns the video metadata, for a role.
+
+        Raises:
+            ValueError: If no resolution was found for the role's video stream.
+        """
+        if role not in self.video_metadata:
+            raise ValueError(f"No resolution found for {self.interview_name} {role}")
+
+        return self.video_metadata[role]
+
+    def get_qc_metrics(self, role: InterviewRole) -> OpenFaceQcMetrics:
+        """
+        Returns the OpenFace QC metrics, for a role.
+
+        Raises:
+            ValueError: If the QC metrics were not found for the role.
+        """
+        if role not in self.qc_metrics:
+            raise ValueError(
+                f"OpenFace quality control metrics not found for \
+{self.interview_name} and {role}"
+            )
+
+        return self.qc_metrics[role]
+
+    def get_overlaid_video_path(self, role: InterviewRole) -> Optional[Path]:
+        """
+        Returns the path to the OpenFace overlaid video, for a role.
+
+        Returns:
+            Optional[Path]: The path, or None if the video does not exist.
+        """
+        of_path = self.openface_paths.get(role)
+        if of_path is None:
+            return None
+
+        overlaid_video_path = of_path / "openface_aligned.mp4"
+        if not overlaid_video_path.exists():
+            return None
+
+        return overlaid_video_path
+
+    @staticmethod
+    def fetch_interview_record(config_file: Path, interview_name: str) -> pd.Series:
+        """
+        Fetches the interview, visit and study counts of an interview,
+        with a single query.
+
+        Args:
+            config_file (Path): Path to the config file.
+            interview_name (str): Name of the interview.
+
+        Raises:
+            ValueError: If the interview is not found.
+
+        Returns:
+            pd.Series: The interview record.
+        """
+        dpdash_dict = dpdash.parse_dpdash_name(interview_name)
+        subject_id = dpdash_dict["subject"]
+        study_id = dpdash_dict["study"]
+
+        sql_query = f"""
+            SELECT
+                interview.interview_type,
+                interview.interview_date,
+                (
+                    SELECT buffer.interview_count FROM (
+                        SELECT interview_name,
+                            DENSE_RANK() OVER(ORDER BY interview_date ASC) AS interview_count
+                        FROM interviews
+                        WHERE subject_id = '{subject_id}'
+                    ) AS buffer
+                    WHERE buffer.interview_name = interview.interview_name
+                    LIMIT 1
+                ) AS visit_count,
+                (
+                    SELECT COUNT(DISTINCT interview_name)
+                    FROM interviews
+                    WHERE subject_id = '{subject_id}'
+                ) AS subject_visits_count,
+                (
+                    SELECT COUNT(DISTINCT interview_name)
+                    FROM interviews
+                    WHERE study_id = '{study_id}'
+                ) AS study_visits_count,
+                (
+                    SELECT COUNT(DISTINCT subject_id)
+                    FROM subjects
+                    WHERE study_id = '{study_id}'
+                ) AS study_subjects_count
+            FROM interviews AS interview
+            WHERE interview.interview_name = '{interview_name}'
+            LIMIT 1;
+        """
+
+        results = db.execute_sql(config_file=config_file, query=sql_query)
+
+        if results.empty:
+            raise ValueError(f"No interview found for {interview_name}")
+
+        return results.iloc[0]
+
+    @staticmethod
+    def fetch_role_records(config_file: Path, interview_name: str) -> pd.DataFrame:
+        """
+        Fetches the OpenFace path, load timestamp, video stream, resolution,
+        duration and OpenFace QC metrics of each role of an interview, with a
+        single query.
+
+        Args:
+            config_file (Path): Path to the config file.
+            interview_name (str): Name of the interview.
+
+        Raises:
+            ValueError: If the interview has not been loaded into the database yet.
+
+        Returns:
+            pd.DataFrame: One row per role, with an 'ir_role' column.
+        """
+        sql_query = f"""
+            SELECT DISTINCT ON (roles.ir_role)
+                roles.ir_role,
+                roles.of_processed_path,
+                roles.lof_timestamp,
+                openface.vs_path,
+                ffprobe_metadata_video.fmv_width,
+                ffprobe_metadata_video.fmv_height,
+                ffprobe_metadata.fm_duration,
+                openface_qc.sucessful_frames_percentage,
+                openface_qc.successful_frames_confidence_mean
+            FROM (
+                SELECT '{InterviewRole.SUBJECT}' AS ir_role,
+                    subject_of_processed_path AS of_processed_path,
+                    lof_timestamp
+                FROM load_openface
+                WHERE interview_name = '{interview_name}'
+                UNION ALL
+                SELECT '{InterviewRole.INTERVIEWER}' AS ir_role,
+                    interviewer_of_processed_path AS of_processed_path,
+                    lof_timestamp
+                FROM load_openface
+                WHERE interview_name = '{interview_name}'
+            ) AS roles
+            LEFT JOIN openface
+                ON openface.of_processed_path = roles.of_processed_path
+            LEFT JOIN openface_qc
+                ON openface_qc.of_processed_path = roles.of_processed_path
+            LEFT JOIN ffprobe_metadata_video
+                ON ffprobe_metadata_video.fmv_source_path = openface.vs_path
+            LEFT JOIN ffprobe_metadata
+                ON ffprobe_metadata.fm_source_path = openface.vs_path
+            ORDER BY roles.ir_role;
+        """
+
+        results = db.execute_sql(config_file=config_file, query=sql_query)
+
+        if results.empty:
+            raise ValueError(
+                f"No openface path found for interview {interview_name}: \
+Probably not loaded into the database yet"
+            )
+
+        return results
+
+    @staticmethod
+    def fetch_session_features(
+        config_file: Path, interview_name: str
+    ) -> Dict[InterviewRole, pd.DataFrame]:
+        """
+        Fetches the successful OpenFace frames of all roles of an interview,
+        with a single query.
+
+        Args:
+            config_file (Path): Path to the config file.
+            interview_name (str): Name of the interview.
+
+        Returns:
+            Dict[InterviewRole, pd.DataFrame]: The features per role, with
+                'timestamp' and STAT_COLS.
+        """
+        cols = ["timestamp"] + STAT_COLS
+
+        sql_query = f"""
+            SELECT
+                ir_role, "{'", "'.join(cols)}"
+            FROM openface_features
+            WHERE success = TRUE AND
+                interview_name = '{interview_name}';
+        """
+
+        features = db.execute_sql(
+            config_file=config_file, query=sql_query, db="openface_db"
+        )
+
+        return {
+            InterviewRole(ir_role): role_features[cols].reset_index(drop=True)
+            for ir_role, role_features in features.groupby("ir_role")
+        }
+
+    @staticmethod
+    def fetch_bin_stats(
+        config_file: Path, interview_name: str, bin_size: int
+    ) -> Dict[InterviewRole, pd.DataFrame]:
+        """
+        Fetches the per-bin OpenFace statistics of all roles of an interview,
+        with a single query.
+
+        Args:
+            config_file (Path): Path to the config file.
+            interview_name (str): Name of the interview.
+            bin_size (int): Size of each bin, in seconds.
+
+        Returns:
+            Dict[InterviewRole, pd.DataFrame]: The bin statistics per role,
+                ordered by bin.
+        """
+        sql_query = f"""
+            SELECT *
+            FROM openface_bin_stats
+            WHERE interview_name = '{interview_name}' AND
+                bin_size = {bin_size}
+            ORDER BY ir_role, bin;
+        """
+
+        bin_stats = db.execute_sql(
+            config_file=config_file, query=sql_query, db="openface_db"
+        )
+
+        return {
+            InterviewRole(ir_role): role_bin_stats.reset_index(drop=True)
+            for ir_role, role_bin_stats in bin_stats.groupby("ir_role")
+        }
+
+    @staticmethod
+    def get(
+        config_file: Path,
+        interview_name: str,
+        bin_size: int,
+        interview_record: Optional[pd.Series] = None,
+        role_records: Optional[pd.DataFrame] = None,
+    ) -> "ReportContext":
+        """
+        Loads everything a report needs from the database, for an interview.
+
+        Args:
+            config_file (Path): Path to the config file.
+            interview_name (str): Name of the interview.
+            bin_size (int): Size of each bin, in seconds.
+            interview_record (Optional[pd.Series]): Result of fetch_interview_record,
+                if already fetched. Defaults to None (fetch it).
+            role_records (Optional[pd.DataFrame]): Result of fetch_role_records,
+                if already fetched. Defaults to None (fetch them).
+
+        Raises:
+            ValueError: If the interview has not been loaded into the database yet.
+
+        Returns:
+            ReportContext: The report context.
+        """
+        dpdash_dict = dpdash.parse_dpdash_name(interview_name)
+        subject_id = str(dpdash_dict["subject"])
+        study_id = str(dpdash_dict["study"])
+        study_day = int(str(dpdash_dict["time_range"])[3:])  # Remove "day" prefix
+
+        if interview_record is None:
+            interview_record = ReportContext.fetch_interview_record(
+                config_file=config_file, interview_name=interview_name
+            )
+        if role_records is None:
+            role_records = ReportContext.fetch_role_records(
+                config_file=config_file, interview_name=interview_name
+            )
+
+        openface_paths: Dict[InterviewRole, Path] = {}
+        video_metadata: Dict[InterviewRole, VideoMetadata] = {}
+        qc_metrics: Dict[InterviewRole, OpenFaceQcMetrics] = {}
+        interview_duration: Optional[float] = None
+
+        for _, role_record in role_records.iterrows():
+            if pd.isna(role_record["of_processed_path"]):
+                continue
+
+            role = InterviewRole(role_record["ir_role"])
+            of_path = Path(role_record["of_processed_path"])
+            if not of_path.exists():
+                raise FileNotFoundError(f"OpenFace path {of_path} does not exist")
+            openface_paths[role] = of_path
+
+            if not pd.isna(role_record["fmv_width"]):
+                video_metadata[role] = VideoMetadata(
+                    interview_name=interview_name,
+                    role=role,
+                    video_width=role_record["fmv_width"],
+                    video_height=role_record["fmv_height"],
+                )
+
+            if not pd.isna(role_record["sucessful_frames_percentage"]):
+                qc_metrics[role] = OpenFaceQcMetrics(
+                    interview_name=interview_name,
+                    role=role,
+                    successful_frames_percentage=role_record[
+                        "sucessful_frames_percentage"
+                    ],
+                    successful_frames_confidence_mean=role_record[
+                        "successful_frames_confidence_mean"
+                    ],
+                )
+
+            if role is InterviewRole.SUBJECT and not pd.isna(
+                role_record["fm_duration"]
+            ):
+                interview_duration = float(role_record["fm_duration"])
+
+        if interview_duration is None:
+            raise ValueError(
+                f"No interview duration found for interview {interview_name}"
+            )
+
+        interview_datetime = pd.Timestamp(interview_record["interview_date"])
+
+        interview_metadata = InterviewMetadata(
+            study=study_id,
+            subject=subject_id,
+            visit=str(interview_record["visit_count"]),
+            total_visits=str(interview_record["subject_visits_count"]),
+            study_day=str(study_day),
+            time=str(interview_datetime.time()),
+            length=str(timedelta(seconds=int(interview_duration))),
+            has_interviewer_stream=InterviewRole.INTERVIEWER in openface_paths,
+            interview_type=interview_record["interview_type"],
+        )
+
+        session_features = ReportContext.fetch_session_features(
+            config_file=config_file, interview_name=interview_name
+        )
+        subject_stats = core.get_openface_subject_stats(
+            subject_id=subject_id, config_file=config_file
+        )
+        bin_stats = ReportContext.fetch_bin_stats(
+            config_file=config_file, interview_name=interview_name, bin_size=bin_size
+        )
+
+        return ReportContext(
+            interview_name=interview_name,
+            interview_metadata=interview_metadata,
+            study_visits_count=int(interview_record["study_visits_count"]),
+            study_subjects_count=int(interview_record["study_subjects_count"]),
+            openface_paths=openface_paths,
+            video_metadata=video_metadata,
+            qc_metrics=qc_metrics,
+            session_features=session_features,
+            subject_stats=subject_stats,
+            bin_stats=bin_stats,
+        )
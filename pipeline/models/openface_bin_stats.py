@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+OpenfaceBinStats Model
+"""
+
+import sys
+from pathlib import Path
+
+file = Path(__file__).resolve()
+parent = file.parent
+ROOT = None
+for parent in file.parents:
+    if parent.name == "av-pipeline-v2":
+        ROOT = parent
+sys.path.append(str(ROOT))
+
+# remove current directory from path
+try:
+    sys.path.remove(str(parent))
+except ValueError:
+    pass
+
+from typing import List
+
+from pipeline import constants
+
+# Columns aggregated per bin
+STAT_COLS = constants.HEADPOSE_COLS + constants.GAZE_COLS + constants.AU_COLS
+STATS = ["mean", "std"]
+
+
+class OpenfaceBinStats:
+    """
+    Represents the 'openface_bin_stats' table (openface_db).
+
+    Holds the mean and standard deviation of the Head Pose, Gaze and AU columns
+    of successful OpenFace frames, for fixed-size time bins of an interview.
+    Bin 'n' covers timestamps in (n * bin_size, (n + 1) * bin_size] seconds.
+
+    Populated by load_openface, and read by report generation, instead of
+    aggregating the frames in openface_features.
+    """
+
+    @staticmethod
+    def stat_column(col: str, stat: str) -> str:
+        """
+        Returns the name of the column holding a statistic of an OpenFace column.
+
+        Args:
+            col (str): OpenFace column name (e.g. 'AU01_r').
+            stat (str): Statistic ('mean' or 'std').
+
+        Returns:
+            str: Column name (e.g. 'AU01_r_mean').
+        """
+        return f"{col}_{stat}"
+
+    @staticmethod
+    def stat_columns() -> List[str]:
+        """
+        Returns the names of all statistic columns.
+        """
+        return [
+            OpenfaceBinStats.stat_column(col, stat)
+            for col in STAT_COLS
+            for stat in STATS
+        ]
+
+    @staticmethod
+    def init_table_query() -> List[str]:
+        """
+        Return the SQL queries to create the 'openface_bin_stats' table.
+        """
+        stat_cols_query = ",\n".join(
+            [f'"{col}" FLOAT' for col in OpenfaceBinStats.stat_columns()]
+        )
+
+        sql_query = f"""
+        CREATE TABLE IF NOT EXISTS openface_bin_stats (
+            interview_name TEXT NOT NULL,
+            subject_id TEXT NOT NULL,
+            study_id TEXT NOT NULL,
+            ir_role TEXT NOT NULL,
+            bin_size INTEGER NOT NULL,
+            bin INTEGER NOT NULL,
+            frame_count INTEGER NOT NULL,
+            timestamp_min FLOAT NOT NULL,
+            timestamp_max FLOAT NOT NULL,
+            {stat_cols_query},
+            obs_timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (interview_name, ir_role, bin_size, bin)
+        );
+        """
+
+        index_query = """
+        CREATE INDEX IF NOT EXISTS openface_bin_stats_subject_id_index
+        ON openface_bin_stats (subject_id);
+        """
+
+        return [sql_query, index_query]
+
+    @staticmethod
+    def drop_table_query() -> str:
+        """
+        Return the SQL query to drop the 'openface_bin_stats' table.
+        """
+        sql_query = """
+        DROP TABLE IF EXISTS openface_bin_stats;
+        """
+        return sql_query
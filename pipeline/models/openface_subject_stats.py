@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+"""
+OpenfaceSubjectStats Model
+"""
+
+import sys
+from pathlib import Path
+
+file = Path(__file__).resolve()
+parent = file.parent
+ROOT = None
+for parent in file.parents:
+    if parent.name == "av-pipeline-v2":
+        ROOT = parent
+sys.path.append(str(ROOT))
+
+# remove current directory from path
+try:
+    sys.path.remove(str(parent))
+except ValueError:
+    pass
+
+from typing import Dict, List, Optional
+
+from pipeline import constants
+
+# Columns with a sum and sum of squares (means and standard deviations)
+SUM_COLS = constants.HEADPOSE_COLS + constants.GAZE_COLS + constants.AU_COLS
+# Columns with a sum of cross products for each pair (correlation matrix)
+CROSS_COLS = constants.AU_COLS
+
+
+class OpenfaceSubjectStats:
+    """
+    Represents the 'openface_subject_stats' table (openface_db).
+
+    Holds sufficient statistics of the successful OpenFace frames of an
+    interview, per role: the frame count, the sum and sum of squares of
+    each SUM_COLS column, and the sum of cross products of each pair of
+    CROSS_COLS columns.
+
+    Summing the rows of a subject gives the statistics of all of the
+    subject's frames, from which means, standard deviations and the AU
+    correlation matrix are derived in O(cols^2), without reading
+    openface_features. Rows are kept per interview, so that reloading
+    an interview does not count its frames twice.
+
+    Populated by load_openface. Use scripts/rebuild_subject_stats.py to
+    backfill it from openface_features.
+    """
+
+    @staticmethod
+    def sum_column(col: str) -> str:
+        """
+        Returns the name of the column holding the sum of an OpenFace column.
+        """
+        return f"{col}_sum"
+
+    @staticmethod
+    def sumsq_column(col: str) -> str:
+        """
+        Returns the name of the column holding the sum of squares of an OpenFace column.
+        """
+        return f"{col}_sumsq"
+
+    @staticmethod
+    def cross_column(col_a: str, col_b: str) -> str:
+        """
+        Returns the name of the column holding the sum of cross products of
+        two (different) CROSS_COLS columns. The order of the columns does not matter.
+        """
+        col_a, col_b = sorted([col_a, col_b], key=CROSS_COLS.index)
+        return f"{col_a}_{col_b}_cross"
+
+    @staticmethod
+    def stat_expressions() -> Dict[str, str]:
+        """
+        Returns the statistic columns, with the SQL expression computing
+        each of them from openface_features.
+
+        Returns:
+            Dict[str, str]: Column name -> SQL aggregate expression.
+        """
+        expressions: Dict[str, str] = {}
+        for col in SUM_COLS:
+            expressions[OpenfaceSubjectStats.sum_column(col)] = f'SUM("{col}")'
+            expressions[
+                OpenfaceSubjectStats.sumsq_column(col)
+            ] = f'SUM("{col}" * "{col}")'
+        for idx, col_a in enumerate(CROSS_COLS):
+            for col_b in CROSS_COLS[idx + 1 :]:
+                expressions[
+                    OpenfaceSubjectStats.cross_column(col_a, col_b)
+                ] = f'SUM("{col_a}" * "{col_b}")'
+
+        return expressions
+
+    @staticmethod
+    def stat_columns() -> List[str]:
+        """
+        Returns the names of all statistic columns.
+        """
+        return list(OpenfaceSubjectStats.stat_expressions())
+
+    @staticmethod
+    def init_table_query() -> List[str]:
+        """
+        Return the SQL queries to create the 'openface_subject_stats' table.
+        """
+        stat_cols_query = ",\n".join(
+            [f'"{col}" FLOAT' for col in OpenfaceSubjectStats.stat_columns()]
+        )
+
+        sql_query = f"""
+        CREATE TABLE IF NOT EXISTS openface_subject_stats (
+            interview_name TEXT NOT NULL,
+            subject_id TEXT NOT NULL,
+            study_id TEXT NOT NULL,
+            ir_role TEXT NOT NULL,
+            frame_count INTEGER NOT NULL,
+            {stat_cols_query},
+            obs_timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (interview_name, ir_role)
+        );
+        """
+
+        index_query = """
+        CREATE INDEX IF NOT EXISTS openface_subject_stats_subject_id_index
+        ON openface_subject_stats (subject_id, ir_role);
+        """
+
+        return [sql_query, index_query]
+
+    @staticmethod
+    def drop_table_query() -> str:
+        """
+        Return the SQL query to drop the 'openface_subject_stats' table.
+        """
+        sql_query = """
+        DROP TABLE IF EXISTS openface_subject_stats;
+        """
+        return sql_query
+
+    @staticmethod
+    def rebuild_query(subject_id: Optional[str] = None) -> str:
+        """
+        Return the SQL query to recompute the statistics from openface_features.
+
+        Interviews without successful frames get a row with a frame count of 0,
+        as load_openface writes them, so every loaded interview is covered.
+
+        Args:
+            subject_id (Optional[str]): Only rebuild the statistics of this
+                subject. Defaults to None (all subjects).
+        """
+        expressions = OpenfaceSubjectStats.stat_expressions()
+        stat_cols = ", ".join([f'"{col}"' for col in expressions])
+        stat_exprs = ",\n".join(
+            [f"{expr} FILTER (WHERE success = TRUE)" for expr in expressions.values()]
+        )
+        update_cols = ",\n".join([f'"{col}" = EXCLUDED."{col}"' for col in expressions])
+
+        subject_filter = ""
+        if subject_id is not None:
+            subject_filter = f"AND subject_id = '{subject_id}'"
+
+        sql_query = f"""
+        INSERT INTO openface_subject_stats (
+            interview_name, subject_id, study_id, ir_role, frame_count, {stat_cols}
+        )
+        SELECT
+            interview_name, subject_id, study_id, ir_role,
+            COUNT(*) FILTER (WHERE success = TRUE),
+            {stat_exprs}
+        FROM openface_features
+        WHERE TRUE {subject_filter}
+        GROUP BY interview_name, subject_id, study_id, ir_role
+        ON CONFLICT (interview_name, ir_role) DO UPDATE SET
+            frame_count = EXCLUDED.frame_count,
+            {update_cols},
+            obs_timestamp = CURRENT_TIMESTAMP;
+        """
+
+        return sql_query
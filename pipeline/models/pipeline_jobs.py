@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+"""
+PipelineJob Model
+"""
+
+import sys
+from pathlib import Path
+
+file = Path(__file__).resolve()
+parent = file.parent
+ROOT = None
+for parent in file.parents:
+    if parent.name == "av-pipeline-v2":
+        ROOT = parent
+sys.path.append(str(ROOT))
+
+# remove current directory from path
+try:
+    sys.path.remove(str(parent))
+except ValueError:
+    pass
+
+from typing import List
+
+from pipeline.helpers import db, utils
+
+console = utils.get_console()
+
+
+class PipelineJob:
+    """
+    Represents a row in the 'pipeline_jobs' table.
+
+    A job is a unit of work (file / interview) for a pipeline stage.
+    Runners claim pending jobs with a lease, which is extended by heartbeats
+    while the job is being processed. Jobs with expired leases are returned
+    to the queue, or marked as failed after too many attempts.
+
+    Attributes:
+        pj_stage (str): The pipeline stage the job belongs to.
+        pj_item (str): The item to process (e.g. file path or interview name).
+        study_id (str): The study the item belongs to.
+        pj_state (str): One of 'pending', 'running', 'done' or 'failed'.
+    """
+
+    def __init__(
+        self,
+        pj_stage: str,
+        pj_item: str,
+        study_id: str,
+        pj_state: str = "pending",
+    ):
+        self.pj_stage = pj_stage
+        self.pj_item = pj_item
+        self.study_id = study_id
+        self.pj_state = pj_state
+
+    def __repr__(self):
+        return f"PipelineJob({self.pj_stage}, {self.pj_item}, {self.pj_state})"
+
+    def __str__(self):
+        return self.__repr__()
+
+    @staticmethod
+    def init_table_query() -> List[str]:
+        """
+        Return the SQL queries to create the 'pipeline_jobs' table, and its indexes.
+        """
+        create_sql_query = """
+        CREATE TABLE IF NOT EXISTS pipeline_jobs (
+            pj_stage TEXT NOT NULL,
+            pj_item TEXT NOT NULL,
+            study_id TEXT NOT NULL,
+            pj_state TEXT NOT NULL DEFAULT 'pending',
+            pj_attempts INTEGER NOT NULL DEFAULT 0,
+            pj_claimed_by TEXT,
+            pj_lease_expires TIMESTAMP,
+            pj_heartbeat TIMESTAMP,
+            pj_created TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            pj_updated TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (pj_stage, pj_item)
+        );
+        """
+
+        pending_index_query = """
+        CREATE INDEX IF NOT EXISTS pipeline_jobs_pending_index
+        ON pipeline_jobs (pj_stage, study_id, pj_created)
+        WHERE pj_state = 'pending';
+        """
+
+        lease_index_query = """
+        CREATE INDEX IF NOT EXISTS pipeline_jobs_lease_index
+        ON pipeline_jobs (pj_stage, pj_lease_expires)
+        WHERE pj_state = 'running';
+        """
+
+        return [create_sql_query, pending_index_query, lease_index_query]
+
+    @staticmethod
+    def drop_table_query() -> str:
+        """
+        Return the SQL query to drop the 'pipeline_jobs' table.
+        """
+        sql_query = """
+        DROP TABLE IF EXISTS pipeline_jobs;
+        """
+
+        return sql_query
+
+    @staticmethod
+    def enqueue_query(stage: str, study_id: str, items_query: str) -> str:
+        """
+        Return the SQL query to add the items returned by 'items_query' to the queue.
+
+        Items that were already completed, but are returned again (e.g. after
+        being wiped), are re-queued. Running and failed jobs are left untouched.
+
+        Args:
+            stage (str): The pipeline stage.
+            study_id (str): The study ID.
+            items_query (str): A SELECT query returning a single 'item' column.
+
+        Returns:
+            str: SQL query to enqueue the items
+        """
+        items_query = items_query.strip().rstrip(";")
+
+        sql_query = f"""
+        INSERT INTO pipeline_jobs (pj_stage, pj_item, study_id)
+        SELECT DISTINCT '{stage}', items.item, '{study_id}'
+        FROM ({items_query}) AS items
+        ON CONFLICT (pj_stage, pj_item) DO UPDATE SET
+            pj_state = 'pending',
+            pj_attempts = 0,
+            pj_claimed_by = NULL,
+            pj_lease_expires = NULL,
+            pj_created = CURRENT_TIMESTAMP,
+            pj_updated = CURRENT_TIMESTAMP
+        WHERE pipeline_jobs.pj_state = 'done';
+        """
+
+        return sql_query
+
+    @staticmethod
+    def release_expired_query(stage: str, max_attempts: int) -> str:
+        """
+        Return the SQL query to release jobs whose lease has expired.
+
+        Args:
+            stage (str): The pipeline stage.
+            max_attempts (int): Jobs with this many attempts are marked as failed.
+
+        Returns:
+            str: SQL query to release the expired jobs
+        """
+        sql_query = f"""
+        UPDATE pipeline_jobs
+        SET pj_state = CASE
+                WHEN pj_attempts >= {max_attempts} THEN 'failed'
+                ELSE 'pending'
+            END,
+            pj_claimed_by = NULL,
+            pj_lease_expires = NULL,
+            pj_updated = CURRENT_TIMESTAMP
+        WHERE pj_stage = '{stage}' AND
+            pj_state = 'running' AND
+            pj_lease_expires < CURRENT_TIMESTAMP;
+        """
+
+        return sql_query
+
+    @staticmethod
+    def claim_query(stage: str, study_id: str, worker: str, lease_seconds: int) -> str:
+        """
+        Return the SQL query to claim the oldest pending job of a stage.
+
+        Uses 'FOR UPDATE SKIP LOCKED', so concurrent runners never claim the same job.
+
+        Args:
+            stage (str): The pipeline stage.
+            study_id (str): The study ID.
+            worker (str): Identifier of the claiming runner.
+            lease_seconds (int): The duration of the lease.
+
+        Returns:
+            str: SQL query to claim a job, returning the claimed item
+        """
+        sql_query = f"""
+        UPDATE pipeline_jobs
+        SET pj_state = 'running',
+            pj_claimed_by = '{worker}',
+            pj_attempts = pj_attempts + 1,
+            pj_heartbeat = CURRENT_TIMESTAMP,
+            pj_lease_expires = CURRENT_TIMESTAMP + INTERVAL '{lease_seconds} seconds',
+            pj_updated = CURRENT_TIMESTAMP
+        WHERE (pj_stage, pj_item) IN (
+            SELECT pj_stage, pj_item
+            FROM pipeline_jobs
+            WHERE pj_stage = '{stage}' AND
+                study_id = '{study_id}' AND
+                pj_state = 'pending'
+            ORDER BY pj_created
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING pj_item;
+        """
+
+        return sql_query
+
+    @staticmethod
+    def claim_item_query(stage: str, item: str, worker: str, lease_seconds: int) -> str:
+        """
+        Return the SQL query to claim a specific pending job.
+
+        Args:
+            stage (str): The pipeline stage.
+            item (str): The item to claim.
+            worker (str): Identifier of the claiming runner.
+            lease_seconds (int): The duration of the lease.
+
+        Returns:
+            str: SQL query to claim the job, returning the item if claimed
+        """
+        item = db.santize_string(item)
+
+        sql_query = f"""
+        UPDATE pipeline_jobs
+        SET pj_state = 'running',
+            pj_claimed_by = '{worker}',
+            pj_attempts = pj_attempts + 1,
+            pj_heartbeat = CURRENT_TIMESTAMP,
+            pj_lease_expires = CURRENT_TIMESTAMP + INTERVAL '{lease_seconds} seconds',
+            pj_updated = CURRENT_TIMESTAMP
+        WHERE (pj_stage, pj_item) IN (
+            SELECT pj_stage, pj_item
+            FROM pipeline_jobs
+            WHERE pj_stage = '{stage}' AND
+                pj_item = '{item}' AND
+                pj_state = 'pending'
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING pj_item;
+        """
+
+        return sql_query
+
+    @staticmethod
+    def heartbeat_query(stage: str, item: str, worker: str, lease_seconds: int) -> str:
+        """
+        Return the SQL query to extend the lease of a running job.
+
+        Args:
+            stage (str): The pipeline stage.
+            item (str): The item being processed.
+            worker (str): Identifier of the runner holding the lease.
+            lease_seconds (int): The duration of the extended lease.
+
+        Returns:
+            str: SQL query to extend the lease
+        """
+        item = db.santize_string(item)
+
+        sql_query = f"""
+        UPDATE pipeline_jobs
+        SET pj_heartbeat = CURRENT_TIMESTAMP,
+            pj_lease_expires = CURRENT_TIMESTAMP + INTERVAL '{lease_seconds} seconds'
+        WHERE pj_stage = '{stage}' AND
+            pj_item = '{item}' AND
+            pj_claimed_by = '{worker}' AND
+            pj_state = 'running';
+        """
+
+        return sql_query
+
+    @staticmethod
+    def set_state_query(stage: str, item: str, state: str, worker: str) -> str:
+        """
+        Return the SQL query to set the state of a job.
+
+        Only applies to the job if it is still claimed by 'worker': a runner
+        whose lease expired can not change a job another runner has claimed since.
+
+        Args:
+            stage (str): The pipeline stage.
+            item (str): The item.
+            state (str): The new state ('done' or 'failed').
+            worker (str): Identifier of the runner holding the lease.
+
+        Returns:
+            str: SQL query to update the job
+        """
+        item = db.santize_string(item)
+
+        sql_query = f"""
+        UPDATE pipeline_jobs
+        SET pj_state = '{state}',
+            pj_lease_expires = NULL,
+            pj_updated = CURRENT_TIMESTAMP
+        WHERE pj_stage = '{stage}' AND
+            pj_item = '{item}' AND
+            pj_claimed_by = '{worker}';
+        """
+
+        return sql_query
+
+    @staticmethod
+    def release_query(stage: str, item: str, worker: str) -> str:
+        """
+        Return the SQL query to return a running job to the queue, without
+        counting the attempt.
+
+        The job is moved to the back of the queue, so that the runner does
+        not claim it again right away.
+
+        Args:
+            stage (str): The pipeline stage.
+            item (str): The item.
+            worker (str): Identifier of the runner holding the lease.
+
+        Returns:
+            str: SQL query to release the job
+        """
+        item = db.santize_string(item)
+
+        sql_query = f"""
+        UPDATE pipeline_jobs
+        SET pj_state = 'pending',
+            pj_attempts = GREATEST(pj_attempts - 1, 0),
+            pj_claimed_by = NULL,
+            pj_lease_expires = NULL,
+            pj_created = CURRENT_TIMESTAMP,
+            pj_updated = CURRENT_TIMESTAMP
+        WHERE pj_stage = '{stage}' AND
+            pj_item = '{item}' AND
+            pj_claimed_by = '{worker}' AND
+            pj_state = 'running';
+        """
+
+        return sql_query
+
+
+if __name__ == "__main__":
+    config_file = utils.get_config_file_path()
+
+    console.log("Initializing 'pipeline_jobs' table...")
+    console.log("[red]This will delete all existing data in the 'pipeline_jobs' table!")
+
+    drop_queries = [PipelineJob.drop_table_query()]
+    create_queries = PipelineJob.init_table_query()
+
+    sql_queries = drop_queries + create_queries
+
+    db.execute_queries(config_file=config_file, queries=sql_queries, show_commands=True)
+
+    console.log("'pipeline_jobs' table initialized.")
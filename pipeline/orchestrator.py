@@ -6,7 +6,7 @@ import logging
 import sys
 import time
 from pathlib import Path
-from typing import List, Literal
+from typing import List, Literal, Optional
 
 from pipeline.helpers import db, cli, notifications
 from pipeline.helpers.config import config
@@ -159,12 +159,17 @@ def get_decryption_count(config_file: Path) -> int:
     return num_to_decrypt
 
 
-def snooze(config_file: Path) -> None:
+def snooze(config_file: Path, channels: Optional[List[str]] = None) -> None:
     """
     Sleeps for a specified amount of time.
 
+    If 'channels' are given, wakes up as soon as an upstream stage
+    publishes a notification on any of them, with the snooze time
+    as the maximum wait.
+
     Args:
         config_file (str): The path to the configuration file.
+        channels (Optional[List[str]]): The notification channels to listen on.
 
     Returns:
         None
@@ -178,15 +183,39 @@ def snooze(config_file: Path) -> None:
         )
         sys.exit(0)
 
-    logger.info(
-        f"[bold green]No file to process. Snoozing for {snooze_time_seconds} seconds...",
-        extra={"markup": True},
+    if channels:
+        logger.info(
+            f"[bold green]No file to process. Waiting for {', '.join(channels)} "
+            f"(up to {snooze_time_seconds} seconds)...",
+            extra={"markup": True},
+        )
+    else:
+        logger.info(
+            f"[bold green]No file to process. Snoozing for {snooze_time_seconds} seconds...",
+            extra={"markup": True},
+        )
+
+    pool_stats = db.get_pool_stats()
+    logger.debug(
+        f"DB connection pool: {pool_stats['hits']} hits, {pool_stats['misses']} misses"
     )
 
     # Sleep for snooze_time_seconds
     # Catch KeyboardInterrupt to allow the user to stop snoozing
     try:
-        time.sleep(snooze_time_seconds)
+        if channels:
+            notified = db.wait_for_notification(
+                config_file=config_file,
+                channels=channels,
+                timeout=snooze_time_seconds,
+            )
+            if notified:
+                logger.info(
+                    f"[bold green]Woken up by {', '.join(notified)}.",
+                    extra={"markup": True},
+                )
+        else:
+            time.sleep(snooze_time_seconds)
     except KeyboardInterrupt:
         try:
             logger.info("[bold red]Snooze interrupted by user.", extra={"markup": True})
@@ -0,0 +1,126 @@
+"""
+Renders the images for a page of the report (heatmaps and sample images).
+
+Rendering is independent per page, and is done in a process pool. Only
+drawing the images on the canvas is done serially. Snapshot frames are
+extracted for all pages at once, see
+report.video.heatmaps.extract_snapshot_frames_batch.
+"""
+
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from pipeline import constants
+from pipeline.helpers import db, utils
+from pipeline.helpers.plot import heatmaps
+from pipeline.helpers.timer import Timer
+from pipeline.models.interview_roles import InterviewRole
+from pipeline.models.lite.page_assets import PageAssets
+from pipeline.report.video import qc
+
+
+def get_render_workers(config_file: Path) -> int:
+    """
+    Returns the number of processes used to render report pages.
+
+    Args:
+        config_file (Path): Path to the config file.
+
+    Returns:
+        int: Number of processes. Defaults to 1.
+    """
+    report_params = utils.config(config_file, section="report_generation")
+    return max(1, int(report_params.get("render_workers", 1)))
+
+
+def render_page_assets(
+    config_file: Path,
+    interview_name: str,
+    page_number: int,
+    start_time: timedelta,
+    end_time: timedelta,
+    bin_means: Dict[InterviewRole, pd.DataFrame],
+    fau_avgs: pd.Series,
+    fau_stds: pd.Series,
+    bins_per_page: int,
+    fau_h_idx: List[int],
+    out_dir: Path,
+    deidentify: bool,
+    openface_paths: Optional[Dict[InterviewRole, Path]] = None,
+) -> PageAssets:
+    """
+    Renders the heatmaps and sample image of each role, for a page.
+
+    Args:
+        config_file (Path): Path to the config file.
+        interview_name (str): DPDash name of the Interview.
+        page_number (int): The page number.
+        start_time (timedelta): The start time of the page.
+        end_time (timedelta): The end time of the page.
+        bin_means (Dict[InterviewRole, pd.DataFrame]): The mean of each OpenFace
+            column per bin on the page, for each role.
+        fau_avgs (pd.Series): The average values for each AU.
+        fau_stds (pd.Series): The standard deviation values for each AU.
+        bins_per_page (int): The number of bins on a page.
+        fau_h_idx (List[int]): The indices of the horizontal gaps in the AU heatmap.
+        out_dir (Path): The directory to write the images to.
+        deidentify (bool): Whether to remove face data from the images.
+        openface_paths (Optional[Dict[InterviewRole, Path]]): OpenFace output
+            directory per role. Defaults to None (look them up in the database).
+
+    Returns:
+        PageAssets: The rendered images.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    heatmap_vid_pose_paths: Dict[InterviewRole, Path] = {}
+    heatmap_vid_fau_paths: Dict[InterviewRole, Path] = {}
+    sample_image_paths: Dict[InterviewRole, Optional[Path]] = {}
+
+    query_counter = db.QueryCounter()
+    with Timer() as timer:
+        for role, role_bin_means in bin_means.items():
+            heatmap_vid_pose_paths[role] = out_dir / f"heatmap_pose_{role.value}.png"
+            heatmaps.make_heatmap(
+                bin_means=role_bin_means,
+                num_bins=bins_per_page,
+                cols=constants.HEADPOSE_COLS + constants.GAZE_COLS,
+                output_path=str(heatmap_vid_pose_paths[role]),
+                heatmap_config=constants.heatmap_config,
+            )
+
+            heatmap_vid_fau_paths[role] = out_dir / f"heatmap_fau_{role.value}.png"
+            heatmaps.make_standard_deviation_heatmap(
+                bin_means=role_bin_means,
+                fau_avgs=fau_avgs,
+                fau_stds=fau_stds,
+                num_bins=bins_per_page,
+                features=constants.AU_LABELS,
+                cols=constants.AU_COLS,
+                output_path=str(heatmap_vid_fau_paths[role]),
+                h_gap_idx=fau_h_idx,
+                heatmap_config=constants.heatmap_config,
+            )
+
+            sample_image_paths[role] = qc.extract_sample_image(
+                interview_name=interview_name,
+                role=role,
+                config_file=config_file,
+                dest_image=out_dir / f"sample_{role.value}.png",
+                deidentify=deidentify,
+                start_time=start_time,
+                end_time=end_time,
+                of_path=openface_paths.get(role) if openface_paths else None,
+            )
+
+    return PageAssets(
+        page_number=page_number,
+        heatmap_vid_pose_paths=heatmap_vid_pose_paths,
+        heatmap_vid_fau_paths=heatmap_vid_fau_paths,
+        sample_image_paths=sample_image_paths,
+        render_time=timer.duration,
+        query_count=query_counter.count,
+    )
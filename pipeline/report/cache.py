@@ -0,0 +1,595 @@
+"""
+Content-addressed cache for reports and their rendered assets.
+
+Cache keys are digests of the inputs a report is rendered from: the OpenFace
+load timestamp, the OpenFace QC and video rows, the version of the subject's
+statistics, the report code version and the [report_generation] parameters.
+
+Layout, under the cache root:
+    reports/<report_key>.pdf          The complete report.
+    pages/<page_key>/                 Images rendered for a page of a report.
+    sections/<section_key>/           Images shared by all pages (correlation matrices).
+
+Regenerating a report whose inputs did not change copies the cached PDF.
+When only some inputs changed, only the pages and sections whose key changed
+are rendered again; the others are read from the cache.
+
+The cache holds reports and video frames, so it lives on the data root
+(the required 'cache_root' of [report_generation]), readable only by the
+pipeline user. Entries not used for 'cache_max_age_days' are evicted by
+prune_cache.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from pipeline import constants
+from pipeline.core import report as core_report
+from pipeline.helpers import db, dpdash, utils
+from pipeline.helpers import hash as hash_helper
+from pipeline.models.interview_roles import InterviewRole
+from pipeline.models.lite.page_assets import PageAssets
+
+logger = logging.getLogger(__name__)
+
+# [report_generation] parameters that do not change the contents of a report
+IGNORED_PARAMS = [
+    "render_workers",
+    "report_workers",
+    "report_worker_max_tasks",
+    "cache_root",
+    "cache_max_age_days",
+]
+
+# Files read by the report, outside of the database
+DATA_FILES = [
+    constants.FAU_METRICS_PT_CACHE,
+    constants.FAU_METRICS_INT_CACHE,
+    constants.DATA_PATH / "correlation_matrix_int.csv",
+]
+
+MANIFEST_FILE = "manifest.json"
+# Marks files and directories being written to the cache
+STAGING_SUFFIX = ".partial-"
+# Age after which staging files and directories are left over from a crash
+STAGING_MAX_AGE = timedelta(days=1)
+# Directories under the cache root, holding one entry per key
+ENTRY_DIRS = ["reports", "pages", "sections"]
+
+
+def get_cache_root(config_file: Path) -> Path:
+    """
+    Returns the root directory of the report cache.
+
+    Args:
+        config_file (Path): Path to the config file.
+
+    Returns:
+        Path: The 'cache_root' of [report_generation].
+
+    Raises:
+        ValueError: If 'cache_root' is not set.
+    """
+    report_params = utils.config(config_file, section="report_generation")
+    cache_root = report_params.get("cache_root")
+    if not cache_root:
+        raise ValueError(
+            f"'cache_root' is not set in [report_generation] of {config_file}. \
+The report cache holds video frames, set it to a directory on the data root."
+        )
+
+    return Path(cache_root)
+
+
+def get_cache_max_age(config_file: Path) -> timedelta:
+    """
+    Returns how long cache entries are kept after they were last used.
+
+    Args:
+        config_file (Path): Path to the config file.
+
+    Returns:
+        timedelta: The 'cache_max_age_days' of [report_generation].
+            Defaults to 30 days.
+    """
+    report_params = utils.config(config_file, section="report_generation")
+    return timedelta(days=float(report_params.get("cache_max_age_days", 30)))
+
+
+@functools.lru_cache(maxsize=1)
+def get_code_digest() -> str:
+    """
+    Returns a digest of the source code that renders reports.
+
+    Covers every module of the pipeline package, and the assets drawn on the
+    reports, so that a change to any code a report depends on (directly or
+    through helpers and models) invalidates the cached reports.
+    Computed once per process.
+    """
+    pipeline_root = Path(__file__).resolve().parents[1]
+    source_files = sorted(
+        list(pipeline_root.rglob("*.py"))
+        + [path for path in (pipeline_root / "assets").rglob("*") if path.is_file()]
+    )
+
+    digest = hashlib.blake2b(digest_size=16)
+    for source_file in source_files:
+        digest.update(str(source_file.relative_to(pipeline_root)).encode())
+        digest.update(source_file.read_bytes())
+
+    return digest.hexdigest()
+
+
+def get_report_params(config_file: Path) -> Dict[str, str]:
+    """
+    Returns the [report_generation] parameters that change the contents of a report.
+    """
+    report_params = utils.config(config_file, section="report_generation")
+    return {
+        key: value for key, value in report_params.items() if key not in IGNORED_PARAMS
+    }
+
+
+def get_file_digest(file_path: Path) -> Optional[str]:
+    """
+    Returns the digest of a file, or None if it does not exist.
+    """
+    if not file_path.exists():
+        return None
+    return hash_helper.compute_hash(file_path=file_path, hash_type="blake2b")
+
+
+def get_frame_digest(df: pd.DataFrame) -> str:
+    """
+    Returns a digest of the contents (values and index) of a DataFrame.
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=True).values
+    digest = hashlib.blake2b(row_hashes.tobytes(), digest_size=16)
+    digest.update(",".join(map(str, df.columns)).encode())
+    return digest.hexdigest()
+
+
+def compute_key(*parts: Any) -> str:
+    """
+    Returns the cache key of a list of JSON serializable inputs.
+    """
+    serialized = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.blake2b(serialized.encode(), digest_size=16).hexdigest()
+
+
+def fetch_subject_stats_version(config_file: Path, subject_id: str) -> Dict[str, Any]:
+    """
+    Fetches the version of a subject's OpenFace statistics: the number of
+    interviews and frames they include, and when they were last updated.
+
+    Args:
+        config_file (Path): Path to the config file.
+        subject_id (str): The subject ID.
+
+    Returns:
+        Dict[str, Any]: The version.
+    """
+    sql_query = f"""
+        SELECT COUNT(*) AS interviews_count,
+            COALESCE(SUM(frame_count), 0) AS frame_count,
+            MAX(obs_timestamp) AS obs_timestamp
+        FROM openface_subject_stats
+        WHERE subject_id = '{subject_id}' AND
+            ir_role = '{InterviewRole.SUBJECT}';
+    """
+
+    results = db.execute_sql(config_file=config_file, query=sql_query, db="openface_db")
+    return results.iloc[0].to_dict()
+
+
+class ReportCache:
+    """
+    Cache keys of a report, and access to its cached PDF and assets.
+
+    Built with ReportCache.get, from the records fetched before the report
+    context is loaded, so that an unchanged report is skipped without
+    loading the OpenFace features.
+
+    Used as a context manager around rendering: on exit, the staging
+    directories of pages that were not added to the cache (e.g. because
+    rendering failed) are removed.
+
+    Attributes:
+        cache_root (Path): Root directory of the cache.
+        assets_key (str): Key of the inputs shared by all rendered images.
+        section_key (str): Key of the images shared by all pages.
+        report_key (str): Key of the complete report.
+    """
+
+    def __init__(
+        self,
+        cache_root: Path,
+        assets_key: str,
+        section_key: str,
+        report_key: str,
+    ):
+        self.cache_root = cache_root
+        self.assets_key = assets_key
+        self.section_key = section_key
+        self.report_key = report_key
+        self.staging_dirs: List[Path] = []
+
+    def __repr__(self):
+        return f"ReportCache(report_key={self.report_key})"
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __enter__(self) -> "ReportCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        for staging_dir in self.staging_dirs:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        self.staging_dirs.clear()
+
+    @staticmethod
+    def get(
+        config_file: Path,
+        interview_name: str,
+        dest_file_name: Path,
+        interview_record: pd.Series,
+        role_records: pd.DataFrame,
+    ) -> "ReportCache":
+        """
+        Computes the cache keys of a report.
+
+        Args:
+            config_file (Path): Path to the config file.
+            interview_name (str): DPDash name of the Interview.
+            dest_file_name (Path): Path the report is saved to (printed on the report).
+            interview_record (pd.Series): See ReportContext.fetch_interview_record.
+            role_records (pd.DataFrame): See ReportContext.fetch_role_records.
+
+        Returns:
+            ReportCache: The report cache.
+        """
+        subject_id = str(dpdash.parse_dpdash_name(interview_name)["subject"])
+
+        # OpenFace outputs, and when they were loaded into the database
+        openface_records = role_records[
+            ["ir_role", "of_processed_path", "lof_timestamp"]
+        ].to_dict(orient="records")
+
+        assets_key = compute_key(
+            core_report.get_report_version(config_file=config_file),
+            get_code_digest(),
+            get_report_params(config_file=config_file),
+            [get_file_digest(data_file) for data_file in DATA_FILES],
+            interview_name,
+            openface_records,
+        )
+        section_key = compute_key(
+            assets_key,
+            fetch_subject_stats_version(config_file=config_file, subject_id=subject_id),
+        )
+        report_key = compute_key(
+            section_key,
+            str(dest_file_name),
+            interview_record.to_dict(),
+            role_records.to_dict(orient="records"),
+        )
+
+        cache_root = get_cache_root(config_file=config_file)
+        cache_root.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+        return ReportCache(
+            cache_root=cache_root,
+            assets_key=assets_key,
+            section_key=section_key,
+            report_key=report_key,
+        )
+
+    def get_page_key(
+        self,
+        start_time: timedelta,
+        end_time: timedelta,
+        bin_means: Dict[InterviewRole, pd.DataFrame],
+    ) -> str:
+        """
+        Returns the cache key of the images of a page.
+
+        Args:
+            start_time (timedelta): The start time of the page.
+            end_time (timedelta): The end time of the page.
+            bin_means (Dict[InterviewRole, pd.DataFrame]): The bin means of the
+                page, for each role.
+        """
+        return compute_key(
+            self.assets_key,
+            start_time.total_seconds(),
+            end_time.total_seconds(),
+            {role.value: get_frame_digest(df) for role, df in bin_means.items()},
+        )
+
+    def get_report_path(self) -> Path:
+        """
+        Returns the path of the cached report.
+        """
+        return self.cache_root / "reports" / f"{self.report_key}.pdf"
+
+    def get_page_dir(self, page_key: str) -> Path:
+        """
+        Returns the directory of the cached images of a page.
+        """
+        return self.cache_root / "pages" / page_key
+
+    def get_staging_dir(self, page_key: str) -> Path:
+        """
+        Returns the directory the images of a page are rendered to, before
+        they are added to the cache. It is removed when the cache context exits.
+        """
+        staging_dir = (
+            self.cache_root / "pages" / f"{page_key}{STAGING_SUFFIX}{os.getpid()}"
+        )
+        self.staging_dirs.append(staging_dir)
+        return staging_dir
+
+    def get_section_path(self, name: str) -> Path:
+        """
+        Returns the path of a cached image shared by all pages.
+        """
+        return self.cache_root / "sections" / self.section_key / name
+
+    def load_section(self, name: str) -> Optional[Path]:
+        """
+        Returns the path of a cached image shared by all pages, if it exists.
+        """
+        section_path = self.get_section_path(name)
+        if not section_path.exists():
+            return None
+
+        touch(section_path.parent)
+        return section_path
+
+    def load_report(self, dest_file_name: Path) -> bool:
+        """
+        Copies the cached report to its destination, if it exists.
+
+        Returns:
+            bool: True if the report was in the cache.
+        """
+        report_path = self.get_report_path()
+        if not report_path.exists():
+            return False
+
+        dest_file_name.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(report_path, dest_file_name)
+        touch(report_path)
+        return True
+
+    def store_report(self, report_path: Path) -> None:
+        """
+        Adds a generated report to the cache.
+        """
+        store_file(source=report_path, dest=self.get_report_path())
+
+    def store_section(self, name: str, source: Path) -> Path:
+        """
+        Adds an image shared by all pages to the cache.
+
+        Returns:
+            Path: The path of the cached image.
+        """
+        dest = self.get_section_path(name)
+        store_file(source=source, dest=dest)
+        return dest
+
+    def load_page_assets(self, page_key: str, page_number: int) -> Optional[PageAssets]:
+        """
+        Loads the cached images of a page.
+
+        Args:
+            page_key (str): The cache key of the page.
+            page_number (int): The page number, in this report.
+
+        Returns:
+            Optional[PageAssets]: The images, or None if they are not cached.
+        """
+        page_dir = self.get_page_dir(page_key)
+        manifest_path = page_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            return None
+
+        touch(page_dir)
+        return read_page_assets(page_dir=page_dir, page_number=page_number)
+
+    def store_page_assets(self, page_key: str, page_assets: PageAssets) -> PageAssets:
+        """
+        Adds the images of a page to the cache. The images (including the
+        snapshot frames) must have been rendered to the staging directory
+        of the page.
+
+        Args:
+            page_key (str): The cache key of the page.
+            page_assets (PageAssets): The rendered images.
+
+        Returns:
+            PageAssets: The images, read from the cache.
+        """
+        staging_dir = self.get_staging_dir(page_key)
+        write_page_manifest(page_dir=staging_dir, page_assets=page_assets)
+
+        page_dir = self.get_page_dir(page_key)
+        try:
+            os.replace(staging_dir, page_dir)
+        except OSError:
+            # Already added by another process, with the same contents
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        cached_assets = read_page_assets(
+            page_dir=page_dir, page_number=page_assets.page_number
+        )
+        cached_assets.render_time = page_assets.render_time
+        cached_assets.query_count = page_assets.query_count
+        return cached_assets
+
+
+def store_file(source: Path, dest: Path) -> None:
+    """
+    Copies a file into the cache, atomically.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    partial = dest.with_name(f"{dest.name}{STAGING_SUFFIX}{os.getpid()}")
+    try:
+        shutil.copyfile(source, partial)
+        os.replace(partial, dest)
+    finally:
+        partial.unlink(missing_ok=True)
+
+
+def touch(path: Path) -> None:
+    """
+    Marks a cache entry as used, so prune_cache keeps it.
+    """
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def remove_entry(path: Path) -> None:
+    """
+    Removes a cache entry (a file or a directory).
+    """
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+def prune_cache(config_file: Path) -> None:
+    """
+    Evicts the cache entries (reports, pages and sections) not used for
+    'cache_max_age_days', and the staging files and directories left over
+    by processes that crashed while writing to the cache.
+
+    Args:
+        config_file (Path): Path to the config file.
+    """
+    cache_root = get_cache_root(config_file=config_file)
+    max_age_seconds = get_cache_max_age(config_file=config_file).total_seconds()
+    staging_max_age_seconds = STAGING_MAX_AGE.total_seconds()
+
+    now = time.time()
+    evicted_count = 0
+    for entry_dir in ENTRY_DIRS:
+        try:
+            entries = list(os.scandir(cache_root / entry_dir))
+        except FileNotFoundError:
+            continue
+
+        for entry in entries:
+            try:
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+            except FileNotFoundError:
+                continue
+
+            if STAGING_SUFFIX in entry.name:
+                entry_max_age_seconds = staging_max_age_seconds
+            else:
+                entry_max_age_seconds = max_age_seconds
+            if now - mtime < entry_max_age_seconds:
+                continue
+
+            remove_entry(Path(entry.path))
+            evicted_count += 1
+
+    logger.info(f"Pruned report cache {cache_root}: evicted {evicted_count} entries")
+
+
+def write_page_manifest(page_dir: Path, page_assets: PageAssets) -> None:
+    """
+    Writes the snapshot frames and the manifest of the images of a page.
+
+    Args:
+        page_dir (Path): The directory the images were rendered to.
+        page_assets (PageAssets): The rendered images.
+    """
+    manifest: Dict[str, Dict[str, Optional[str]]] = {}
+    for role, pose_path in page_assets.heatmap_vid_pose_paths.items():
+        sample_image_path = page_assets.sample_image_paths.get(role)
+        manifest[role.value] = {
+            "heatmap_pose": pose_path.name,
+            "heatmap_fau": page_assets.heatmap_vid_fau_paths[role].name,
+            "sample_image": sample_image_path.name if sample_image_path else None,
+            "snapshots": None,
+        }
+
+    for role, frames in page_assets.snapshot_frames.items():
+        snapshots_file = f"snapshots_{role.value}.npz"
+        np.savez_compressed(
+            page_dir / snapshots_file,
+            count=np.array(len(frames)),
+            **{
+                f"frame_{idx}": frame
+                for idx, frame in enumerate(frames)
+                if frame is not None
+            },
+        )
+        manifest[role.value]["snapshots"] = snapshots_file
+
+    with open(page_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+
+def read_page_assets(page_dir: Path, page_number: int) -> PageAssets:
+    """
+    Reads the images of a page, written by write_page_manifest.
+
+    Args:
+        page_dir (Path): The directory of the images.
+        page_number (int): The page number, in this report.
+
+    Returns:
+        PageAssets: The images.
+    """
+    with open(page_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    heatmap_vid_pose_paths: Dict[InterviewRole, Path] = {}
+    heatmap_vid_fau_paths: Dict[InterviewRole, Path] = {}
+    sample_image_paths: Dict[InterviewRole, Optional[Path]] = {}
+    snapshot_frames: Dict[InterviewRole, List[Optional[np.ndarray]]] = {}
+
+    for role_value, role_manifest in manifest.items():
+        role = InterviewRole(role_value)
+        heatmap_vid_pose_paths[role] = page_dir / role_manifest["heatmap_pose"]
+        heatmap_vid_fau_paths[role] = page_dir / role_manifest["heatmap_fau"]
+        sample_image_paths[role] = (
+            page_dir / role_manifest["sample_image"]
+            if role_manifest["sample_image"]
+            else None
+        )
+
+        if role_manifest["snapshots"] is not None:
+            with np.load(page_dir / role_manifest["snapshots"]) as snapshots:
+                frames: List[Optional[np.ndarray]] = [None] * int(snapshots["count"])
+                for idx in range(len(frames)):
+                    if f"frame_{idx}" in snapshots:
+                        frames[idx] = snapshots[f"frame_{idx}"]
+            snapshot_frames[role] = frames
+
+    return PageAssets(
+        page_number=page_number,
+        heatmap_vid_pose_paths=heatmap_vid_pose_paths,
+        heatmap_vid_fau_paths=heatmap_vid_fau_paths,
+        sample_image_paths=sample_image_paths,
+        snapshot_frames=snapshot_frames,
+    )
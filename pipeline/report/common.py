@@ -3,13 +3,14 @@ Common functions for report generation.
 """
 
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from reportlab.pdfgen import canvas
 
 from pipeline import core
 from pipeline.helpers import pdf
 from pipeline.models.lite.interview_metadata import InterviewMetadata
+from pipeline.models.lite.report_context import ReportContext
 from pipeline.models.lite.ticks_config import TicksConfig
 
 
@@ -147,6 +148,7 @@ def print_visit_and_participant_metadata(
     interview_metadata: InterviewMetadata,
     config_file: Path,
     data_type: str,
+    report_context: Optional[ReportContext] = None,
 ) -> None:
     """
     Prints the visit and participant metadata on the canvas.
@@ -156,6 +158,8 @@ def print_visit_and_participant_metadata(
         interview_metadata (InterviewMetadata): The interview metadata.
         config_file (Path): The path to the configuration file.
         data_type (str): The type of data, either "video" or "audio".
+        report_context (Optional[ReportContext]): Counts already loaded for
+            the report. Defaults to None (fetch them from the database).
 
     Returns:
         None
@@ -168,12 +172,16 @@ def print_visit_and_participant_metadata(
     n_of_bot_vid = heatmap_legend_bottom_vid - 4
     n_of_bot_aud = heatmap_legend_bottom_aud - 4
 
-    study_visits_count = core.get_study_visits_count(
-        study_id=study_id, config_file=config_file
-    )
-    study_subjects_count = core.get_study_subjects_count(
-        study_id=study_id, config_file=config_file
-    )
+    if report_context is not None:
+        study_visits_count = report_context.study_visits_count
+        study_subjects_count = report_context.study_subjects_count
+    else:
+        study_visits_count = core.get_study_visits_count(
+            study_id=study_id, config_file=config_file
+        )
+        study_subjects_count = core.get_study_subjects_count(
+            study_id=study_id, config_file=config_file
+        )
     n_of_text = (
         "n = "
         + str(study_visits_count)
@@ -2,24 +2,119 @@
 Generates a report for the Interview.
 """
 
+import logging
 import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import timedelta
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 
 import numpy as np
 import pandas as pd
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 
-from pipeline import constants, core
+from pipeline import constants
 from pipeline.core import report
-from pipeline.helpers import dpdash, utils
+from pipeline.helpers import db, utils
 from pipeline.helpers.config import config
-from pipeline.helpers.plot import corr_matrix, heatmaps
+from pipeline.helpers.plot import corr_matrix
+from pipeline.helpers.timer import Timer
 from pipeline.models.interview_roles import InterviewRole
-from pipeline.models.lite.interview_metadata import InterviewMetadata
+from pipeline.models.lite.page_assets import PageAssets
+from pipeline.models.lite.report_context import ReportContext
+from pipeline.models.openface_bin_stats import STAT_COLS, OpenfaceBinStats
+from pipeline.report import assets as report_assets
 from pipeline.report import common, header, video
+from pipeline.report.cache import ReportCache
+from pipeline.report.video import heatmaps as video_heatmaps
+
+logger = logging.getLogger(__name__)
+
+
+def get_pages_bin_means(
+    bin_stats: pd.DataFrame, num_pages: int, bins_per_page: int
+) -> List[pd.DataFrame]:
+    """
+    Returns the mean of each OpenFace column, for the bins on each page.
+
+    The bins are sorted once, and the bins of each page are located with
+    a binary search, instead of filtering all bins for every page.
+
+    Args:
+        bin_stats (pd.DataFrame): The bin statistics of the interview.
+        num_pages (int): The number of pages.
+        bins_per_page (int): The number of bins on a page.
+
+    Returns:
+        List[pd.DataFrame]: The means of each page, with OpenFace column names,
+            indexed by bin (0 to bins_per_page - 1) relative to the page.
+    """
+    if not bin_stats["bin"].is_monotonic_increasing:
+        bin_stats = bin_stats.sort_values("bin")
+
+    mean_cols = {OpenfaceBinStats.stat_column(col, "mean"): col for col in STAT_COLS}
+    all_bin_means = bin_stats[list(mean_cols)].rename(columns=mean_cols)
+
+    bins = bin_stats["bin"].to_numpy()
+    first_bins = np.arange(num_pages + 1) * bins_per_page
+    page_bounds = np.searchsorted(bins, first_bins, side="left")
+
+    pages_bin_means: List[pd.DataFrame] = []
+    for page_idx in range(num_pages):
+        start, end = page_bounds[page_idx], page_bounds[page_idx + 1]
+        pages_bin_means.append(
+            all_bin_means.iloc[start:end].set_axis(
+                bins[start:end] - first_bins[page_idx], axis=0
+            )
+        )
+
+    return pages_bin_means
+
+
+def get_correlation_matrix_path(
+    interview_name: str,
+    role: InterviewRole,
+    config_file: Path,
+    fau_h_idx: List[int],
+    report_context: ReportContext,
+    report_cache: ReportCache,
+) -> Path:
+    """
+    Returns the correlation matrix plot of a role, from the report cache,
+    generating it if it is not cached.
+
+    Args:
+        interview_name (str): DPDash name of the Interview.
+        role (InterviewRole): The role.
+        config_file (Path): Path to the config file.
+        fau_h_idx (List[int]): The indices of the gaps in the correlation matrix.
+        report_context (ReportContext): The report context.
+        report_cache (ReportCache): The report cache.
+
+    Returns:
+        Path: Path to the plot.
+    """
+    name = f"correlation_matrix_{role.value}.png"
+    cached_path = report_cache.load_section(name)
+    if cached_path is not None:
+        return cached_path
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_path = Path(temp_dir) / name
+        corr_matrix.generate_correlation_matric(
+            interview_name=interview_name,
+            role=role,
+            output_path=output_path,
+            heatmap_config=constants.heatmap_config,
+            config_file_path=str(config_file),
+            gap_idx=fau_h_idx,
+            au_cols=constants.AU_COLS,
+            data_path=constants.DATA_PATH,
+            report_context=report_context,
+        )
+
+        return report_cache.store_section(name=name, source=output_path)
 
 
 def generate_report(
@@ -30,6 +125,10 @@ def generate_report(
     """
     Generates a report for the Interview.
 
+    If the inputs of the report did not change since it was last generated,
+    the report is copied from the report cache. Otherwise, only the pages
+    whose inputs changed are rendered again.
+
     Args:
         interview_name (str): DPDash name of the Interview.
         dest_file_name (Path): Path to save the report.
@@ -39,6 +138,7 @@ def generate_report(
         None if the report was generated successfully, else an error message.
     """
     console = utils.get_console()
+    query_counter = db.QueryCounter()
 
     report_params = config(config_file, section="report_generation")
     fau_h_idx: List[int] = []
@@ -52,93 +152,76 @@ def generate_report(
     for idx in fau_gap_indices:
         fau_h_idx.append(int(idx))
 
-    dp_dash_dict = dpdash.parse_dpdash_name(interview_name)
-    subject_id = dp_dash_dict["subject"]
-    study_id = dp_dash_dict["study"]
-
-    interview_metadata = InterviewMetadata.get(
-        interview_name=interview_name, config_file=config_file
+    # Skip unchanged reports, before loading the OpenFace features
+    interview_record = ReportContext.fetch_interview_record(
+        config_file=config_file, interview_name=interview_name
     )
-
-    required_cols = (
-        ["timestamp"]
-        + constants.HEADPOSE_COLS
-        + constants.GAZE_COLS
-        + constants.AU_COLS
+    role_records = ReportContext.fetch_role_records(
+        config_file=config_file, interview_name=interview_name
     )
+    report_cache = ReportCache.get(
+        config_file=config_file,
+        interview_name=interview_name,
+        dest_file_name=dest_file_name,
+        interview_record=interview_record,
+        role_records=role_records,
+    )
+    if report_cache.load_report(dest_file_name=dest_file_name):
+        logger.info(
+            f"Report inputs unchanged, copied cached report {report_cache.report_key}"
+        )
+        return None
 
-    # Fetch OpenFace features for PT and INT from DB
-    with console.status("Fetching OpenFace features...") as status:
-        status.update("Fetching OpenFace features for subject...")
-        of_pt_session = core.fetch_openface_features(
-            interview_name=interview_name,
-            subject_id=subject_id,
-            study_id=study_id,
-            role=InterviewRole.SUBJECT,
-            cols=required_cols,
+    # Load everything the report needs from the database, once
+    with console.status("Loading report context..."), Timer() as timer:
+        report_context = ReportContext.get(
             config_file=config_file,
+            interview_name=interview_name,
+            bin_size=bin_size,
+            interview_record=interview_record,
+            role_records=role_records,
+        )
+    logger.info(
+        f"Loaded report context in {timer.duration:.2f} seconds \
+({query_counter.count} queries)"
+    )
+    interview_metadata = report_context.interview_metadata
+
+    with console.status("Fetching OpenFace bin statistics...") as status:
+        of_pt_bin_stats = report_context.get_bin_stats(
+            role=InterviewRole.SUBJECT, bin_size=bin_size
         )
-        try:
-            of_pt_session["timestamp"] = of_pt_session["timestamp"].apply(
-                utils.datetime_time_to_float
-            )
-        except AttributeError:
-            pass
 
         if interview_metadata.has_interviewer_stream:
-            status.update("Fetching OpenFace features for interviewer...")
-            of_int_session = core.fetch_openface_features(
-                interview_name=interview_name,
-                subject_id=subject_id,
-                study_id=study_id,
-                role=InterviewRole.INTERVIEWER,
-                cols=required_cols,
-                config_file=config_file,
+            of_int_bin_stats = report_context.get_bin_stats(
+                role=InterviewRole.INTERVIEWER, bin_size=bin_size
             )
-            try:
-                of_int_session["timestamp"] = of_int_session["timestamp"].apply(
-                    utils.datetime_time_to_float
-                )
-            except AttributeError:
-                pass
-
-        temp_files_common: List[tempfile.NamedTemporaryFile] = []  # type: ignore
-
-        correlation_matrix_pt_path = tempfile.NamedTemporaryFile(suffix=".png")
-        temp_files_common.append(correlation_matrix_pt_path)
-
-        correlation_matrix_int_path = tempfile.NamedTemporaryFile(suffix=".png")
-        temp_files_common.append(correlation_matrix_int_path)
 
         console.log("Generating correlation matrices...")
         status.update("Generating correlation for subject...")
-        corr_matrix.generate_correlation_matric(
+        correlation_matrix_pt_path = get_correlation_matrix_path(
             interview_name=interview_name,
             role=InterviewRole.SUBJECT,
-            output_path=correlation_matrix_pt_path,  # type: ignore
-            heatmap_config=constants.heatmap_config,
-            config_file_path=str(config_file),
-            gap_idx=fau_h_idx,
-            au_cols=constants.AU_COLS,
-            data_path=constants.DATA_PATH,
+            config_file=config_file,
+            fau_h_idx=fau_h_idx,
+            report_context=report_context,
+            report_cache=report_cache,
         )
 
         status.update("Generating correlation for interviewer...")
-        corr_matrix.generate_correlation_matric(
+        correlation_matrix_int_path = get_correlation_matrix_path(
             interview_name=interview_name,
             role=InterviewRole.INTERVIEWER,
-            output_path=correlation_matrix_int_path,  # type: ignore
-            heatmap_config=constants.heatmap_config,
-            config_file_path=str(config_file),
-            gap_idx=fau_h_idx,
-            au_cols=constants.AU_COLS,
-            data_path=constants.DATA_PATH,
+            config_file=config_file,
+            fau_h_idx=fau_h_idx,
+            report_context=report_context,
+            report_cache=report_cache,
         )
 
         console.log("Starting report generation...")
 
-        min_timestamp = of_pt_session["timestamp"].min()
-        max_timestamp = of_pt_session["timestamp"].max()
+        min_timestamp = of_pt_bin_stats["timestamp_min"].min()
+        max_timestamp = of_pt_bin_stats["timestamp_max"].max()
         duration = max_timestamp - min_timestamp
 
         # Check if the duration is NaN
@@ -151,202 +234,228 @@ def generate_report(
         seconds_per_page = bin_size * bins_per_page
 
         status.update(f"Splitting Interview into {seconds_per_page} second chunks...")
-        of_pt_session_parts = []
-        of_int_session_parts = []
-
-        for i in range(0, int(duration), seconds_per_page):
-            of_pt_session_parts.append(
-                of_pt_session[
-                    (of_pt_session["timestamp"] >= i)
-                    & (of_pt_session["timestamp"] < i + seconds_per_page)
-                ]
+        num_pages = len(range(0, int(duration), seconds_per_page))
+
+        roles_bin_stats = {InterviewRole.SUBJECT: of_pt_bin_stats}
+        if interview_metadata.has_interviewer_stream:
+            roles_bin_stats[InterviewRole.INTERVIEWER] = of_int_bin_stats  # type: ignore
+
+        roles_pages_bin_means = {
+            role: get_pages_bin_means(
+                bin_stats=role_bin_stats,
+                num_pages=num_pages,
+                bins_per_page=bins_per_page,
             )
-            if interview_metadata.has_interviewer_stream:
-                of_int_session_parts.append(
-                    of_int_session[  # type: ignore
-                        (of_int_session["timestamp"] >= i)  # type: ignore
-                        & (of_int_session["timestamp"] < i + seconds_per_page)  # type: ignore
-                    ]
-                )
-            else:
-                of_int_session_parts.append(None)
+            for role, role_bin_stats in roles_bin_stats.items()
+        }
+        page_bin_means: List[Dict[InterviewRole, pd.DataFrame]] = [
+            {
+                role: pages_bin_means[page_idx]
+                for role, pages_bin_means in roles_pages_bin_means.items()
+            }
+            for page_idx in range(num_pages)
+        ]
 
-        num_pages = len(of_pt_session_parts)
         console.log(f"Report will have {num_pages} pages.")
-        status.update("Starting report generation...")
-
         fau_metrics = pd.read_csv(constants.FAU_METRICS_PT_CACHE)
         # row1 has average of all the rows, row2 has standard deviation of all the rows
         fau_avgs = fau_metrics.iloc[0]
         fau_stds = fau_metrics.iloc[1]
 
-        page_number: int = 1
-        start_timestap: float = 0.0
-        c = canvas.Canvas(filename=str(dest_file_name), pagesize=letter)
-
-        page_number: int = 1
-        start_timestap: float = 0.0
+        # Compute frame frequency as the timesdelta per frame
+        # required to get the desired number of frames
+        num_frames = constants.NUM_FRAMES
+        frame_frequency = timedelta(seconds=seconds_per_page / num_frames)
 
-        for of_pt_part, of_int_part in zip(of_pt_session_parts, of_int_session_parts):
-            console.log(f"Generating page {page_number} of {num_pages}...")
-            duration = bin_size * bins_per_page
+        num_labels = int(bins_per_page / constants.heatmap_config.bins_per_v_gap) + 1
 
-            # Compute frame frequency as the timesdelta per frame
-            # required to get the desired number of frames
-            num_frames = constants.NUM_FRAMES
-            frame_frequency = duration / num_frames
-            frame_frequency = timedelta(seconds=frame_frequency)
-
-            end_timestamp = start_timestap + duration
-
-            start_timedelta = timedelta(seconds=start_timestap)
-            end_timedelta = timedelta(seconds=end_timestamp)
+        roles = [InterviewRole.SUBJECT]
+        if interview_metadata.has_interviewer_stream:
+            roles.append(InterviewRole.INTERVIEWER)
 
-            num_labels = (
-                int(bins_per_page / constants.heatmap_config.bins_per_v_gap) + 1
+        pages = [
+            (
+                timedelta(seconds=page_idx * seconds_per_page),
+                timedelta(seconds=(page_idx + 1) * seconds_per_page),
             )
-            min_labels = utils.create_labels(start_timestap, end_timestamp, num_labels)
+            for page_idx in range(num_pages)
+        ]
 
-            bins = np.linspace(start_timestap, end_timestamp, bins_per_page + 1)
-
-            # Split the data into bins
-            # Reference:
-            # https://stackoverflow.com/questions/20625582/how-to-deal-with-settingwithcopywarning-in-pandas
-            of_pt_part = of_pt_part.iloc[:]  # To avoid SettingWithCopyWarning
-            of_pt_part["bin"] = pd.cut(
-                of_pt_part["timestamp"], bins=bins, labels=False  # type: ignore
-            )
-            if of_int_part is not None:
-                of_int_part = of_int_part.iloc[:]  # To avoid SettingWithCopyWarning
-                of_int_part["bin"] = pd.cut(
-                    of_int_part["timestamp"], bins=bins, labels=False  # type: ignore
-                )  # type: ignore
-
-            temp_files: List[tempfile.NamedTemporaryFile] = []  # type: ignore
-
-            # Generate pose and gaze heatmaps
-            # features = constants.HEADPOSE_FEATURES + constants.GAZE_FEATURES
-            cols = constants.HEADPOSE_COLS + constants.GAZE_COLS
-
-            heatmap_vid_pose_gaze_pt = tempfile.NamedTemporaryFile(suffix=".png")
-            temp_files.append(heatmap_vid_pose_gaze_pt)
-
-            heatmap_vid_pose_gaze_int = tempfile.NamedTemporaryFile(suffix=".png")
-            temp_files.append(heatmap_vid_pose_gaze_int)
-
-            status.update("Generating Pose Heatmap for subject...")
-            heatmaps.make_heatmap(
-                df=of_pt_part,
-                num_bins=bins_per_page,
-                cols=cols,
-                output_path=heatmap_vid_pose_gaze_pt,  # type: ignore
-                heatmap_config=constants.heatmap_config,
+        page_keys = [
+            report_cache.get_page_key(
+                start_time=start_time, end_time=end_time, bin_means=bin_means
             )
+            for (start_time, end_time), bin_means in zip(pages, page_bin_means)
+        ]
 
-            if of_int_part is not None:
-                status.update("Generating Pose Heatmap for interviewer...")
-                heatmaps.make_heatmap(
-                    df=of_int_part,
-                    num_bins=bins_per_page,
-                    cols=cols,
-                    output_path=heatmap_vid_pose_gaze_int,  # type: ignore
-                    heatmap_config=constants.heatmap_config,
-                )
+        render_workers = report_assets.get_render_workers(config_file=config_file)
+        c = canvas.Canvas(filename=str(dest_file_name), pagesize=letter)
 
-            # Generate AU heatmaps
-            heatmap_vid_fau_pt = tempfile.NamedTemporaryFile(suffix=".png")
-            temp_files.append(heatmap_vid_fau_pt)
-
-            heatmap_vid_fau_int = tempfile.NamedTemporaryFile(suffix=".png")
-            temp_files.append(heatmap_vid_fau_int)
-
-            status.update("Generating AU Heatmap for subject...")
-            heatmaps.make_standard_deviation_heatmap(
-                df=of_pt_part,
-                fau_avgs=fau_avgs,
-                fau_stds=fau_stds,
-                num_bins=bins_per_page,
-                features=constants.AU_LABELS,
-                cols=constants.AU_COLS,
-                output_path=heatmap_vid_fau_pt,  # type: ignore
-                h_gap_idx=fau_h_idx,
-                heatmap_config=constants.heatmap_config,
-            )
-            status.update("Generating AU Heatmap for interviewer...")
-            if of_int_part is not None:
-                heatmaps.make_standard_deviation_heatmap(
-                    df=of_int_part,
-                    fau_avgs=fau_avgs,
-                    fau_stds=fau_stds,
-                    num_bins=bins_per_page,
-                    features=constants.AU_LABELS,
-                    cols=constants.AU_COLS,
-                    output_path=heatmap_vid_fau_int,  # type: ignore
-                    h_gap_idx=fau_h_idx,
-                    heatmap_config=constants.heatmap_config,
+        # Staging directories of failed renders are removed when the cache exits
+        with report_cache, ProcessPoolExecutor(max_workers=render_workers) as executor:
+            # Render the images of pages that are not cached, concurrently
+            page_results: List[Union[PageAssets, Future]] = []
+            rendered_pages: List[int] = []
+            for page_idx, page_key in enumerate(page_keys):
+                cached_assets = report_cache.load_page_assets(
+                    page_key=page_key, page_number=page_idx + 1
+                )
+                if cached_assets is not None:
+                    page_results.append(cached_assets)
+                    continue
+
+                rendered_pages.append(page_idx)
+                start_time, end_time = pages[page_idx]
+                page_results.append(
+                    executor.submit(
+                        report_assets.render_page_assets,
+                        config_file=config_file,
+                        interview_name=interview_name,
+                        page_number=page_idx + 1,
+                        start_time=start_time,
+                        end_time=end_time,
+                        bin_means=page_bin_means[page_idx],
+                        fau_avgs=fau_avgs,
+                        fau_stds=fau_stds,
+                        bins_per_page=bins_per_page,
+                        fau_h_idx=fau_h_idx,
+                        out_dir=report_cache.get_staging_dir(page_key),
+                        deidentify=anonymize,
+                        openface_paths=report_context.openface_paths,
+                    )
                 )
 
-            status.update("Constructing header...")
-            header.construct_header(
-                assets_path=constants.ASSETS_PATH,
-                canvas=c,
-                output_path=dest_file_name,
-                interview_metadata=interview_metadata,
-            )
-
-            status.update("Constructing video section...")
-            video.construct_am_report(
-                canvas=c,
-                interview_name=interview_name,
-                start_time=start_timedelta,
-                end_time=end_timedelta,
-                frame_frequency=frame_frequency,
-                interview_metadata=interview_metadata,
-                config_file=config_file,
-                min_labels=min_labels,
-                heatmap_vid_pose_pt_path=Path(heatmap_vid_pose_gaze_pt.name),
-                heatmap_vid_fau_pt_path=Path(heatmap_vid_fau_pt.name),
-                heatmap_vid_pose_int_path=Path(heatmap_vid_pose_gaze_int.name),
-                heatmap_vid_fau_int_path=Path(heatmap_vid_fau_int.name),
-                corr_vid_pt_path=Path(correlation_matrix_pt_path.name),
-                corr_vid_int_path=Path(correlation_matrix_int_path.name),
-                assets_path=constants.ASSETS_PATH,
-                headpose_labels=constants.HEADPOSE_FEATURES,
-                gaze_labels=constants.GAZE_FEATURES,
-                au_labels=constants.AU_LABELS,
-                pose_cols=constants.HEADPOSE_COLS,
-                gaze_cols=constants.GAZE_COLS,
-                au_cols=constants.AU_COLS,
-                ticks_config=constants.ticks_config,
-                cluster_bars_config=constants.cluster_bars_config,
-                data_path=constants.DATA_PATH,
-                deidentified=anonymize,
-            )
-
-            status.update("Writing metadata...")
-            common.print_visit_and_participant_metadata(
-                canvas=c,
-                interview_metadata=interview_metadata,
-                config_file=config_file,
-                data_type="video",
-            )
-
-            common.print_page_numbers(
-                canvas=c,
-                current_page=page_number,
-                total_pages=num_pages,
+            console.log(
+                f"Rendering {len(rendered_pages)} of {num_pages} pages with \
+{render_workers} workers ({num_pages - len(rendered_pages)} cached)"
             )
 
-            # Save the page
-            c.showPage()
-            page_number += 1
-            start_timestap = end_timestamp
+            # Extract snapshot frames for the rendered pages, while they render
+            snapshot_frames: Dict[InterviewRole, Dict[int, List]] = {}
+            for role in roles:
+                if not rendered_pages:
+                    break
+                status.update(f"Extracting snapshot frames for {role.value}...")
+                with Timer() as snapshots_timer:
+                    role_frames = video_heatmaps.extract_snapshot_frames_batch(
+                        interview_name=interview_name,
+                        role=role,
+                        pages=[pages[page_idx] for page_idx in rendered_pages],
+                        frame_frequency=frame_frequency,
+                        config_file=config_file,
+                        deidentified=anonymize,
+                        report_context=report_context,
+                    )
+                snapshot_frames[role] = dict(zip(rendered_pages, role_frames))
+                logger.info(
+                    f"Extracted snapshot frames for {role.value} in \
+{snapshots_timer.duration:.2f} seconds"
+                )
 
-            for temp_file in temp_files:
-                temp_file.close()
+            # Draw the pages in order, as their images become available
+            worker_query_count = 0
+            for page_idx, page_result in enumerate(page_results):
+                if isinstance(page_result, Future):
+                    page_assets: PageAssets = page_result.result()
+                    worker_query_count += page_assets.query_count
+                    page_assets.snapshot_frames = {
+                        role: role_frames[page_idx]
+                        for role, role_frames in snapshot_frames.items()
+                    }
+                    page_assets = report_cache.store_page_assets(
+                        page_key=page_keys[page_idx], page_assets=page_assets
+                    )
+                else:
+                    page_assets = page_result
+                page_number = page_assets.page_number
+                console.log(f"Generating page {page_number} of {num_pages}...")
+
+                start_timestap = float((page_number - 1) * seconds_per_page)
+                end_timestamp = start_timestap + seconds_per_page
+                min_labels = utils.create_labels(
+                    start_timestap, end_timestamp, num_labels
+                )
 
-        for temp_file in temp_files_common:
-            temp_file.close()
+                with Timer() as page_timer:
+                    status.update("Constructing header...")
+                    header.construct_header(
+                        assets_path=constants.ASSETS_PATH,
+                        canvas=c,
+                        output_path=dest_file_name,
+                        interview_metadata=interview_metadata,
+                    )
+
+                    status.update("Constructing video section...")
+                    video.construct_am_report(
+                        canvas=c,
+                        interview_name=interview_name,
+                        start_time=timedelta(seconds=start_timestap),
+                        end_time=timedelta(seconds=end_timestamp),
+                        frame_frequency=frame_frequency,
+                        interview_metadata=interview_metadata,
+                        config_file=config_file,
+                        min_labels=min_labels,
+                        heatmap_vid_pose_pt_path=page_assets.heatmap_vid_pose_paths[
+                            InterviewRole.SUBJECT
+                        ],
+                        heatmap_vid_fau_pt_path=page_assets.heatmap_vid_fau_paths[
+                            InterviewRole.SUBJECT
+                        ],
+                        heatmap_vid_pose_int_path=page_assets.heatmap_vid_pose_paths.get(
+                            InterviewRole.INTERVIEWER
+                        ),  # type: ignore
+                        heatmap_vid_fau_int_path=page_assets.heatmap_vid_fau_paths.get(
+                            InterviewRole.INTERVIEWER
+                        ),  # type: ignore
+                        corr_vid_pt_path=correlation_matrix_pt_path,
+                        corr_vid_int_path=correlation_matrix_int_path,
+                        assets_path=constants.ASSETS_PATH,
+                        headpose_labels=constants.HEADPOSE_FEATURES,
+                        gaze_labels=constants.GAZE_FEATURES,
+                        au_labels=constants.AU_LABELS,
+                        pose_cols=constants.HEADPOSE_COLS,
+                        gaze_cols=constants.GAZE_COLS,
+                        au_cols=constants.AU_COLS,
+                        ticks_config=constants.ticks_config,
+                        cluster_bars_config=constants.cluster_bars_config,
+                        data_path=constants.DATA_PATH,
+                        deidentified=anonymize,
+                        page_assets=page_assets,
+                        report_context=report_context,
+                    )
+
+                    status.update("Writing metadata...")
+                    common.print_visit_and_participant_metadata(
+                        canvas=c,
+                        interview_metadata=interview_metadata,
+                        config_file=config_file,
+                        data_type="video",
+                        report_context=report_context,
+                    )
+
+                    common.print_page_numbers(
+                        canvas=c,
+                        current_page=page_number,
+                        total_pages=num_pages,
+                    )
+
+                    # Save the page
+                    c.showPage()
+
+                if page_assets.render_time is None:
+                    rendered = "read from cache"
+                else:
+                    rendered = f"rendered in {page_assets.render_time:.2f} seconds"
+                logger.info(
+                    f"Page {page_number}/{num_pages}: {rendered}, drawn in \
+{page_timer.duration:.2f} seconds"
+                )
 
         console.log("Saving report...")
         c.save()
+        report_cache.store_report(report_path=dest_file_name)
+
+    logger.info(
+        f"Report issued {query_counter.count + worker_query_count} database queries \
+({worker_query_count} from render workers)"
+    )
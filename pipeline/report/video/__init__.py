@@ -5,7 +5,7 @@ Appearance and Movement Section
 
 from datetime import timedelta
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from reportlab.pdfgen import canvas
 
@@ -13,6 +13,8 @@ from pipeline.helpers import pdf, utils
 from pipeline.models.interview_roles import InterviewRole
 from pipeline.models.lite.cluster_bar_config import ClusterBarsConfig
 from pipeline.models.lite.interview_metadata import InterviewMetadata
+from pipeline.models.lite.page_assets import PageAssets
+from pipeline.models.lite.report_context import ReportContext
 from pipeline.models.lite.ticks_config import TicksConfig
 from pipeline.report import common
 from pipeline.report.video import corr_matrix, heatmaps, qc
@@ -44,6 +46,8 @@ def construct_am_by_role(
     cluster_bars_config: ClusterBarsConfig,
     data_path: Path,
     deidentified: bool = True,
+    page_assets: Optional[PageAssets] = None,
+    report_context: Optional[ReportContext] = None,
 ) -> None:
     """
     Construct the Appearance and Movement section for a given role.
@@ -72,6 +76,10 @@ def construct_am_by_role(
         cluster_bars_config (ClusterBarsConfig): The cluster bars configuration.
         data_path (Path): The path to the data directory.
         deidentified (bool): Whether the report is deidentified (no face data).
+        page_assets (Optional[PageAssets]): Pre-rendered snapshot frames and
+            sample images. Defaults to None (extract them while drawing).
+        report_context (Optional[ReportContext]): Data already loaded for the
+            report. Defaults to None (fetch it from the database).
 
     Returns:
         None
@@ -105,6 +113,9 @@ def construct_am_by_role(
         assets_path=assets_path,
         config_file=config_file,
         deidentify=deidentified,
+        snapshot_frames=(
+            page_assets.snapshot_frames.get(role) if page_assets is not None else None
+        ),
     )
 
     corr_matrix.contruct_dendrogram_by_role(
@@ -125,6 +136,7 @@ def construct_am_by_role(
         role=role,
         interview_name=interview_name,
         config_file=config_file,
+        report_context=report_context,
     )
 
     qc.draw_qc_metrics_by_role(
@@ -133,6 +145,7 @@ def construct_am_by_role(
         interview_name=interview_name,
         x=sample_left,
         config_file=config_file,
+        report_context=report_context,
     )
 
     corr_matrix.construct_pose_mean_tables_by_role(
@@ -143,6 +156,7 @@ def construct_am_by_role(
         data_path=data_path,
         pose_cols=pose_cols,
         gaze_cols=gaze_cols,
+        report_context=report_context,
     )
 
     corr_matrix.draw_fau_table_header(
@@ -157,17 +171,23 @@ def construct_am_by_role(
         au_cols=au_cols,
         data_path=data_path,
         config_file=config_file,
+        report_context=report_context,
     )
 
-    qc.construct_sample_image_by_role(
-        canvas=canvas,
-        interview_name=interview_name,
-        role=role,
-        config_file=config_file,
-        start_time=start_time,
-        end_time=end_time,
-        deidentify=deidentified,
-    )
+    if page_assets is None:
+        qc.construct_sample_image_by_role(
+            canvas=canvas,
+            interview_name=interview_name,
+            role=role,
+            config_file=config_file,
+            start_time=start_time,
+            end_time=end_time,
+            deidentify=deidentified,
+        )
+    else:
+        sample_image_path = page_assets.sample_image_paths[role]
+        if sample_image_path is not None:
+            qc.draw_sample_image(canvas=canvas, image_path=sample_image_path, role=role)
 
 
 def construct_am_report(
@@ -196,6 +216,8 @@ def construct_am_report(
     cluster_bars_config: ClusterBarsConfig,
     data_path: Path,
     deidentified: bool = True,
+    page_assets: Optional[PageAssets] = None,
+    report_context: Optional[ReportContext] = None,
 ) -> None:
     """
     Construct the Appearance and Movement section for the report.
@@ -226,6 +248,10 @@ def construct_am_report(
         cluster_bars_config (ClusterBarsConfig): The cluster bars configuration.
         data_path (Path): The path to the data directory.
         deidentified (bool): Whether the report is deidentified (no face data).
+        page_assets (Optional[PageAssets]): Pre-rendered snapshot frames and
+            sample images. Defaults to None (extract them while drawing).
+        report_context (Optional[ReportContext]): Data already loaded for the
+            report. Defaults to None (fetch it from the database).
 
     Returns:
         None
@@ -279,6 +305,8 @@ def construct_am_report(
         cluster_bars_config=cluster_bars_config,
         data_path=data_path,
         deidentified=deidentified,
+        page_assets=page_assets,
+        report_context=report_context,
     )
 
     if interview_metadata.has_interviewer_stream:
@@ -306,6 +334,8 @@ def construct_am_report(
             cluster_bars_config=cluster_bars_config,
             data_path=data_path,
             deidentified=deidentified,
+            page_assets=page_assets,
+            report_context=report_context,
         )
 
     common.draw_heatmap_legend(
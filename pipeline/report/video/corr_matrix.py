@@ -4,7 +4,7 @@ Apperance and Movement Section
 """
 
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -14,6 +14,7 @@ from pipeline import core
 from pipeline.helpers import dpdash, pdf, utils
 from pipeline.models.interview_roles import InterviewRole
 from pipeline.models.lite.interview_metadata import InterviewMetadata
+from pipeline.models.lite.report_context import ReportContext
 
 console = utils.get_console()
 
@@ -256,6 +257,7 @@ def construct_pose_mean_tables_by_role(
     data_path: Path,
     pose_cols: List[str],
     gaze_cols: List[str],
+    report_context: Optional[ReportContext] = None,
 ) -> None:
     """
     Constructs the pose mean tables for the video section.
@@ -277,6 +279,8 @@ def construct_pose_mean_tables_by_role(
         data_path (Path): The path to the data directory.
         pose_cols (List[str]): The list of pose columns.
         gaze_cols (List[str]): The list of gaze columns.
+        report_context (Optional[ReportContext]): Features already loaded for
+            the report. Defaults to None (fetch them from the database).
 
     Raises:
         ValueError: If the role is invalid.
@@ -323,26 +327,34 @@ def construct_pose_mean_tables_by_role(
     study_id = dpdash_dict["study"]
     subject_id = dpdash_dict["subject"]
 
-    session_of_pose_features = core.fetch_openface_features(
-        interview_name=interview_name,
-        subject_id=subject_id,
-        study_id=study_id,
-        role=role,
-        cols=required_cols,
-        config_file=config_file,
-    )
+    if report_context is not None:
+        session_of_pose_features = report_context.get_session_features(
+            role=role, cols=required_cols
+        )
+    else:
+        session_of_pose_features = core.fetch_openface_features(
+            interview_name=interview_name,
+            subject_id=subject_id,
+            study_id=study_id,
+            role=role,
+            cols=required_cols,
+            config_file=config_file,
+        )
     session_pose_means = session_of_pose_features.mean(axis=0)
 
     gp_relative_means = (means_and_std.iloc[0] - session_pose_means) * -1
 
     match role:
         case InterviewRole.SUBJECT:
-            subject_of_pose_features = core.fetch_openface_subject_distribution(
-                subject_id=subject_id,
-                cols=required_cols,
-                config_file=config_file,
+            if report_context is not None:
+                subject_stats = report_context.subject_stats
+            else:
+                subject_stats = core.get_openface_subject_stats(
+                    subject_id=subject_id, config_file=config_file
+                )
+            subject_pose_means = core.get_subject_stats_means(
+                subject_stats=subject_stats, cols=required_cols
             )
-            subject_pose_means = subject_of_pose_features.mean(axis=0)
 
             pt_relative_means = (subject_pose_means - session_pose_means) * -1
 
@@ -494,6 +506,7 @@ def construct_fau_z_scores_table_by_role(
     au_cols: List[str],
     data_path: Path,
     config_file: Path,
+    report_context: Optional[ReportContext] = None,
 ) -> None:
     """
     Constructs the FAU z-scores table for the video section.
@@ -513,6 +526,8 @@ def construct_fau_z_scores_table_by_role(
         au_cols (List[str]): The list of AU columns.
         data_path (Path): The path to the data directory.
         config_file (Path): The path to the configuration file.
+        report_context (Optional[ReportContext]): Features already loaded for
+            the report. Defaults to None (fetch them from the database).
 
     Raises:
         ValueError: If the role is invalid.
@@ -525,14 +540,19 @@ def construct_fau_z_scores_table_by_role(
     study_id = dp_dast_dict["study"]
     subject_id = dp_dast_dict["subject"]
 
-    session_of_pose_features = core.fetch_openface_features(
-        interview_name=interview_name,
-        subject_id=subject_id,
-        study_id=study_id,
-        role=role,
-        cols=au_cols,
-        config_file=config_file,
-    )
+    if report_context is not None:
+        session_of_pose_features = report_context.get_session_features(
+            role=role, cols=au_cols
+        )
+    else:
+        session_of_pose_features = core.fetch_openface_features(
+            interview_name=interview_name,
+            subject_id=subject_id,
+            study_id=study_id,
+            role=role,
+            cols=au_cols,
+            config_file=config_file,
+        )
     session_pose_means = session_of_pose_features.mean(axis=0)
 
     # Read Group Metrics (Mean and Std) from cached file
@@ -557,13 +577,18 @@ def construct_fau_z_scores_table_by_role(
 
     if role is InterviewRole.SUBJECT:
         # Compute Subject Z Score
-        subject_of_pose_features = core.fetch_openface_subject_distribution(
-            subject_id=subject_id,
-            cols=au_cols,
-            config_file=config_file,
+        if report_context is not None:
+            subject_stats = report_context.subject_stats
+        else:
+            subject_stats = core.get_openface_subject_stats(
+                subject_id=subject_id, config_file=config_file
+            )
+        subject_pose_means = core.get_subject_stats_means(
+            subject_stats=subject_stats, cols=au_cols
+        )
+        subject_pose_std = core.get_subject_stats_stds(
+            subject_stats=subject_stats, cols=au_cols
         )
-        subject_pose_means = subject_of_pose_features.mean(axis=0)
-        subject_pose_std = subject_of_pose_features.std(axis=0)
 
         # Compute Subject Z Score
         subject_z_scores = (session_pose_means - subject_pose_means) / subject_pose_std
@@ -3,11 +3,11 @@ Contains functions to construct heatmaps for Appearance and Movement
 section of the report.
 """
 
-import tempfile
 from datetime import timedelta
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+import numpy as np
 from reportlab.pdfgen import canvas
 
 from pipeline import constants, core
@@ -15,6 +15,7 @@ from pipeline.helpers import image, pdf, utils
 from pipeline.models.interview_roles import InterviewRole
 from pipeline.models.lite.cluster_bar_config import ClusterBarsConfig
 from pipeline.models.lite.frame_request import FrameRequest
+from pipeline.models.lite.report_context import ReportContext
 from pipeline.models.lite.ticks_config import TicksConfig
 from pipeline.report import common
 
@@ -444,6 +445,9 @@ def draw_fau_logos(
     """
     Draws the FAU images for the heatmap section.
 
+    The images are drawn once per report, as a Form XObject referenced by
+    every page.
+
     Args:
         canvas (canvas.Canvas): The canvas to draw on.
         role (InterviewRole): The role of the primary person in the video.
@@ -470,19 +474,27 @@ def draw_fau_logos(
         case _:
             raise ValueError(f"Invalid role: {role}")
 
-    for fau in au_labels:
-        # Get only last 2 digits of FAU
-        file_name = f"{fau[-2:]}.png"
-        fau_path = au_assets_path / file_name
-        pdf.draw_image(
-            canvas,
-            fau_path,
-            au_samples_left,
-            cur_bot,
-            au_samples_width,
-            au_samples_height,
-        )
-        cur_bot = cur_bot + au_samples_incr
+    def draw(form_canvas):
+        bottom = cur_bot
+        for fau in au_labels:
+            # Get only last 2 digits of FAU
+            file_name = f"{fau[-2:]}.png"
+            fau_path = au_assets_path / file_name
+            pdf.draw_image(
+                form_canvas,
+                fau_path,
+                au_samples_left,
+                bottom,
+                au_samples_width,
+                au_samples_height,
+            )
+            bottom = bottom + au_samples_incr
+
+    pdf.draw_form(
+        canvas,
+        form_name=pdf.get_form_name("fau_logos", str(au_assets_path), au_labels, role),
+        draw=draw,
+    )
 
 
 def construct_heatmap_header_lines_by_role(
@@ -611,20 +623,121 @@ def draw_cluster_bars_vid(
         cur_bot = cur_bot - height - cluster_bars_config.cluster_bars_space * 2.0
 
 
+def deidentify_snapshot(frame: np.ndarray) -> np.ndarray:
+    """
+    Removes face data from a snapshot frame.
+
+    Args:
+        frame (np.ndarray): The frame (BGR).
+
+    Returns:
+        np.ndarray: The deidentified frame.
+    """
+    strategy = "filter_face_data"
+
+    match strategy:
+        case "blur":
+            return image.blur_frame(frame=frame)
+        case "black_bar":
+            return image.draw_bars_over_frame(frame=frame.copy())
+        case "filter_face_data":
+            return image.filter_frame_by_range(frame=frame)
+        case _:
+            return frame
+
+
+def extract_snapshot_frames_batch(
+    interview_name: str,
+    role: InterviewRole,
+    pages: List[Tuple[timedelta, timedelta]],
+    frame_frequency: timedelta,
+    config_file: Path,
+    deidentified: bool = True,
+    report_context: Optional[ReportContext] = None,
+) -> List[List[Optional[np.ndarray]]]:
+    """
+    Extracts the frames for the snapshots bars of all pages of a report.
+
+    Frame numbers for all pages are fetched with a single query, and the
+    OpenFace overlaid video is decoded once, in frame order.
+
+    Args:
+        interview_name (str): The name of the interview.
+        role (InterviewRole): The role for whom the snapshots are being extracted.
+        pages (List[Tuple[timedelta, timedelta]]): The (start, end) time of each page.
+        frame_frequency (timedelta): The frequency of the frames.
+        config_file (Path): The path to the configuration file.
+        deidentified (bool): Whether to remove face data from the frames.
+        report_context (Optional[ReportContext]): Paths already loaded for
+            the report. Defaults to None (look them up in the database).
+
+    Returns:
+        List[List[Optional[np.ndarray]]]: The frames (BGR) of each page, None
+            for frames that could not be retrieved.
+    """
+    page_windows = [
+        FrameRequest.get_windows(
+            start_time=start_time, end_time=end_time, frame_frequency=frame_frequency
+        )
+        for start_time, end_time in pages
+    ]
+
+    frame_numbers = FrameRequest.get_frame_numbers_batch(
+        config_file=config_file,
+        interview_name=interview_name,
+        role=role,
+        windows=[window for windows in page_windows for window in windows],
+    )
+
+    if report_context is not None:
+        openface_overlaid_video_path = report_context.get_overlaid_video_path(role=role)
+    else:
+        openface_overlaid_video_path = core.get_openfece_features_overlaid_video_path(
+            config_file=config_file, interview_name=interview_name, role=role
+        )
+
+    frames: List[Optional[np.ndarray]] = [None] * len(frame_numbers)
+    if openface_overlaid_video_path is None:
+        console.print(
+            f"OpenFace overlaid video not found for {role.value}",
+            style="error",
+        )
+    else:
+        decoded_frames = image.read_frames_by_numbers(
+            video_path=openface_overlaid_video_path,
+            frame_numbers=[n for n in frame_numbers if n is not None],
+        )
+        for idx, frame_number in enumerate(frame_numbers):
+            if frame_number is None or frame_number not in decoded_frames:
+                continue
+            frame = decoded_frames[frame_number]
+            if deidentified:
+                frame = deidentify_snapshot(frame)
+            frames[idx] = frame
+
+    # Split the frames back into pages
+    page_frames: List[List[Optional[np.ndarray]]] = []
+    offset = 0
+    for windows in page_windows:
+        page_frames.append(frames[offset : offset + len(windows)])
+        offset += len(windows)
+
+    return page_frames
+
+
 def construct_snapshots_bar(
     canvas: canvas.Canvas,
-    frame_paths: List[Optional[Path]],
+    frames: List[Optional[np.ndarray]],
     role: InterviewRole,
-    deidentified: bool = True,
 ):
     """
     Draws the snapshots bar for the video section. Multiple smaller images on the top middle.
 
     Args:
         canvas (canvas.Canvas): The canvas to draw on.
-        frame_paths (List[Optional[Path]]): The list of frame paths.
+        frames (List[Optional[np.ndarray]]): The frames, from
+            extract_snapshot_frames_batch.
         role (InterviewRole): The role for whom the snapshots are being drawn
-        deidentified (bool): Whether the images are deidentified.
 
     Raises:
         ValueError: If the role is invalid.
@@ -658,10 +771,8 @@ def construct_snapshots_bar(
         case _:
             raise ValueError(f"Invalid role: {role}")
 
-    files: List[tempfile.NamedTemporaryFile] = []  # type: ignore
-
     x = snapshot_start_left
-    for frame in frame_paths:
+    for frame in frames:
         if frame is None:
             pdf.draw_colored_rect(
                 canvas=canvas,
@@ -672,43 +783,10 @@ def construct_snapshots_bar(
                 y=y,
             )
         else:
-            if deidentified:
-                strategy = "filter_face_data"
-                temp_file = tempfile.NamedTemporaryFile(suffix=".bmp")
-                files.append(temp_file)
-
-                match strategy:
-                    case "blur":
-                        image.blur_image(
-                            source_image=frame, dest_image=Path(temp_file.name)
-                        )
-                        frame = temp_file.name
-
-                    case "black_bar":
-                        # temp_file = tempfile.NamedTemporaryFile(suffix=".bmp")
-                        # temp_file_name = temp_file.name
-
-                        image.draw_bars_over_image(
-                            source_image=frame, dest_image=Path(temp_file.name)
-                        )
-                        frame = temp_file.name
-
-                    case "filter_face_data":
-                        image.filter_by_range(
-                            source_image=frame,
-                            dest_image=Path(temp_file.name),
-                        )
-
-                        frame = temp_file.name
-
-            pdf.draw_image(canvas, Path(frame), x, y, snapshot_width, snapshot_height)
+            pdf.draw_image_array(canvas, frame, x, y, snapshot_width, snapshot_height)
 
         x = x + snapshot_h_spacing
 
-    for file in files:
-        # Close and delete temp files
-        file.close()
-
     pdf.draw_text(canvas, samples_text, samples_text_left, text_y, 4, "Helvetica")
 
 
@@ -800,6 +878,7 @@ def construct_heatmap_by_role(
     assets_path: Path,
     config_file: Path,
     deidentify: bool = True,
+    snapshot_frames: Optional[List[Optional[np.ndarray]]] = None,
 ) -> None:
     """
     Constructs the heatmap section for the video report. Includes the headers, ticks, labels for
@@ -828,6 +907,9 @@ def construct_heatmap_by_role(
         deidentify (bool, optional): Whether to deidentify the images.
             Defaults to False.
             Deidentification is done by removing all face data from the images.
+        snapshot_frames (Optional[List[Optional[np.ndarray]]]): Frames that have
+            already been extracted with extract_snapshot_frames_batch. Defaults
+            to None (extract them now).
 
     Raises:
         ValueError: If the role is invalid.
@@ -888,36 +970,14 @@ def construct_heatmap_by_role(
         role=role,
     )
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        frame_numbers = FrameRequest.get_frame_numbers(
+    if snapshot_frames is None:
+        snapshot_frames = extract_snapshot_frames_batch(
             interview_name=interview_name,
             role=role,
-            start_time=start_time,
-            end_time=end_time,
+            pages=[(start_time, end_time)],
             frame_frequency=frame_frequency,
             config_file=config_file,
-        )
-
-        openface_overlaid_video_path = core.get_openfece_features_overlaid_video_path(
-            config_file=config_file, interview_name=interview_name, role=role
-        )
-
-        if openface_overlaid_video_path is None:
-            console.print(
-                f"OpenFace overlaid video not found for {role.value}",
-                style="error",
-            )
-            frame_paths: List[Path | None] = [None] * len(frame_numbers)
-        else:
-            frame_paths = image.get_frames_by_numbers(
-                video_path=openface_overlaid_video_path,
-                frame_numbers=frame_numbers,
-                out_dir=Path(temp_dir),
-            )
-
-        construct_snapshots_bar(
-            canvas=canvas,
-            frame_paths=frame_paths,
-            role=role,
             deidentified=deidentify,
-        )
+        )[0]
+
+    construct_snapshots_bar(canvas=canvas, frames=snapshot_frames, role=role)
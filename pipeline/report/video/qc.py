@@ -15,6 +15,7 @@ from pipeline.helpers import dpdash, image, pdf, utils
 from pipeline.models.interview_roles import InterviewRole
 from pipeline.models.lite.frame_request import FrameRequest
 from pipeline.models.lite.openface_qc_metrics import OpenFaceQcMetrics
+from pipeline.models.lite.report_context import ReportContext
 from pipeline.models.lite.video_metadata import VideoMetadata
 
 console = utils.get_console()
@@ -82,37 +83,42 @@ def draw_sample_image(
     )
 
 
-def construct_sample_image_by_role(
-    canvas: canvas.Canvas,
+def extract_sample_image(
     interview_name: str,
     role: InterviewRole,
     config_file: Path,
+    dest_image: Path,
     deidentify: bool = False,
     start_time: timedelta = timedelta(hours=0, minutes=0, seconds=0),
     end_time: timedelta = timedelta(hours=0, minutes=30, seconds=0),
-):
+    of_path: Optional[Path] = None,
+) -> Optional[Path]:
     """
-    Fetches the sample image for the video section and draws it on the canvas. Selects
-    a frame from the middle of the video.
+    Extracts the sample image for the video section. Selects a frame from
+    the middle of the video, and hides the Zoom interface (and face data,
+    if deidentified).
 
     Args:
-        canvas (canvas.Canvas): The canvas to draw on.
         interview_name (str): The name of the interview.
-        role (InterviewRole): The role for whom the image is being drawn
+        role (InterviewRole): The role for whom the image is being extracted
         config_file (Path): The path to the configuration file.
+        dest_image (Path): The path to save the image to.
+        deidentify (bool): Whether to remove face data from the image.
         start_time (timedelta): The start time of the video.
         end_time (timedelta): The end time of the video.
+        of_path (Optional[Path]): The OpenFace output directory. Defaults to
+            None (look it up in the database).
 
     Raises:
         FileNotFoundError: If the OpenFace video is not found.
-        FileNotFoundError: If the frame number is not found.
 
     Returns:
-        None
+        Optional[Path]: The path to the image, or None if no frame number was found.
     """
-    of_path = core.get_openface_path(
-        interview_name=interview_name, role=role, config_file=config_file
-    )
+    if of_path is None:
+        of_path = core.get_openface_path(
+            interview_name=interview_name, role=role, config_file=config_file
+        )
 
     if of_path is None:
         raise FileNotFoundError(f"OpenFace path not found for {interview_name} {role}")
@@ -166,7 +172,7 @@ after {retry_counter} attempts"
             f"[bold red]Failed to get frame number for {interview_name} {role} \
 after {max_retires} attempts"
         )
-        return
+        return None
 
     with tempfile.NamedTemporaryFile(suffix=".png") as sample_frame:
         image.get_frame_by_number(
@@ -186,26 +192,67 @@ after {max_retires} attempts"
 
             # Draw White bar over last 5% of the image
             # Used to hide names from Zoom Interface
-            with tempfile.NamedTemporaryFile(suffix=".png") as name_removed_image:
+            image.draw_bars_over_image(
+                source_image=Path(deidentified_image.name),
+                dest_image=dest_image,
+                start_h=0.95,
+                end_h=1,
+                bar_color=(255, 255, 255),
+            )
+
+            if deidentify:
                 image.draw_bars_over_image(
-                    source_image=Path(deidentified_image.name),
-                    dest_image=Path(name_removed_image.name),
-                    start_h=0.95,
-                    end_h=1,
+                    source_image=dest_image,
+                    dest_image=dest_image,
+                    start_h=0.0,
+                    end_h=0.07,
                     bar_color=(255, 255, 255),
                 )
 
-                if deidentify:
-                    image.draw_bars_over_image(
-                        source_image=Path(name_removed_image.name),
-                        dest_image=Path(name_removed_image.name),
-                        start_h=0.0,
-                        end_h=0.07,
-                        bar_color=(255, 255, 255),
-                    )
-                draw_sample_image(
-                    canvas=canvas, image_path=Path(name_removed_image.name), role=role
-                )
+    return dest_image
+
+
+def construct_sample_image_by_role(
+    canvas: canvas.Canvas,
+    interview_name: str,
+    role: InterviewRole,
+    config_file: Path,
+    deidentify: bool = False,
+    start_time: timedelta = timedelta(hours=0, minutes=0, seconds=0),
+    end_time: timedelta = timedelta(hours=0, minutes=30, seconds=0),
+):
+    """
+    Fetches the sample image for the video section and draws it on the canvas. Selects
+    a frame from the middle of the video.
+
+    Args:
+        canvas (canvas.Canvas): The canvas to draw on.
+        interview_name (str): The name of the interview.
+        role (InterviewRole): The role for whom the image is being drawn
+        config_file (Path): The path to the configuration file.
+        start_time (timedelta): The start time of the video.
+        end_time (timedelta): The end time of the video.
+
+    Raises:
+        FileNotFoundError: If the OpenFace video is not found.
+
+    Returns:
+        None
+    """
+    with tempfile.NamedTemporaryFile(suffix=".png") as sample_image:
+        extracted_image = extract_sample_image(
+            interview_name=interview_name,
+            role=role,
+            config_file=config_file,
+            dest_image=Path(sample_image.name),
+            deidentify=deidentify,
+            start_time=start_time,
+            end_time=end_time,
+        )
+        if extracted_image is None:
+            return
+
+        draw_sample_image(canvas=canvas, image_path=extracted_image, role=role)
 
 
 def construct_openface_metadata_box_by_role(
@@ -213,6 +260,7 @@ def construct_openface_metadata_box_by_role(
     role: InterviewRole,
     interview_name: str,
     config_file: Path,
+    report_context: Optional[ReportContext] = None,
 ) -> None:
     """
     Constructs the OpenFace metadata box for the video section.
@@ -222,6 +270,8 @@ def construct_openface_metadata_box_by_role(
         role (InterviewRole): The role for whom the metadata box is being placed.
         interview_name (str): The name of the interview.
         config_file (Path): The path to the configuration file.
+        report_context (Optional[ReportContext]): Metadata already loaded for
+            the report. Defaults to None (fetch it from the database).
 
     Raises:
         ValueError: If the role is invalid.
@@ -236,9 +286,12 @@ def construct_openface_metadata_box_by_role(
 
     openface_info.append(f"Python {python_version}")
 
-    vid_metadata: VideoMetadata = VideoMetadata.get(
-        interview_name=interview_name, role=role, config_file=config_file
-    )
+    if report_context is not None:
+        vid_metadata = report_context.get_video_metadata(role=role)
+    else:
+        vid_metadata = VideoMetadata.get(
+            interview_name=interview_name, role=role, config_file=config_file
+        )
 
     resolution_text = (
         f"Resolution: {vid_metadata.video_width}x{vid_metadata.video_height}"
@@ -314,6 +367,7 @@ def draw_qc_metrics_by_role(
     interview_name: str,
     x: float,
     config_file: Path,
+    report_context: Optional[ReportContext] = None,
 ) -> None:
     """
     Draw the QC metrics for the video section.
@@ -330,6 +384,8 @@ def draw_qc_metrics_by_role(
         interview_name (str): The name of the interview.
         x (float): The x position of the text.
         config_file (Path): The path to the configuration file.
+        report_context (Optional[ReportContext]): Metrics already loaded for
+            the report. Defaults to None (fetch them from the database).
 
     Raises:
         ValueError: If the role is invalid.
@@ -338,9 +394,12 @@ def draw_qc_metrics_by_role(
     Returns:
         None
     """
-    qc_metrics = OpenFaceQcMetrics.get(
-        interview_name=interview_name, role=role, config_file=config_file
-    )
+    if report_context is not None:
+        qc_metrics = report_context.get_qc_metrics(role=role)
+    else:
+        qc_metrics = OpenFaceQcMetrics.get(
+            interview_name=interview_name, role=role, config_file=config_file
+        )
 
     pt_sample_qc_text_bot = 195
     int_sample_qc_text_bot = 455.5
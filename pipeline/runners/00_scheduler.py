@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Runs all pipeline stages in a single process.
+
+Replaces running the individual stage runners (01_fetch_video to
+70_report_generation) side by side.
+"""
+
+import sys
+from pathlib import Path
+
+file = Path(__file__).resolve()
+parent = file.parent
+ROOT = None
+for parent in file.parents:
+    if parent.name == "av-pipeline-v2":
+        ROOT = parent
+sys.path.append(str(ROOT))
+
+# remove current directory from path
+try:
+    sys.path.remove(str(parent))
+except ValueError:
+    pass
+
+import argparse
+import logging
+
+from rich.logging import RichHandler
+
+from pipeline import orchestrator, scheduler
+from pipeline.helpers import cli, utils
+
+MODULE_NAME = scheduler.MODULE_NAME
+
+logger = logging.getLogger(MODULE_NAME)
+logargs = {
+    "level": logging.DEBUG,
+    "format": "%(processName)s - %(message)s",
+    "handlers": [RichHandler(rich_tracebacks=True)],
+}
+logging.basicConfig(**logargs)
+
+console = utils.get_console()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog=MODULE_NAME, description="Runs all pipeline stages in a single process."
+    )
+    parser.add_argument(
+        "-c", "--config", type=str, help="Path to the config file.", required=False
+    )
+    args = parser.parse_args()
+
+    # Check if parseer has config file
+    if args.config:
+        config_file = Path(args.config).resolve()
+        if not config_file.exists():
+            logger.error(f"Error: Config file '{config_file}' does not exist.")
+            sys.exit(1)
+    else:
+        if cli.confirm_action("Using default config file."):
+            config_file = utils.get_config_file_path()
+        else:
+            sys.exit(1)
+
+    utils.configure_logging(
+        config_file=config_file, module_name=MODULE_NAME, logger=logger
+    )
+
+    console.rule(f"[bold red]{MODULE_NAME}")
+    logger.info(f"Using config file: {config_file}")
+    orchestrator.redirect_temp_dir(config_file=config_file)
+
+    logger.info("[bold green]Starting scheduler loop...", extra={"markup": True})
+    try:
+        scheduler.Scheduler(config_file=config_file).run()
+    except KeyboardInterrupt:
+        logger.info("[bold red]Exiting...", extra={"markup": True})
+        sys.exit(0)
@@ -26,8 +26,9 @@ import logging
 from rich.logging import RichHandler
 
 from pipeline import orchestrator
-from pipeline.core import metadata
+from pipeline.core import metadata, split_streams
 from pipeline.helpers import cli, ffprobe, utils
+from pipeline.models.decrypted_files import DecryptedFile
 
 MODULE_NAME = "metadata"
 
@@ -102,7 +103,13 @@ if __name__ == "__main__":
                     COUNTER = 0
 
                 # Snooze if no files to process
-                orchestrator.snooze(config_file=config_file)
+                orchestrator.snooze(
+                    config_file=config_file,
+                    channels=[
+                        DecryptedFile.NOTIFY_CHANNEL,
+                        split_streams.NOTIFY_CHANNEL,
+                    ],
+                )
                 study_id = studies[0]
                 logger.info(
                     f"Restarting with study: {study_id}", extra={"markup": True}
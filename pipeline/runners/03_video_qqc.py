@@ -26,7 +26,7 @@ import logging
 from rich.logging import RichHandler
 
 from pipeline import orchestrator
-from pipeline.core import video_qqc
+from pipeline.core import jobs, metadata, video_qqc
 from pipeline.helpers import cli, utils
 from pipeline.helpers.timer import Timer
 from pipeline.models.video_qqc import VideoQuickQc
@@ -101,7 +101,10 @@ if __name__ == "__main__":
                     COUNTER = 0
 
                 # Snooze if no files to process
-                orchestrator.snooze(config_file=config_file)
+                orchestrator.snooze(
+                    config_file=config_file,
+                    channels=[metadata.NOTIFY_CHANNEL],
+                )
                 study_id = studies[0]
                 logger.info(
                     f"Restarting with study: {study_id}", extra={"markup": True}
@@ -126,14 +129,17 @@ if __name__ == "__main__":
             frames_path.mkdir(parents=True)
         logger.info(f"Saving frames to: {frames_path}")
 
-        with Timer() as timer:
-            qc_result: VideoQuickQc = video_qqc.do_video_qqc(
-                video_path=video_path, duration=duration, frames_path=frames_path
-            )
-            orchestrator.fix_permissions(
-                config_file=config_file,
-                file_path=video_path
-            )
+        with jobs.JobHeartbeat(
+            config_file=config_file, stage=video_qqc.JOB_STAGE, item=str(video_path)
+        ):
+            with Timer() as timer:
+                qc_result: VideoQuickQc = video_qqc.do_video_qqc(
+                    video_path=video_path, duration=duration, frames_path=frames_path
+                )
+                orchestrator.fix_permissions(
+                    config_file=config_file,
+                    file_path=video_path
+                )
 
         # Add process time to qc_result
         qc_result.process_time = timer.duration
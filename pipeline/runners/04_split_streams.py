@@ -30,7 +30,7 @@ import logging
 from rich.logging import RichHandler
 
 from pipeline import orchestrator
-from pipeline.core import split_streams
+from pipeline.core import jobs, split_streams, video_qqc
 from pipeline.helpers import cli, utils
 
 MODULE_NAME = "split-streams"
@@ -106,7 +106,10 @@ if __name__ == "__main__":
                     STREAMS_COUNTER = 0
 
                 # Snooze if no files to process
-                orchestrator.snooze(config_file=config_file)
+                orchestrator.snooze(
+                    config_file=config_file,
+                    channels=[video_qqc.NOTIFY_CHANNEL],
+                )
                 study_id = studies[0]
                 logger.info(
                     f"Restarting with study: {study_id}", extra={"markup": True}
@@ -138,12 +141,17 @@ if __name__ == "__main__":
             extra={"markup": True},
         )
 
-        streams = split_streams.split_streams(
-            video_path=video_path,
-            has_black_bars=has_black_bars,
-            black_bar_height=black_bar_height,
+        with jobs.JobHeartbeat(
             config_file=config_file,
-        )
+            stage=split_streams.JOB_STAGE,
+            item=str(video_path),
+        ):
+            streams = split_streams.split_streams(
+                video_path=video_path,
+                has_black_bars=has_black_bars,
+                black_bar_height=black_bar_height,
+                config_file=config_file,
+            )
         STREAMS_COUNTER += len(streams)
 
         split_streams.log_streams(config_file=config_file, streams=streams)
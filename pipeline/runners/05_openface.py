@@ -27,7 +27,7 @@ from typing import Optional, Tuple
 from rich.logging import RichHandler
 
 from pipeline import orchestrator
-from pipeline.core import openface
+from pipeline.core import feature_store, jobs, openface, split_streams
 from pipeline.helpers import cli, utils
 from pipeline.helpers.timer import Timer
 from pipeline.models.interview_roles import InterviewRole
@@ -108,7 +108,10 @@ if __name__ == "__main__":
             if study_id == studyies[-1]:
                 logger.info("[bold green] No file to process.")
                 openface.await_decrytion(
-                    config_file=config_file, counter=COUNTER, module_name=MODULE_NAME
+                    config_file=config_file,
+                    counter=COUNTER,
+                    module_name=MODULE_NAME,
+                    channels=[split_streams.NOTIFY_CHANNEL],
                 )
                 COUNTER = 0
                 study_id = studyies[0]
@@ -130,18 +133,19 @@ if __name__ == "__main__":
             config_file=config_file, video_path=video_stream_path
         )
         logger.debug(f"Output path: {openface_path}")
-        # Check if another process is running with same files
-        if cli.check_if_running(
-            process_name=str(video_stream_path)
-        ) or cli.check_if_running(process_name=str(interview_name)):
+        # Jobs are claimed from the queue, so no other runner holds this stream.
+        # The other stream of the interview may still be processed by another
+        # runner: leave this one in the queue until it is done.
+        if cli.check_if_running(process_name=str(interview_name)):
             logger.warning(
-                f"Another process is running with the same file: {video_stream_path}"
+                f"Another process is running with the same interview: {interview_name}"
             )
             SKIP_COUNTER += 1
-
-            # Remove openface_path if it exists
-            if openface_path.exists():
-                cli.remove_directory(path=openface_path)
+            jobs.release_job(
+                config_file=config_file,
+                stage=openface.JOB_STAGE,
+                item=str(video_stream_path),
+            )
 
             if SKIP_COUNTER > orchestrator.get_max_instances(
                 config_file=config_file,
@@ -149,14 +153,13 @@ if __name__ == "__main__":
             ):
                 console.log("[bold red]Max number of instances reached. Snoozing...")
                 openface.await_decrytion(
-                    config_file=config_file, counter=COUNTER, module_name=MODULE_NAME
+                    config_file=config_file,
+                    counter=COUNTER,
+                    module_name=MODULE_NAME,
+                    channels=[split_streams.NOTIFY_CHANNEL],
                 )
                 SKIP_COUNTER = 0
                 COUNTER = 0
-                continue
-            file_to_process = openface.get_file_to_process(
-                config_file=config_file, study_id=study_id
-            )
             continue
         else:
             SKIP_COUNTER = 0
@@ -167,38 +170,48 @@ if __name__ == "__main__":
         )
 
         try:
-            process_name = cli.spawn_dummy_process(
-                process_name=str(interview_name)
-            )
-            # Run OpenFace
-            with Timer() as timer:
-                openface.run_openface(
-                    config_file=config_file,
-                    file_path_to_process=video_stream_path,
-                    output_path=openface_path,
-                )
-            of_duration = timer.duration
-
-            # Run OpenFace overlay (re-runs OpenFace on face-aligned frames)
-            with Timer() as timer:
-                openface.run_openface_overlay(
-                    config_file=config_file,
-                    openface_path=openface_path,
-                    face_aligned_video_path=openface_path / "face_aligned.mp4",
-                    output_video_path=openface_path / "openface_aligned.mp4",
-                    temp_dir_prefix=f"{interview_name}_",
+            process_name = cli.spawn_dummy_process(process_name=str(interview_name))
+            with jobs.JobHeartbeat(
+                config_file=config_file,
+                stage=openface.JOB_STAGE,
+                item=str(video_stream_path),
+            ):
+                # Run OpenFace
+                with Timer() as timer:
+                    openface.run_openface(
+                        config_file=config_file,
+                        file_path_to_process=video_stream_path,
+                        output_path=openface_path,
+                    )
+                of_duration = timer.duration
+
+                feature_store.write_feature_store(
+                    config_file=config_file, of_processed_path=openface_path
                 )
-            overlay_duration = timer.duration
 
-            cli.kill_processes(
-                process_name=process_name
-            )
+                # Run OpenFace overlay (re-runs OpenFace on face-aligned frames)
+                with Timer() as timer:
+                    openface.run_openface_overlay(
+                        config_file=config_file,
+                        openface_path=openface_path,
+                        face_aligned_video_path=openface_path / "face_aligned.mp4",
+                        output_video_path=openface_path / "openface_aligned.mp4",
+                        temp_dir_prefix=f"{interview_name}_",
+                    )
+                overlay_duration = timer.duration
+
+            cli.kill_processes(process_name=process_name)
         except KeyboardInterrupt:
             logger.error("KeyboardInterrupt: Exiting...")
             logger.info("Cleaning up...")
             cli.remove_directory(
                 path=openface_path,
             )
+            jobs.release_job(
+                config_file=config_file,
+                stage=openface.JOB_STAGE,
+                item=str(video_stream_path),
+            )
             sys.exit(1)
 
         # Log to DB
@@ -217,7 +230,7 @@ if __name__ == "__main__":
         # Get other stream to process
         logger.info(f"Checking for other stream to process from {video_path}")
         STASH = openface.get_other_stream_to_process(
-            config_file=config_file, video_path=video_path
+            config_file=config_file, video_path=video_path, study_id=study_id
         )
 
         if file_to_process is None:
@@ -26,7 +26,7 @@ import logging
 from rich.logging import RichHandler
 
 from pipeline import healer, orchestrator
-from pipeline.core import openface_qc
+from pipeline.core import jobs, openface, openface_qc
 from pipeline.helpers import cli, utils
 from pipeline.helpers.timer import Timer
 
@@ -99,7 +99,10 @@ if __name__ == "__main__":
                     COUNTER = 0
 
                 # Snooze if no files to process
-                orchestrator.snooze(config_file=config_file)
+                orchestrator.snooze(
+                    config_file=config_file,
+                    channels=[openface.NOTIFY_CHANNEL],
+                )
                 study_id = studies[0]
                 continue
             else:
@@ -114,10 +117,15 @@ if __name__ == "__main__":
         )
 
         try:
-            with Timer() as timer:
-                openface_qc_result = openface_qc.run_openface_qc(
-                    of_processed_path=file_to_process
-                )
+            with jobs.JobHeartbeat(
+                config_file=config_file,
+                stage=openface_qc.JOB_STAGE,
+                item=str(file_to_process),
+            ):
+                with Timer() as timer:
+                    openface_qc_result = openface_qc.run_openface_qc(
+                        of_processed_path=file_to_process
+                    )
 
             openface_qc_result.ofqc_process_time = timer.duration
             openface_qc.log_openface_qc(
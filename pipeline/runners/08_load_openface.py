@@ -28,7 +28,7 @@ import logging
 from rich.logging import RichHandler
 
 from pipeline import orchestrator
-from pipeline.core import load_openface
+from pipeline.core import jobs, load_openface, openface_qc
 from pipeline.helpers import cli, utils
 
 MODULE_NAME = "load_openface"
@@ -100,7 +100,10 @@ if __name__ == "__main__":
                     COUNTER = 0
 
                 # Snooze if no files to process
-                orchestrator.snooze(config_file=config_file)
+                orchestrator.snooze(
+                    config_file=config_file,
+                    channels=[openface_qc.NOTIFY_CHANNEL],
+                )
                 study_id = studies[0]
                 continue
             else:
@@ -115,13 +118,18 @@ if __name__ == "__main__":
             extra={"markup": True},
         )
 
-        of_runs = load_openface.get_openface_runs(
-            config_file=config_file, interview_name=interview_name
-        )
-
-        lof = load_openface.construct_load_openface(
-            interview_name=interview_name, of_runs=of_runs, config_file=config_file
-        )
-        lof = load_openface.import_of_openface_db(config_file=config_file, lof=lof)
+        with jobs.JobHeartbeat(
+            config_file=config_file,
+            stage=load_openface.JOB_STAGE,
+            item=interview_name,
+        ):
+            of_runs = load_openface.get_openface_runs(
+                config_file=config_file, interview_name=interview_name
+            )
+
+            lof = load_openface.construct_load_openface(
+                interview_name=interview_name, of_runs=of_runs, config_file=config_file
+            )
+            lof = load_openface.import_of_openface_db(config_file=config_file, lof=lof)
 
         load_openface.log_load_openface(config_file=config_file, lof=lof)
@@ -1,6 +1,10 @@
 #!/usr/bin/env python
 """
 Generate PDF reports for the pipeline.
+
+Reports are generated by a pool of worker processes ('report_workers'),
+each claiming interviews from the job queue, so any number of workers
+(and runners) can drain the backlog without generating the same report.
 """
 
 import sys
@@ -22,16 +26,17 @@ except ValueError:
 
 import argparse
 import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Set
 
 from rich.logging import RichHandler
 
-from pipeline import healer, orchestrator
-from pipeline.core import report
+from pipeline import orchestrator
+from pipeline.core import load_openface, report
 from pipeline.helpers import cli, utils
-from pipeline.helpers.timer import Timer
-from pipeline.models.pdf_reports import PdfReport
+from pipeline.report import cache as report_cache
 
 MODULE_NAME = "report_generation"
 
@@ -57,6 +62,24 @@ for module in noisy_modules:
     logging.getLogger(module).setLevel(logging.INFO)
 
 
+def get_reports_per_hour(count: int, start: datetime) -> float:
+    """
+    Returns the report generation rate.
+
+    Args:
+        count (int): The number of reports generated since 'start'.
+        start (datetime): The start of the measurement.
+
+    Returns:
+        float: Reports per hour.
+    """
+    hours = (datetime.now() - start).total_seconds() / 3600
+    if hours <= 0:
+        return 0
+
+    return count / hours
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         prog="decryption", description="Module to decrypt files."
@@ -85,81 +108,98 @@ if __name__ == "__main__":
     console.rule(f"[bold red]{MODULE_NAME}")
     logger.info(f"Using config file: {config_file}")
 
-    config_params = utils.config(config_file, section="general")
     studies = orchestrator.get_studies(config_file=config_file)
-
-    COUNTER = 0
+    report_workers, max_tasks = report.get_report_workers(config_file=config_file)
 
     logger.info(
         "[bold green]Starting report_generation loop...", extra={"markup": True}
     )
-    study_id = studies[0]
-    logger.info(f"Statring with study: {study_id}")
-
-    while True:
-        # Get interview name to process
-        interview_name = report.get_interview_name_to_process(
-            config_file=config_file, study_id=study_id
-        )
-
-        if interview_name is None:
-            if study_id == studies[-1]:
-                # Log if any reports were generated
-                if COUNTER > 0:
-                    orchestrator.log(
-                        config_file=config_file,
-                        module_name=MODULE_NAME,
-                        message=f"Generated {COUNTER} reports.",
-                    )
-                    COUNTER = 0
-
-                # Snooze if no interviews to process
-                orchestrator.snooze(config_file=config_file)
-                study_id = studies[0]
-                logger.info(f"Restarting with study: {study_id}")
-                continue
-            else:
-                study_id = studies[studies.index(study_id) + 1]
-                logger.info(f"Switching to study: {study_id}")
-                continue
-
-        COUNTER += 1
-        logger.info(
-            f"[cyan]Generating report for {interview_name}...",
-            extra={"markup": True},
-        )
-
-        report_path = report.construct_report_path(
-            config_file=config_file, interview_name=interview_name
-        )
+    logger.info(
+        f"Using {report_workers} report workers, replaced every {max_tasks} reports"
+    )
 
-        with Timer() as timer:
-            ERROR_MESSAGE = report.generate_report(
-                config_file=config_file,
-                interview_name=interview_name,
-                report_path=report_path,
-            )
+    COUNTER = 0
+    FAILED = 0
+    round_start = datetime.now()
+    exhausted_studies: Set[str] = set()
+    running: Dict[Future, str] = {}
 
-        pr_generation_time = timer.duration
-        logger.info(f"Generated report in {pr_generation_time:.2f} seconds")
+    executor = ProcessPoolExecutor(
+        max_workers=report_workers, max_tasks_per_child=max_tasks
+    )
 
-        if ERROR_MESSAGE:
-            logger.warning(
-                f"Error generating report for {interview_name}: {ERROR_MESSAGE}"
+    while True:
+        # Keep every worker busy, with the first study that still has work
+        pending_studies = [
+            study_id for study_id in studies if study_id not in exhausted_studies
+        ]
+        while pending_studies and len(running) < report_workers:
+            future = executor.submit(
+                report.process_next_report, config_file, pending_studies[0]
             )
-            healer.set_report_generation_not_possible(
+            running[future] = pending_studies[0]
+
+        if not running:
+            # Log if any reports were generated
+            if COUNTER > 0 or FAILED > 0:
+                reports_per_hour = get_reports_per_hour(COUNTER, round_start)
+                orchestrator.log(
+                    config_file=config_file,
+                    module_name=MODULE_NAME,
+                    message=f"Generated {COUNTER} reports ({FAILED} failed) \
+at {reports_per_hour:.1f} reports/hour with {report_workers} workers.",
+                )
+                COUNTER = 0
+                FAILED = 0
+
+            # Evict unused report cache entries, while idle
+            report_cache.prune_cache(config_file=config_file)
+
+            # Snooze if no interviews to process
+            orchestrator.snooze(
                 config_file=config_file,
-                interview_name=interview_name,
-                reason=ERROR_MESSAGE,
+                channels=[load_openface.NOTIFY_CHANNEL],
             )
+            exhausted_studies.clear()
+            round_start = datetime.now()
+            logger.info(f"Restarting with study: {studies[0]}")
             continue
 
-        pdf_report = PdfReport(
-            interview_name=interview_name,
-            pr_version="v1.0.0",
-            pr_path=str(report_path),
-            pr_generation_time=pr_generation_time,
-            pr_timestamp=datetime.now(),
-        )
+        done, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+        for future in done:
+            study_id = running.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed for using too much memory).
+                # Its job is retried once its lease expires.
+                logger.error(f"Report worker pool broken: {e}. Restarting pool...")
+                FAILED += 1
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(
+                    max_workers=report_workers, max_tasks_per_child=max_tasks
+                )
+                running.clear()
+                break
+            except Exception as e:  # pylint: disable=broad-except
+                logger.exception(f"Error generating report for {study_id}: {e}")
+                FAILED += 1
+                continue
+
+            if result is None:
+                if study_id not in exhausted_studies:
+                    logger.info(f"No more interviews to process for {study_id}")
+                exhausted_studies.add(study_id)
+                continue
 
-        report.log_pdf_report(config_file=config_file, pdf_report=pdf_report)
+            interview_name, pr_generation_time, error_message = result
+            if error_message:
+                FAILED += 1
+                continue
+
+            COUNTER += 1
+            reports_per_hour = get_reports_per_hour(COUNTER, round_start)
+            logger.info(
+                f"Generated report for {interview_name} in {pr_generation_time:.2f} \
+seconds ({COUNTER} reports, {reports_per_hour:.1f} reports/hour)"
+            )
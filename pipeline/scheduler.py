@@ -0,0 +1,667 @@
+"""
+Single process scheduler, running all pipeline stages with worker pools.
+
+The stage graph is loaded once:
+decrypt -> metadata -> video_qqc -> split_streams -> openface
+-> openface_qc -> load_openface -> report
+
+Ready items are claimed with the same functions the standalone runners use,
+and dispatched to a process pool per stage. Stage concurrency is limited by
+'<stage>_max_instances', and all running tasks share a global CPU and memory
+budget. Each task runs in a worker process, like a standalone runner would:
+progress bars (one rich live display per process) and failures of one
+task do not affect the others. Failed tasks mark their job as failed.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from pipeline import healer, orchestrator
+from pipeline.core import (
+    decryption,
+    feature_store,
+    fetch_video,
+    jobs,
+    load_openface,
+    metadata,
+    openface,
+    openface_qc,
+    report,
+    split_streams,
+    video_qqc,
+)
+from pipeline.helpers import db, ffprobe, utils
+from pipeline.helpers.timer import Timer
+from pipeline.models.decrypted_files import DecryptedFile
+from pipeline.models.interview_files import InterviewFile
+from pipeline.report import cache as report_cache
+
+logger = logging.getLogger(__name__)
+
+MODULE_NAME = "scheduler"
+
+# Default (max_instances, cpus, memory_gb) per stage, overridable with
+# '<stage>_max_instances', '<stage>_cpus' and '<stage>_memory_gb'
+# in the 'orchestration' section of the config file.
+STAGE_DEFAULTS: Dict[str, Tuple[int, float, float]] = {
+    "decrypt": (1, 1, 1),
+    "metadata": (2, 1, 0.5),
+    "video_qqc": (2, 1, 2),
+    "split_streams": (2, 2, 1),
+    "openface": (1, 4, 4),
+    "openface_qc": (2, 1, 2),
+    "load_openface": (1, 1, 4),
+    "report": (1, 1, 2),
+}
+
+
+class ResourceBudget:
+    """
+    Global CPU and memory budget, shared by all running tasks.
+    """
+
+    def __init__(self, cpus: float, memory_gb: float) -> None:
+        self.cpus = cpus
+        self.memory_gb = memory_gb
+        self.used_cpus = 0.0
+        self.used_memory_gb = 0.0
+        self._lock = threading.Lock()
+
+    def try_reserve(self, cpus: float, memory_gb: float) -> bool:
+        """
+        Reserves resources for a task, if available.
+
+        A task larger than the whole budget is only allowed to run alone.
+
+        Args:
+            cpus (float): CPUs required by the task.
+            memory_gb (float): Memory required by the task, in GB.
+
+        Returns:
+            bool: True if the resources were reserved.
+        """
+        with self._lock:
+            idle = self.used_cpus == 0 and self.used_memory_gb == 0
+            fits = (
+                self.used_cpus + cpus <= self.cpus
+                and self.used_memory_gb + memory_gb <= self.memory_gb
+            )
+            if not (fits or idle):
+                return False
+
+            self.used_cpus += cpus
+            self.used_memory_gb += memory_gb
+            return True
+
+    def release(self, cpus: float, memory_gb: float) -> None:
+        """
+        Returns the resources reserved by a task.
+
+        Args:
+            cpus (float): CPUs reserved by the task.
+            memory_gb (float): Memory reserved by the task, in GB.
+        """
+        with self._lock:
+            self.used_cpus = max(self.used_cpus - cpus, 0)
+            self.used_memory_gb = max(self.used_memory_gb - memory_gb, 0)
+
+
+class Stage:
+    """
+    A pipeline stage.
+
+    Attributes:
+        name (str): The stage name.
+        fetch (Callable): Claims the next item for a study, or returns None.
+        process (Callable): Processes a claimed item, in a worker process.
+        key (Callable): Returns a unique key for an item (its job item).
+        job_stage (Optional[str]): The job queue stage the items are claimed
+            from, None if they are not claimed from the job queue.
+        channels (List[str]): Notification channels that signal new work.
+        max_instances (int): Maximum number of concurrent tasks.
+        cpus (float): CPUs reserved by each task.
+        memory_gb (float): Memory reserved by each task, in GB.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[Path, str], Optional[Any]],
+        process: Callable[[Path, str, Any], None],
+        key: Callable[[Any], str],
+        job_stage: Optional[str],
+        channels: List[str],
+        max_instances: int,
+        cpus: float,
+        memory_gb: float,
+    ) -> None:
+        self.name = name
+        self.fetch = fetch
+        self.process = process
+        self.key = key
+        self.job_stage = job_stage
+        self.channels = channels
+        self.max_instances = max_instances
+        self.cpus = cpus
+        self.memory_gb = memory_gb
+
+        self.pool = self.create_pool()
+        self.in_flight: Set[str] = set()
+        self.processed = 0
+
+    def create_pool(self) -> ProcessPoolExecutor:
+        """
+        Returns a new pool of worker processes for the stage.
+
+        Jobs are claimed by the scheduler process, so workers act as its
+        worker ID (heartbeats, completing jobs).
+        """
+        return ProcessPoolExecutor(
+            max_workers=self.max_instances,
+            initializer=jobs.set_worker_id,
+            initargs=(jobs.get_worker_id(),),
+        )
+
+    def __repr__(self):
+        return (
+            f"Stage({self.name}, max_instances={self.max_instances}, "
+            f"cpus={self.cpus}, memory_gb={self.memory_gb})"
+        )
+
+    def __str__(self):
+        return self.__repr__()
+
+
+def get_resource_budget(config_file: Path) -> ResourceBudget:
+    """
+    Returns the global resource budget from the configuration file.
+
+    Defaults to all CPUs and 80% of the physical memory of the host.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+
+    Returns:
+        ResourceBudget: The global resource budget.
+    """
+    params = utils.config(config_file, section="orchestration")
+
+    total_memory_gb = (
+        os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / (1024**3)
+    )
+
+    cpus = float(params.get("scheduler_max_cpus", os.cpu_count() or 1))
+    memory_gb = float(params.get("scheduler_max_memory_gb", total_memory_gb * 0.8))
+
+    return ResourceBudget(cpus=cpus, memory_gb=memory_gb)
+
+
+def get_stage_params(config_file: Path, stage_name: str) -> Tuple[int, float, float]:
+    """
+    Returns the concurrency and resource requirements of a stage.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+        stage_name (str): The stage name.
+
+    Returns:
+        Tuple[int, float, float]: Maximum number of concurrent tasks,
+            CPUs and memory (GB) reserved by each task.
+    """
+    params = utils.config(config_file, section="orchestration")
+    max_instances, cpus, memory_gb = STAGE_DEFAULTS[stage_name]
+
+    max_instances = int(params.get(f"{stage_name}_max_instances", max_instances))
+    cpus = float(params.get(f"{stage_name}_cpus", cpus))
+    memory_gb = float(params.get(f"{stage_name}_memory_gb", memory_gb))
+
+    return max_instances, cpus, memory_gb
+
+
+# Task bodies, mirroring the standalone runners
+
+
+def _fetch_decrypt(config_file: Path, study_id: str) -> Optional[Any]:
+    if not orchestrator.check_if_decryption_requested(
+        config_file=config_file, requester=fetch_video.JOB_STAGE
+    ):
+        return None
+
+    return fetch_video.get_file_to_decrypt(config_file=config_file, study_id=study_id)
+
+
+def _process_decrypt(config_file: Path, study_id: str, item: Any) -> None:
+    file_to_decrypt, interview_type, interview_name = item
+    file_to_decrypt = Path(file_to_decrypt)
+    data_root = orchestrator.get_data_root(config_file=config_file)
+
+    dest_dir = fetch_video.construct_dest_dir(
+        encrypted_file_path=file_to_decrypt,
+        interview_type=interview_type,
+        study_id=study_id,
+        data_root=data_root,
+    )
+    dest_file_name = fetch_video.construct_dest_file_name(
+        file_to_decrypt=file_to_decrypt, interview_name=interview_name
+    )
+    destination_path = Path(dest_dir, dest_file_name)
+
+    def on_failure():
+        logger.info("Decryption request failed. Ignoring file.")
+        sql_query = InterviewFile.ignore_file(file_to_decrypt)
+        db.execute_queries(config_file=config_file, queries=[sql_query])
+        raise RuntimeError(f"Decryption request failed for {file_to_decrypt}")
+
+    fetch_video.log_decryption_request(
+        config_file=config_file,
+        source_path=file_to_decrypt,
+        destination_path=destination_path,
+        requested_by=MODULE_NAME,
+        on_failure=on_failure,
+    )
+
+    # The destination may have been suffixed, if it already existed
+    destination = db.fetch_record(
+        config_file=config_file,
+        query=f"""
+        SELECT destination_path FROM decrypted_files
+        WHERE source_path = '{db.santize_string(str(file_to_decrypt))}';
+        """,
+    )
+    if destination is not None:
+        destination_path = Path(destination)
+
+    with Timer() as timer:
+        decryption.decrypt_file(
+            config_file=config_file,
+            file_to_decrypt=file_to_decrypt,
+            path_for_decrypted_file=destination_path,
+        )
+
+    DecryptedFile.update_decrypted_status(
+        config_file=config_file,
+        file_path=file_to_decrypt,
+        process_time=timer.duration,
+    )
+
+
+def _process_metadata(config_file: Path, study_id: str, item: Any) -> None:
+    metadata_dict = ffprobe.get_metadata(
+        file_path_to_process=Path(item), config_file=config_file
+    )
+    metadata.log_metadata(
+        source=Path(item),
+        metadata=metadata_dict,
+        config_file=config_file,
+        requested_by=MODULE_NAME,
+    )
+
+
+def _process_video_qqc(config_file: Path, study_id: str, item: Any) -> None:
+    video_path = Path(item[0])
+    duration = float(item[1])
+
+    frames_path = video_path.parent / "frames" / video_path.stem
+    frames_path.mkdir(parents=True, exist_ok=True)
+
+    with jobs.JobHeartbeat(
+        config_file=config_file, stage=video_qqc.JOB_STAGE, item=str(video_path)
+    ):
+        with Timer() as timer:
+            qc_result = video_qqc.do_video_qqc(
+                video_path=video_path, duration=duration, frames_path=frames_path
+            )
+            orchestrator.fix_permissions(config_file=config_file, file_path=video_path)
+
+    qc_result.process_time = timer.duration
+    video_qqc.log_video_qqc(config_file=config_file, result=qc_result)
+
+
+def _process_split_streams(config_file: Path, study_id: str, item: Any) -> None:
+    video_path = Path(item[0])
+    has_black_bars = bool(item[1])
+    black_bar_height = int(item[2]) if item[2] is not None else None
+
+    with jobs.JobHeartbeat(
+        config_file=config_file, stage=split_streams.JOB_STAGE, item=str(video_path)
+    ):
+        streams = split_streams.split_streams(
+            video_path=video_path,
+            has_black_bars=has_black_bars,
+            black_bar_height=black_bar_height,
+            config_file=config_file,
+        )
+
+    split_streams.log_streams(config_file=config_file, streams=streams)
+
+
+def _process_openface(config_file: Path, study_id: str, item: Any) -> None:
+    video_stream_path, interview_role, video_path, interview_name = item
+
+    openface_path = openface.construct_output_path(
+        config_file=config_file, video_path=video_stream_path
+    )
+
+    with jobs.JobHeartbeat(
+        config_file=config_file,
+        stage=openface.JOB_STAGE,
+        item=str(video_stream_path),
+    ):
+        with Timer() as timer:
+            openface.run_openface(
+                config_file=config_file,
+                file_path_to_process=video_stream_path,
+                output_path=openface_path,
+            )
+        of_duration = timer.duration
+
+        feature_store.write_feature_store(
+            config_file=config_file, of_processed_path=openface_path
+        )
+
+        with Timer() as timer:
+            openface.run_openface_overlay(
+                config_file=config_file,
+                openface_path=openface_path,
+                face_aligned_video_path=openface_path / "face_aligned.mp4",
+                output_video_path=openface_path / "openface_aligned.mp4",
+                temp_dir_prefix=f"{interview_name}_",
+            )
+        overlay_duration = timer.duration
+
+    openface.log_openface(
+        config_file=config_file,
+        video_stream_path=video_stream_path,
+        interview_role=interview_role,
+        video_path=video_path,
+        openface_path=openface_path,
+        openface_process_time=of_duration,
+        overlay_process_time=overlay_duration,
+    )
+    openface.clean_up_after_openface(openface_path=openface_path)
+
+
+def _process_openface_qc(config_file: Path, study_id: str, item: Any) -> None:
+    try:
+        with jobs.JobHeartbeat(
+            config_file=config_file, stage=openface_qc.JOB_STAGE, item=str(item)
+        ):
+            with Timer() as timer:
+                openface_qc_result = openface_qc.run_openface_qc(of_processed_path=item)
+
+        openface_qc_result.ofqc_process_time = timer.duration
+        openface_qc.log_openface_qc(
+            config_file=config_file, openface_qc_result=openface_qc_result
+        )
+    except FileNotFoundError as e:
+        logger.error(e)
+        healer.clean_openface(config_file=config_file, openface_dir=item)
+
+
+def _process_load_openface(config_file: Path, study_id: str, item: Any) -> None:
+    with jobs.JobHeartbeat(
+        config_file=config_file, stage=load_openface.JOB_STAGE, item=item
+    ):
+        of_runs = load_openface.get_openface_runs(
+            config_file=config_file, interview_name=item
+        )
+        lof = load_openface.construct_load_openface(
+            interview_name=item, of_runs=of_runs, config_file=config_file
+        )
+        lof = load_openface.import_of_openface_db(config_file=config_file, lof=lof)
+
+    load_openface.log_load_openface(config_file=config_file, lof=lof)
+
+
+def _process_report(config_file: Path, study_id: str, item: Any) -> None:
+    report.process_report(config_file=config_file, interview_name=item)
+
+
+def build_stages(config_file: Path) -> List[Stage]:
+    """
+    Builds the stage graph, in pipeline order.
+
+    Args:
+        config_file (Path): The path to the configuration file.
+
+    Returns:
+        List[Stage]: The pipeline stages.
+    """
+    definitions: List[
+        Tuple[str, Callable, Callable, Callable, Optional[str], List[str]]
+    ] = [
+        (
+            "decrypt",
+            _fetch_decrypt,
+            _process_decrypt,
+            lambda item: str(item[0]),
+            fetch_video.JOB_STAGE,
+            [],
+        ),
+        (
+            "metadata",
+            metadata.get_file_to_process,
+            _process_metadata,
+            str,
+            None,
+            [DecryptedFile.NOTIFY_CHANNEL, split_streams.NOTIFY_CHANNEL],
+        ),
+        (
+            "video_qqc",
+            video_qqc.get_file_to_process,
+            _process_video_qqc,
+            lambda item: str(item[0]),
+            video_qqc.JOB_STAGE,
+            [metadata.NOTIFY_CHANNEL],
+        ),
+        (
+            "split_streams",
+            split_streams.get_file_to_process,
+            _process_split_streams,
+            lambda item: str(item[0]),
+            split_streams.JOB_STAGE,
+            [video_qqc.NOTIFY_CHANNEL],
+        ),
+        (
+            "openface",
+            openface.get_file_to_process,
+            _process_openface,
+            lambda item: str(item[0]),
+            openface.JOB_STAGE,
+            [split_streams.NOTIFY_CHANNEL],
+        ),
+        (
+            "openface_qc",
+            openface_qc.get_file_to_process,
+            _process_openface_qc,
+            str,
+            openface_qc.JOB_STAGE,
+            [openface.NOTIFY_CHANNEL],
+        ),
+        (
+            "load_openface",
+            load_openface.get_interview_to_process,
+            _process_load_openface,
+            str,
+            load_openface.JOB_STAGE,
+            [openface_qc.NOTIFY_CHANNEL],
+        ),
+        (
+            "report",
+            report.get_interview_name_to_process,
+            _process_report,
+            str,
+            report.JOB_STAGE,
+            [load_openface.NOTIFY_CHANNEL],
+        ),
+    ]
+
+    stages: List[Stage] = []
+    for name, fetch, process, key, job_stage, channels in definitions:
+        max_instances, cpus, memory_gb = get_stage_params(
+            config_file=config_file, stage_name=name
+        )
+        stages.append(
+            Stage(
+                name=name,
+                fetch=fetch,
+                process=process,
+                key=key,
+                job_stage=job_stage,
+                channels=channels,
+                max_instances=max_instances,
+                cpus=cpus,
+                memory_gb=memory_gb,
+            )
+        )
+
+    return stages
+
+
+class Scheduler:
+    """
+    Dispatches ready items to per stage worker pools, until interrupted.
+    """
+
+    def __init__(self, config_file: Path) -> None:
+        self.config_file = config_file
+        self.studies = orchestrator.get_studies(config_file=config_file)
+        self.stages = build_stages(config_file=config_file)
+        self.budget = get_resource_budget(config_file=config_file)
+
+        self.running: Dict[Future, Tuple[Stage, str, ProcessPoolExecutor]] = {}
+        self.decryption_count = 0
+
+        params = utils.config(config_file, section="orchestration")
+        self.poll_seconds = int(params.get("scheduler_poll_seconds", 60))
+
+    def _fetch(self, stage: Stage) -> Optional[Tuple[str, Any]]:
+        for study_id in self.studies:
+            item = stage.fetch(self.config_file, study_id)
+            if item is None:
+                continue
+            if stage.key(item) in stage.in_flight:
+                # Not claimed through the job queue, and already running
+                continue
+            return study_id, item
+
+        return None
+
+    def _dispatch(self, stage: Stage) -> int:
+        dispatched = 0
+        while len(stage.in_flight) < stage.max_instances:
+            if stage.name == "decrypt" and (
+                self.decryption_count
+                >= orchestrator.get_decryption_count(config_file=self.config_file)
+            ):
+                orchestrator.complete_decryption(
+                    config_file=self.config_file, requester=fetch_video.JOB_STAGE
+                )
+                self.decryption_count = 0
+                break
+
+            if not self.budget.try_reserve(stage.cpus, stage.memory_gb):
+                break
+
+            fetched = self._fetch(stage)
+            if fetched is None:
+                self.budget.release(stage.cpus, stage.memory_gb)
+                break
+
+            study_id, item = fetched
+            key = stage.key(item)
+            stage.in_flight.add(key)
+            if stage.name == "decrypt":
+                self.decryption_count += 1
+
+            logger.info(f"[cyan]{stage.name}: {key}", extra={"markup": True})
+            future = stage.pool.submit(stage.process, self.config_file, study_id, item)
+            self.running[future] = (stage, key, stage.pool)
+            dispatched += 1
+
+        return dispatched
+
+    def _reap(self, futures: Set[Future]) -> None:
+        for future in futures:
+            stage, key, pool = self.running.pop(future)
+            stage.in_flight.discard(key)
+            self.budget.release(stage.cpus, stage.memory_gb)
+
+            # Includes SystemExit, from sys.exit calls in the worker process
+            error = future.exception()
+            if error is None:
+                stage.processed += 1
+                continue
+
+            logger.error(f"{stage.name} failed for {key}: {error!r}", exc_info=error)
+            if stage.job_stage is not None:
+                jobs.fail_job(
+                    config_file=self.config_file, stage=stage.job_stage, item=key
+                )
+
+            if isinstance(error, BrokenProcessPool) and pool is stage.pool:
+                # A worker process died, the pool can not be used anymore
+                stage.pool = stage.create_pool()
+
+    def _log_progress(self) -> None:
+        processed = [
+            f"{stage.name}: {stage.processed}"
+            for stage in self.stages
+            if stage.processed > 0
+        ]
+        if not processed:
+            return
+
+        orchestrator.log(
+            config_file=self.config_file,
+            module_name=MODULE_NAME,
+            message=f"Processed {', '.join(processed)}.",
+        )
+        for stage in self.stages:
+            stage.processed = 0
+
+    def run(self) -> None:
+        """
+        Runs the scheduler loop.
+
+        Downstream stages are dispatched first, so items already in flight
+        are finished before new files are decrypted.
+        """
+        logger.info(f"Stages: {self.stages}")
+        logger.info(
+            f"Budget: {self.budget.cpus} CPUs, {self.budget.memory_gb:.1f} GB memory"
+        )
+
+        try:
+            while True:
+                dispatched = 0
+                for stage in reversed(self.stages):
+                    dispatched += self._dispatch(stage)
+
+                if self.running:
+                    done, _ = wait(
+                        list(self.running.keys()),
+                        timeout=self.poll_seconds,
+                        return_when=FIRST_COMPLETED,
+                    )
+                    self._reap(done)
+                    continue
+
+                if dispatched == 0:
+                    self._log_progress()
+                    # Ask for more files to be decrypted, like the OpenFace runner
+                    orchestrator.request_decrytion(config_file=self.config_file)
+                    # Evict unused report cache entries, while idle
+                    report_cache.prune_cache(config_file=self.config_file)
+                    channels = sorted(
+                        {channel for stage in self.stages for channel in stage.channels}
+                    )
+                    orchestrator.snooze(config_file=self.config_file, channels=channels)
+        finally:
+            for stage in self.stages:
+                stage.pool.shutdown(wait=False, cancel_futures=True)
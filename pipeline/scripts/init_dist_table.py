@@ -28,6 +28,8 @@ from rich.logging import RichHandler
 
 from pipeline.helpers import utils, db
 from pipeline import core
+from pipeline.models.openface_bin_stats import OpenfaceBinStats
+from pipeline.models.openface_subject_stats import OpenfaceSubjectStats
 
 MODULE_NAME = "init_db"
 INSTANCE_NAME = MODULE_NAME
@@ -74,6 +76,8 @@ def generate_drop_queries() -> List[str]:
         """
         DROP INDEX IF EXISTS off_timestamp_index;
         """,
+        OpenfaceBinStats.drop_table_query(),
+        OpenfaceSubjectStats.drop_table_query(),
     ]
 
     return queries
@@ -114,7 +118,8 @@ def generate_create_query(config_file: Path, csv_file: Path) -> str:
 
 def finalize() -> List[str]:
     """
-    Creates indexes and views, for the OpenFace features table.
+    Creates indexes and views, for the OpenFace features table,
+    and the openface_bin_stats and openface_subject_stats tables.
 
     Returns:
         List[str]: List of queries.
@@ -158,6 +163,12 @@ def finalize() -> List[str]:
 
     queries.extend(view_queries)
 
+    # Per-bin aggregates of openface_features, used for report generation
+    queries.extend(OpenfaceBinStats.init_table_query())
+
+    # Per-interview sufficient statistics, summed per subject for report generation
+    queries.extend(OpenfaceSubjectStats.init_table_query())
+
     return queries
 
 
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Rebuilds the openface_subject_stats table from openface_features.
+
+Used to backfill the statistics of interviews loaded before the table
+existed, or to repair them.
+"""
+
+import sys
+from pathlib import Path
+
+file = Path(__file__).resolve()
+parent = file.parent
+ROOT = None
+for parent in file.parents:
+    if parent.name == "av-pipeline-v2":
+        ROOT = parent
+sys.path.append(str(ROOT))
+
+# remove current directory from path
+try:
+    sys.path.remove(str(parent))
+except ValueError:
+    pass
+
+import argparse
+import logging
+
+from rich.logging import RichHandler
+
+from pipeline.helpers import db, utils
+from pipeline.helpers.timer import Timer
+from pipeline.models.openface_subject_stats import OpenfaceSubjectStats
+
+MODULE_NAME = "rebuild_subject_stats"
+
+console = utils.get_console()
+
+logger = logging.getLogger(MODULE_NAME)
+logargs = {
+    "level": logging.DEBUG,
+    # "format": "%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s",
+    "format": "%(message)s",
+    "handlers": [RichHandler(rich_tracebacks=True)],
+}
+logging.basicConfig(**logargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog=MODULE_NAME,
+        description="Rebuild per-subject OpenFace statistics from openface_features.",
+    )
+    parser.add_argument(
+        "-c", "--config", type=str, help="Path to the config file.", required=False
+    )
+    parser.add_argument(
+        "-s",
+        "--subject-id",
+        type=str,
+        help="Only rebuild the statistics of this subject.",
+        required=False,
+    )
+    args = parser.parse_args()
+
+    if args.config:
+        config_file = Path(args.config).resolve()
+        if not config_file.exists():
+            logger.error(f"Error: Config file '{config_file}' does not exist.")
+            sys.exit(1)
+    else:
+        config_file = utils.get_config_file_path()
+
+    console.rule(f"[bold red]{MODULE_NAME}")
+    logger.info(f"Using config file: {config_file}")
+
+    queries = OpenfaceSubjectStats.init_table_query()
+    queries.append(OpenfaceSubjectStats.rebuild_query(subject_id=args.subject_id))
+
+    with Timer() as timer:
+        db.execute_queries(
+            config_file=config_file,
+            queries=queries,
+            show_commands=False,
+            db="openface_db",
+        )
+
+    logger.info(
+        f"[green]Rebuilt subject statistics in {timer.duration:.2f} seconds",
+        extra={"markup": True},
+    )
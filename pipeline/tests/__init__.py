@@ -0,0 +1,4 @@
+# package level init file
+"""
+Tests for the pipeline.
+"""
@@ -0,0 +1,188 @@
+"""
+Compares the NumPy heatmap tiles with the seaborn heatmaps they replaced.
+
+Renders the pose and AU heatmaps of a synthetic page with both, at the shipped
+heatmap_config, bins_per_page and fau_h_gap_idx. The seaborn rendering is the
+golden image.
+
+The tiles are not pixel-identical to seaborn's output (see render_heatmap),
+so the comparison allows for:
+- a difference in tile size of up to MAX_SIZE_DIFF pixels,
+- up to MAX_DIFF_FRACTION of the pixels differing by more than
+  PIXEL_THRESHOLD, after a BLUR_KERNEL box blur of both images.
+"""
+
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+matplotlib = pytest.importorskip("matplotlib")
+matplotlib.use("Agg")
+plt = pytest.importorskip("matplotlib.pyplot")
+sns = pytest.importorskip("seaborn")
+
+from pipeline import constants  # noqa: E402
+from pipeline.helpers.config import config  # noqa: E402
+from pipeline.helpers.plot import heatmaps  # noqa: E402
+from pipeline.models.lite.heatmap_config import HeatmapConfig  # noqa: E402
+
+CONFIG_FILE = Path(__file__).resolve().parents[2] / "ampscz.config.ini"
+
+# Largest difference in tile size, in pixels (rounding of the tight bounding box)
+MAX_SIZE_DIFF = 2
+# Pixels whose difference (after blurring) exceeds this are counted as different
+PIXEL_THRESHOLD = 48
+# Largest fraction of different pixels
+MAX_DIFF_FRACTION = 0.01
+# Box blur, so the anti-aliasing of the thin cell borders is not counted
+BLUR_KERNEL = (3, 3)
+
+
+def render_reference(
+    matrix: np.ndarray,
+    cmap_name: str,
+    heatmap_config: HeatmapConfig,
+    figsize: Tuple[float, float],
+    output_path: Path,
+    h_gap_idx: Optional[List[int]] = None,
+) -> None:
+    """
+    Renders a heatmap with seaborn, as the report did before render_heatmap.
+
+    Args:
+        matrix (np.ndarray): The values, with one row per feature and one column per bin.
+        cmap_name (str): Name of the matplotlib colormap.
+        heatmap_config (HeatmapConfig): The configuration for the heatmap.
+        figsize (Tuple[float, float]): The size of the figure.
+        output_path (Path): The path to save the image to.
+        h_gap_idx (Optional[List[int]]): Rows to add a horizontal gap before.
+    """
+    plt.figure(figsize=figsize)
+    ax = sns.heatmap(
+        matrix,
+        cmap=heatmaps.get_colormap(cmap_name),
+        cbar=False,
+        square=True,
+        linewidths=heatmap_config.linewidth,  # type: ignore
+    )
+
+    plt.xticks([])
+    plt.yticks([])
+
+    for i in range(matrix.shape[1]):
+        if i % heatmap_config.bins_per_v_gap == 0:
+            ax.axvline(i, color="white", lw=heatmap_config.gap_size)
+
+    for i in h_gap_idx or []:
+        ax.axhline(i, color="white", lw=heatmap_config.gap_size)
+
+    plt.gca().set_aspect("equal", adjustable="box")
+    plt.savefig(output_path, bbox_inches="tight", pad_inches=0)
+    plt.close()
+
+
+def make_matrix(rng: np.random.Generator, num_rows: int, num_bins: int) -> np.ndarray:
+    """
+    Returns random values in [0, 1], with a few bins without data (NaN).
+
+    Args:
+        rng (np.random.Generator): The random number generator.
+        num_rows (int): The number of features.
+        num_bins (int): The number of bins.
+
+    Returns:
+        np.ndarray: The values.
+    """
+    matrix = rng.random((num_rows, num_bins))
+    matrix[:, rng.choice(num_bins, size=max(1, num_bins // 10), replace=False)] = np.nan
+
+    return matrix
+
+
+def get_page_params() -> Tuple[int, List[int]]:
+    """
+    Returns the shipped bins_per_page and fau_h_gap_idx.
+
+    Returns:
+        Tuple[int, List[int]]: The number of bins per page, and the AU rows
+            with a horizontal gap before them.
+    """
+    report_params = config(CONFIG_FILE, section="report_generation")
+    bins_per_page = int(report_params["bins_per_page"])
+    fau_h_idx = [int(idx) for idx in report_params["fau_h_gap_idx"].split(",")]
+
+    return bins_per_page, fau_h_idx
+
+
+# Same figure sizes and colormaps as make_heatmap and
+# make_standard_deviation_heatmap
+@pytest.mark.parametrize(
+    "name, num_rows, cmap_name, figsize, with_h_gaps",
+    [
+        (
+            "pose",
+            len(constants.HEADPOSE_COLS + constants.GAZE_COLS),
+            "PRGn",
+            (10, 8),
+            False,
+        ),
+        ("fau", len(constants.AU_COLS), "bwr", (20, 7), True),
+    ],
+)
+def test_render_heatmap_matches_seaborn(
+    tmp_path: Path,
+    name: str,
+    num_rows: int,
+    cmap_name: str,
+    figsize: Tuple[float, float],
+    with_h_gaps: bool,
+) -> None:
+    """
+    Checks that a rendered tile matches the seaborn heatmap, within the
+    documented tolerances.
+    """
+    bins_per_page, fau_h_idx = get_page_params()
+    h_gap_idx = fau_h_idx if with_h_gaps else None
+    matrix = make_matrix(np.random.default_rng(0), num_rows, bins_per_page)
+
+    reference_path = tmp_path / f"{name}_seaborn.png"
+    tile_path = tmp_path / f"{name}_numpy.png"
+
+    render_reference(
+        matrix=matrix,
+        cmap_name=cmap_name,
+        heatmap_config=constants.heatmap_config,
+        figsize=figsize,
+        output_path=reference_path,
+        h_gap_idx=h_gap_idx,
+    )
+    tile = heatmaps.render_heatmap(
+        matrix=matrix,
+        cmap=heatmaps.get_colormap(cmap_name),
+        heatmap_config=constants.heatmap_config,
+        figsize=figsize,
+        h_gap_idx=h_gap_idx,
+    )
+    heatmaps.save_tile(tile=tile, output_path=str(tile_path))
+
+    reference = cv2.imread(str(reference_path), cv2.IMREAD_COLOR)
+    rendered = cv2.imread(str(tile_path), cv2.IMREAD_COLOR)
+
+    size_diff = np.abs(np.subtract(reference.shape[:2], rendered.shape[:2]))
+    assert size_diff.max() <= MAX_SIZE_DIFF, (
+        f"tile is {rendered.shape[1]}x{rendered.shape[0]}, "
+        f"reference is {reference.shape[1]}x{reference.shape[0]}"
+    )
+
+    height = min(reference.shape[0], rendered.shape[0])
+    width = min(reference.shape[1], rendered.shape[1])
+    reference = cv2.blur(reference[:height, :width], BLUR_KERNEL).astype(int)
+    rendered = cv2.blur(rendered[:height, :width], BLUR_KERNEL).astype(int)
+
+    diff = np.abs(reference - rendered).max(axis=2)
+    diff_fraction = float((diff > PIXEL_THRESHOLD).mean())
+
+    assert diff_fraction <= MAX_DIFF_FRACTION, f"{diff_fraction:.2%} pixels differ"